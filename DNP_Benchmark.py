@@ -0,0 +1,1696 @@
+# Code author: Patrick Woolard
+# Email: Jwoolard@augusta.edu
+# Github: https://github.com/JwoolardAU/DungeonsNPythons
+
+
+'''
+Benchmarks for Dungeons & Pythons.
+
+Run 'python DNP_Benchmark.py' to run every benchmark, or 'python DNP_Benchmark.py <name> ...' to run only some of them.
+'python DNP_Benchmark.py --list' prints the names of the benchmarks that are available, and '--help' every option.
+
+Every benchmark starts from the same seed (SEED, or '--seed <number>'), so two runs roll the same dice and make the same characters.
+To compare commits, save a run's results as JSON and compare a later run against it:
+    python DNP_Benchmark.py --json before.json                          (on the old commit)
+    python DNP_Benchmark.py --json after.json --compare before.json     (on the new one, prints how every timing changed)
+'''
+
+
+import argparse # command line options
+import json # --json results and --compare
+import os # counting CPU cores
+import pickle # measuring how big characters are when pickled
+import queue # handing results back from loopback receiver threads
+import random # used by the legacy (pre batch engine) dice rolling loop we compare against
+import shelve # the legacy character storage the character store is compared against
+import shutil # cleaning up after the legacy character share
+import socket # loopback connections for the character share benchmarks
+import sys # command line arguments
+import tempfile # scratch folders so benchmarks never touch the user's real characters
+import threading # loopback receivers run next to the sender
+import time # timing each benchmark
+import tracemalloc # measuring how much memory characters take up
+from zipfile import ZipFile # the legacy character share zipped a temporary shelve
+
+import DNP_Dice
+
+
+# Every benchmark registers itself here under its name (see the 'benchmark' decorator below)
+BENCHMARKS = {}
+
+# The seed every benchmark starts from (see seedEverything(), '--seed <number>' changes it)
+SEED = 1
+
+# What the benchmarks that ran measured, {benchmark: {metric: {"value", "unit"}}} (see record(), written out with --json)
+RESULTS = {}
+_running = None # the name of the benchmark that is running, record() files results under it
+
+# Checks a benchmark makes that did not hold (i.e. the app importing too slowly). main() lists them at the end and exits with status 1
+FAILURES = []
+
+
+def benchmark(name):
+  '''
+  EFFECTS: Decorator that registers a benchmark function under `name` so it can be run from the command line.
+  '''
+
+  def register(func):
+    BENCHMARKS[name] = func
+    return func
+  return register
+
+
+def record(metric, value, unit="s"):
+  '''
+  EFFECTS: Files `value` (in `unit`, seconds unless told otherwise) as `metric` of the benchmark that is running, for --json and --compare.
+  '''
+
+  RESULTS.setdefault(_running, {})[metric] = {"value": value, "unit": unit}
+
+
+def seedEverything(seed):
+  '''
+  EFFECTS: Seeds the random module and the dice engine's shared generator (DNP_Dice) with `seed`, so whatever rolls dice or picks at random
+  without being handed a generator does the same thing on every run.
+  '''
+
+  random.seed(seed)
+  DNP_Dice._defaultGenerator = DNP_Dice.makeRng(seed) if DNP_Dice.np is not None else None
+
+
+def timeIt(func, *args, repeat=3):
+  '''
+  EFFECTS: Calls func(*args) `repeat` times and returns the fastest wall clock time in seconds (the fastest run is the least disturbed by other programs).
+  '''
+
+  best = None
+  for attempt in range(repeat):
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    if best is None or elapsed < best:
+      best = elapsed
+  return best
+
+
+# ---------------------------------- ABILITY SCORE ROLLING ----------------------------------
+
+def legacyRollScores():
+  '''
+  EFFECTS: The original one-die-at-a-time rollScores() loop, kept here only so the batch dice engine has something to be compared against.
+  '''
+
+  values = []
+  for score in range(1,7):
+    rolls = []
+    for roll in range(1,5):
+      rolls.append(random.randrange(1,7))
+    rolls.sort()
+    total = 0
+    for i in range(1,4):
+      total += rolls[i]
+    values.append(total)
+  return values
+
+
+def legacyRollMany(count):
+  '''
+  EFFECTS: Rolls `count` ability score sets with the legacy loop, one set at a time.
+  '''
+
+  return [legacyRollScores() for row in range(count)]
+
+
+@benchmark("rollScores")
+def benchRollScores(count=1000000):
+  '''
+  EFFECTS: Compares rolling `count` ability score sets with the legacy loop against one rollScoreBatch() call, with every backend the
+  batch engine has here: the NumPy one (the one the app uses when NumPy is installed) and the pure-Python fallback (always timed, it is
+  what runs without NumPy). The legacy loop is timed on a tenth of the batch and scaled up (it is strictly linear in count) so the
+  benchmark finishes in reasonable time.
+  '''
+
+  backends = [("numpy", DNP_Dice.makeRng(1))] if DNP_Dice.np is not None else []
+  backends.append(("pure python", random.Random(1))) # a random.Random always takes the fallback path
+
+  legacySample = max(1, count // 10)
+  legacy = timeIt(legacyRollMany, legacySample, repeat=1) * (count / legacySample)
+
+  record("legacyLoop", legacy)
+  print(f"rollScores ({count} sets, app backend: {backends[0][0]})")
+  print(f"\tlegacy loop:               {legacy:.3f}s (extrapolated from {legacySample} sets)")
+  for backend, rng in backends:
+    batch = timeIt(DNP_Dice.rollScoreBatch, count, rng)
+    record("batchEngine" if backend == backends[0][0] else "batchFallback", batch)
+    print(f"\tbatch engine ({backend + '):':13} {batch:.3f}s  ({legacy/batch:.1f}x faster)")
+  if DNP_Dice.np is None:
+    print("\t(NumPy is not installed: pip install numpy for the vectorized backend)")
+
+
+# ---------------------------------- BULK GENERATION ----------------------------------
+
+@benchmark("bulkGenerate")
+def benchBulkGenerate(count=200000):
+  '''
+  EFFECTS: Times bulk character generation (without saving) with 1, 2, 4, ... worker processes up to the number of CPU cores, to show how it scales.
+  '''
+
+  import DNP_Generator # imported here so the other benchmarks still run without the app's dependencies
+
+  cores = os.cpu_count() or 1
+  workerCounts = [1]
+  while workerCounts[-1]*2 <= cores:
+    workerCounts.append(workerCounts[-1]*2)
+  if workerCounts[-1] != cores:
+    workerCounts.append(cores)
+
+  print(f"bulkGenerate ({count} characters, not saved, {cores} CPU cores)")
+  single = None
+  for workers in workerCounts:
+    elapsed = timeIt(DNP_Generator.bulkGenerate, count, None, 1, workers, False, repeat=1)
+    single = single or elapsed
+    print(f"\t{workers} worker(s): {elapsed:.2f}s ({count/elapsed:.0f} characters/s, {single/elapsed:.2f}x)")
+
+
+# ---------------------------------- CHARACTER STORAGE ----------------------------------
+
+@benchmark("storeQuery")
+def benchStoreQuery(count=100000):
+  '''
+  EFFECTS: Compares listing and filtering a roster of `count` characters in the legacy shelve against the SQLite character store.
+  '''
+
+  import DNP_Generator
+  import DNP_Store
+
+  characters = DNP_Generator.generateCharacters(count, seed=1)
+
+  with tempfile.TemporaryDirectory() as folder:
+    shelfFile = shelve.open(os.path.join(folder, "Characters"))
+    for newChar in characters:
+      shelfFile[newChar.name] = newChar
+    charStore = DNP_Store.CharacterStore(os.path.join(folder, "Characters.sqlite3"))
+    charStore.saveMany(characters)
+
+    def shelveQuery():
+      names = list(shelfFile.keys())
+      loaded = (shelfFile[name] for name in names) # every character has to be unpickled to check its race and class
+      elves = [c.name for c in loaded if c.race == "Elf" and c.charClass == "Wizard"]
+      return names, elves
+
+    def storeQuery():
+      return charStore.names(), charStore.find(race="Elf", charClass="Wizard")
+
+    legacy = timeIt(shelveQuery, repeat=1)
+    store = timeIt(storeQuery)
+    summaries = timeIt(charStore.summaries) # the menu listing: name, race, class, level and gold without loading any details
+    shelfFile.close()
+    charStore.close()
+
+  print(f"storeQuery (list every name + find Elf Wizards in {count} characters)")
+  print(f"\tshelve: {legacy*1000:.1f}ms")
+  print(f"\tstore:  {store*1000:.1f}ms")
+  print(f"\tspeedup: {legacy/store:.1f}x")
+  print(f"\tstore summaries (menu listing): {summaries*1000:.1f}ms")
+
+
+# ---------------------------------- CHARACTER MEMORY ----------------------------------
+
+class LegacyCharacter:
+  '''
+  The original Character layout (a plain class whose attributes live in a per-character dictionary, with abScores as a dict of six entries),
+  kept here only so the compact Character has something to be compared against.
+  '''
+
+  def __init__(self, character):
+    self.race = character.race
+    self.charClass = character.charClass
+    self.name = character.name
+    self.age = character.age
+    self.gender = character.gender
+    self.abScores = dict(character.abScores)
+    self.sessGoals = []
+    self.inventory = []
+    self.level = character.level
+    self.gold = character.gold
+    self.alignment = character.alignment
+
+
+def measureMemory(build):
+  '''
+  EFFECTS: Returns (result of build(), bytes of memory still allocated by build() once it returns).
+  '''
+
+  tracemalloc.start()
+  before = tracemalloc.get_traced_memory()[0]
+  result = build()
+  used = tracemalloc.get_traced_memory()[0] - before
+  tracemalloc.stop()
+  return result, used
+
+
+@benchmark("characterMemory")
+def benchCharacterMemory(count=100000):
+  '''
+  EFFECTS: Compares the memory each resident character takes, and the size of each pickled character, between the legacy dictionary based
+  layout and the compact Character. Names and ages are shared by both layouts, so only what each layout adds on top of them is counted.
+  '''
+
+  import DNP_Generator
+
+  characters = DNP_Generator.generateCharacters(count, seed=1)
+  for character in characters:
+    character.level = "5"
+    character.gold = "150"
+
+  legacy, legacyBytes = measureMemory(lambda: [LegacyCharacter(c) for c in characters])
+  compact, compactBytes = measureMemory(lambda: [DNP_Generator.Character(c.race, c.charClass, c.name, c.age, c.gender, c.abScores) for c in characters])
+  legacyPickle = sum(len(pickle.dumps(c, pickle.HIGHEST_PROTOCOL)) for c in legacy) / count
+  compactPickle = sum(len(pickle.dumps(c, pickle.HIGHEST_PROTOCOL)) for c in characters) / count
+
+  print(f"characterMemory ({count} characters)")
+  print(f"	legacy memory:  {legacyBytes/count:.0f} bytes per character")
+  print(f"	compact memory: {compactBytes/count:.0f} bytes per character ({legacyBytes/compactBytes:.1f}x smaller)")
+  print(f"	legacy pickle:  {legacyPickle:.0f} bytes per character")
+  print(f"	compact pickle: {compactPickle:.0f} bytes per character ({legacyPickle/compactPickle:.1f}x smaller)")
+
+
+# ---------------------------------- ROSTER ANALYTICS ----------------------------------
+
+@benchmark("rosterReport")
+def benchRosterReport(count=100000):
+  '''
+  EFFECTS: Compares answering "average Strength of each class" and "level distribution by race" over `count` saved characters by loading
+  every character and walking its ability scores (the naive loop) against a columnar DNP_Roster.Roster.
+  '''
+
+  import DNP_Generator
+  import DNP_Roster
+  import DNP_Store
+
+  rng = random.Random(1)
+  characters = DNP_Generator.generateCharacters(count, seed=1)
+  for character in characters:
+    character.level = str(rng.randint(1, 20))
+
+  with tempfile.TemporaryDirectory() as folder:
+    charStore = DNP_Store.CharacterStore(os.path.join(folder, "Characters.sqlite3"), cacheSize=0)
+    charStore.saveMany(characters)
+
+    def naiveReport():
+      strength = {}
+      levels = {}
+      for name in charStore.names():
+        c = charStore.get(name)
+        total, seen = strength.get(c.charClass, (0, 0))
+        strength[c.charClass] = (total + int(c.abScores["Strength"]), seen + 1)
+        raceLevels = levels.setdefault(c.race, {})
+        raceLevels[c.level] = raceLevels.get(c.level, 0) + 1
+      return {charClass: total / seen for charClass, (total, seen) in strength.items()}, levels
+
+    def rosterReport(roster):
+      return roster.groupBy("charClass", "Strength"), roster.crossTab("race", "level")
+
+    naive = timeIt(naiveReport, repeat=1)
+    build = timeIt(DNP_Roster.Roster.fromStore, charStore, False, repeat=1)
+    roster = DNP_Roster.Roster.fromStore(charStore, follow=False)
+    query = timeIt(rosterReport, roster)
+    update = timeIt(lambda: [roster.update(c) for c in characters[:1000]]) / 1000
+    charStore.close()
+
+  backend = "numpy" if DNP_Roster.np is not None else "pure python"
+  print(f"rosterReport (average Strength by class + level distribution by race over {count} characters, {backend} backend)")
+  print(f"\tnaive loop:       {naive*1000:.1f}ms")
+  print(f"\troster build:     {build*1000:.1f}ms (once per session)")
+  print(f"\troster query:     {query*1000:.2f}ms ({naive/query:.0f}x faster than the naive loop)")
+  print(f"\troster update:    {update*1000000:.1f}us per saved character")
+
+
+# ---------------------------------- CHARACTER SHARE ----------------------------------
+
+def loopbackReceiver(receive, transfers):
+  '''
+  EFFECTS: Starts a thread that accepts `transfers` connections on a free loopback port, one at a time, and puts receive(connection) for each of them
+  in a queue. Returns (port, queue).
+  '''
+
+  server = socket.create_server(("127.0.0.1", 0))
+  results = queue.Queue()
+
+  def serve():
+    with server:
+      for transfer in range(transfers):
+        connection, address = server.accept()
+        with connection:
+          results.put(receive(connection))
+
+  threading.Thread(target=serve, daemon=True).start()
+  return server.getsockname()[1], results
+
+
+def legacyZip(character, folder):
+  '''
+  EFFECTS: The first half of the original sendChar() transport: writes `character` to a temporary shelve, zips it into `folder`
+  and returns the path of the zip file.
+  '''
+
+  tempFolder = os.path.join(folder, "Temp_Send")
+  os.mkdir(tempFolder)
+  tempShelf = shelve.open(os.path.join(tempFolder, "Send"))
+  tempShelf[character.name] = character
+  tempShelf.close()
+
+  zipPath = os.path.join(folder, "Send.zip")
+  with ZipFile(zipPath, "w") as zip:
+    for root, directories, files in os.walk(tempFolder):
+      for filename in files:
+        zip.write(os.path.join(root, filename), filename)
+  shutil.rmtree(tempFolder)
+  return zipPath
+
+
+def legacySend(port, character, folder):
+  '''
+  EFFECTS: The original sendChar() transport, kept here only so the streaming share has something to be compared against:
+  write a temporary shelve, zip it, and send the zip file 2048 bytes at a time.
+  '''
+
+  zipPath = legacyZip(character, folder)
+  client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+  client.connect(("127.0.0.1", port))
+  with open(zipPath, "rb") as file:
+    data = file.read(2048)
+    while data:
+      client.send(data)
+      data = file.read(2048)
+  client.close()
+  os.remove(zipPath)
+
+
+def legacyReceive(connection, folder):
+  '''
+  EFFECTS: The original receiveChar() transport: write the zip to disk 2048 bytes at a time, extract it, and open the shelve inside.
+  '''
+
+  zipPath = os.path.join(folder, "recv.zip")
+  with open(zipPath, "wb") as file:
+    data = connection.recv(2048)
+    while data:
+      file.write(data)
+      data = connection.recv(2048)
+
+  tempFolder = os.path.join(folder, "Temp_Recv")
+  with ZipFile(zipPath) as zip:
+    zip.extractall(tempFolder)
+  tempShelf = shelve.open(os.path.join(tempFolder, "Send"))
+  character = tempShelf[list(tempShelf.keys())[0]]
+  tempShelf.close()
+  os.remove(zipPath)
+  shutil.rmtree(tempFolder)
+  return character
+
+
+def shareCharacters():
+  '''
+  EFFECTS: Returns (a typical character, a character with a 4000 letter backstory and 2000 inventory items) to send in the share benchmarks.
+  '''
+
+  import DNP_Generator
+
+  typical, big = DNP_Generator.generateCharacters(2, seed=1)
+  typical.level = "5"
+  typical.inventory.extend(["rope", "torch", "rations"])
+  big.backStory = "Once upon a time... " * 200
+  big.inventory.extend(f"item {number}" for number in range(2000))
+  return typical, big
+
+
+@benchmark("shareSend")
+def benchShareSend(transfers=100):
+  '''
+  EFFECTS: Sends characters over a loopback connection `transfers` times with the legacy temp-shelve + zip + 2048 byte chunk transport
+  and with the streaming in-memory frame (DNP_Share.py), and compares the time from starting the send to the receiver having the character.
+  '''
+
+  import DNP_Share
+
+  print(f"shareSend ({transfers} loopback transfers each)")
+  for label, character in zip(("typical character", "big character"), shareCharacters()):
+    with tempfile.TemporaryDirectory() as sendFolder, tempfile.TemporaryDirectory() as receiveFolder:
+      port, results = loopbackReceiver(lambda connection: legacyReceive(connection, receiveFolder), transfers)
+      start = time.perf_counter()
+      for transfer in range(transfers):
+        legacySend(port, character, sendFolder)
+        results.get()
+      legacy = (time.perf_counter() - start) / transfers
+
+    port, results = loopbackReceiver(DNP_Share.receiveCharacter, transfers)
+    start = time.perf_counter()
+    for transfer in range(transfers):
+      with DNP_Share.connectTo("127.0.0.1", port) as connection:
+        DNP_Share.sendCharacter(connection, character)
+      results.get()
+    streaming = (time.perf_counter() - start) / transfers
+
+    size = len(DNP_Share.encodeCharacter(character))
+    record(f"{label.split()[0]}.legacyZip", legacy)
+    record(f"{label.split()[0]}.streaming", streaming)
+    print(f"\t{label} ({size} byte frame)")
+    print(f"\t\tlegacy zip:  {legacy*1000:.2f}ms per transfer")
+    print(f"\t\tstreaming:   {streaming*1000:.2f}ms per transfer ({legacy/streaming:.1f}x faster, {size/streaming/1e6:.1f} MB/s)")
+
+
+def timeReceive(data, receive, transfers):
+  '''
+  EFFECTS: Returns the average time receive(connection) takes when the other end of `connection` sends `data` and hangs up.
+  Only the receiving side is timed (the sending is done by a thread that has already started writing).
+  '''
+
+  total = 0
+  for transfer in range(transfers):
+    receiver, sender = socket.socketpair()
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024 * 1024)
+    def send():
+      with sender:
+        sender.sendall(data)
+    thread = threading.Thread(target=send)
+    with receiver:
+      thread.start()
+      start = time.perf_counter()
+      receive(receiver)
+      total += time.perf_counter() - start
+    thread.join()
+  return total / transfers
+
+
+def chunkedReceive(connection):
+  '''
+  EFFECTS: Reads one frame the way most socket code does it, recv() into new 2048 byte chunks joined at the end, and returns the character in it.
+  '''
+
+  import DNP_Share
+
+  chunks = []
+  data = connection.recv(2048)
+  while data:
+    chunks.append(data)
+    data = connection.recv(2048)
+  return DNP_Share.decodeCharacter(b"".join(chunks)[DNP_Share.HEADER_SIZE:])
+
+
+@benchmark("shareReceive")
+def benchShareReceive(transfers=200):
+  '''
+  EFFECTS: Times only the receiving side of a character share: the legacy zip written to disk, extracted and unshelved, a frame read in
+  2048 byte recv() chunks and joined, and a frame read with recv_into() into one preallocated buffer (DNP_Share.FrameReader).
+  '''
+
+  import DNP_Share
+
+  print(f"shareReceive ({transfers} receives each, receiving side only)")
+  for label, character in zip(("typical character", "big character"), shareCharacters()):
+    with tempfile.TemporaryDirectory() as folder:
+      with open(legacyZip(character, folder), "rb") as file:
+        zipData = file.read()
+      legacy = timeReceive(zipData, lambda connection: legacyReceive(connection, folder), transfers)
+
+    frame = DNP_Share.encodeFrame(DNP_Share.FRAME_CHARACTER, DNP_Share.encodeCharacter(character))
+    chunked = timeReceive(frame, chunkedReceive, transfers)
+    buffered = timeReceive(frame, DNP_Share.receiveCharacter, transfers)
+
+    record(f"{label.split()[0]}.legacyZip", legacy)
+    record(f"{label.split()[0]}.chunkedRecv", chunked)
+    record(f"{label.split()[0]}.recvInto", buffered)
+    print(f"\t{label} ({len(frame)} byte frame, {len(zipData)} byte zip)")
+    print(f"\t\tlegacy zip:      {legacy*1000:.3f}ms per receive")
+    print(f"\t\tchunked recv:    {chunked*1000:.3f}ms per receive")
+    print(f"\t\trecv_into:       {buffered*1000:.3f}ms per receive ({buffered/legacy:.0%} of the legacy time, {buffered/chunked:.0%} of the chunked time)")
+
+
+@benchmark("shareRoster")
+def benchShareRoster(count=200):
+  '''
+  EFFECTS: Moves a `count` character roster between two character stores over loopback, one connection (and one transaction) per character
+  like the single character share, and as one bulk share over a single connection saved a block at a time (DNP_Share.sendRoster()).
+  '''
+
+  import DNP_Generator
+  import DNP_Share
+  import DNP_Store
+
+  characters = DNP_Generator.generateCharacters(count, seed=1)
+  for character in characters:
+    character.inventory.extend(["rope", "torch", "rations"])
+
+  with tempfile.TemporaryDirectory() as folder:
+    charStore = DNP_Store.CharacterStore(os.path.join(folder, "OneByOne.sqlite3"))
+    port, results = loopbackReceiver(lambda connection: DNP_Share.receiveRoster(connection, charStore), count)
+    start = time.perf_counter()
+    for character in characters:
+      with DNP_Share.connectTo("127.0.0.1", port) as connection:
+        DNP_Share.sendCharacter(connection, character)
+      results.get()
+    oneByOne = time.perf_counter() - start
+    charStore.close()
+
+    charStore = DNP_Store.CharacterStore(os.path.join(folder, "Bulk.sqlite3"))
+    port, results = loopbackReceiver(lambda connection: DNP_Share.receiveRoster(connection, charStore), 1)
+    start = time.perf_counter()
+    with DNP_Share.connectTo("127.0.0.1", port) as connection:
+      report = DNP_Share.sendRoster(connection, characters)
+    results.get()
+    bulk = time.perf_counter() - start
+    saved = len(charStore)
+    charStore.close()
+
+  print(f"shareRoster ({count} characters, {len(report['saved'])} reported saved, {saved} in the receiving store)")
+  print(f"\tone connection each:  {oneByOne*1000:.1f}ms ({oneByOne/count*1000:.2f}ms per character)")
+  print(f"\tbulk share:           {bulk*1000:.1f}ms ({bulk/count*1000:.3f}ms per character, {oneByOne/bulk:.1f}x faster)")
+
+
+
+class SlowLink:
+  '''
+  A connection that sends everything in 4 pieces with a pause before each, standing in for a slow wireless link in the share benchmarks.
+  '''
+
+  def __init__(self, connection, latency):
+    self.connection = connection
+    self.latency = latency
+
+  def sendall(self, data):
+    for piece in range(4):
+      time.sleep(self.latency)
+      self.connection.sendall(data[piece*len(data)//4:(piece+1)*len(data)//4])
+
+  def recv_into(self, buffer):
+    return self.connection.recv_into(buffer)
+
+
+@benchmark("shareServer")
+def benchShareServer(senders=48, count=25, latency=0.02):
+  '''
+  EFFECTS: Load test for the multi-sender share server (DNP_ShareServer.py): `senders` users all send a bulk share of `count` characters
+  at the same moment, each one's characters trickling out in a few pieces `latency` seconds apart (like a slow wireless link).
+  Reports how long until every sender had its report, how many senders were being received at once, and checks every character was saved
+  exactly once (a few names are sent by two senders on purpose, the second one must get a conflict). One more sender sends, at the same
+  moment, a character that passes every check but can not be stored (its name has half of a UTF-16 surrogate pair, which JSON can carry
+  and SQLite can not): that sender must get an error while the others are saved as usual and the server keeps going.
+  '''
+
+  import asyncio
+  import json
+  import DNP_Generator
+  import DNP_Share
+  import DNP_ShareServer
+  import DNP_Store
+
+  characters = DNP_Generator.generateCharacters(senders * count, seed=1)
+  shares = [characters[number*count:(number+1)*count] for number in range(senders)]
+  for number in range(1, senders, 8): # every 8th sender also sends the first character of the sender before it
+    shares[number] = shares[number] + [shares[number-1][0]]
+  expected = len({character.name for character in characters})
+  unsavable = json.dumps(dict(characters[0].toRecord(), name="Unsavable \ud800")).encode() # ensure_ascii sends the surrogate as '\ud800'
+
+  with tempfile.TemporaryDirectory() as folder:
+    charStore = DNP_Store.CharacterStore(os.path.join(folder, "Characters.sqlite3"))
+    listening = threading.Event()
+    server = DNP_ShareServer.ShareServer(charStore, "127.0.0.1", 0, senders + 1, onListening=lambda port: listening.set())
+    receiver = threading.Thread(target=asyncio.run, args=(server.serve(),))
+    receiver.start()
+    listening.wait()
+
+    start = threading.Barrier(senders + 1)
+    reports = [None] * senders
+    def send(number):
+      start.wait() # every sender connects at the same moment
+      with DNP_Share.connectTo("127.0.0.1", server.port, timeout=60) as connection:
+        if number == senders:
+          DNP_Share.sendFrame(connection, DNP_Share.FRAME_CHARACTER, unsavable)
+        else:
+          reports[number] = DNP_Share.sendRoster(SlowLink(connection, latency), shares[number])
+
+    threads = [threading.Thread(target=send, args=(number,)) for number in range(senders + 1)]
+    begin = time.perf_counter()
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    elapsed = time.perf_counter() - begin
+    receiver.join()
+    saved = len(charStore)
+    charStore.close()
+
+  reported = sum(len(report["saved"]) for report in reports)
+  conflicts = sum(len(report["conflicts"]) for report in reports)
+  failed = [report["error"] for report in server.reports if report["error"]]
+  print(f"shareServer ({senders} simultaneous senders x {count} characters, {expected} different names, {latency*4*1000:.0f}ms of link delay per sender)")
+  print(f"\tevery sender done in:   {elapsed*1000:.1f}ms ({reported/elapsed:.0f} characters/s)")
+  print(f"\tsenders at once:        {server.busiest} of {senders + 1}")
+  print(f"\t{saved} saved in the store, {reported} reported saved, {conflicts} conflicts reported")
+  print(f"\tunsavable sender:       {len(failed)} sender(s) got an error{': ' + failed[0] if failed else ' (expected 1)'}")
+
+
+@benchmark("rosterSync")
+def benchRosterSync(count=1000, changed=10):
+  '''
+  EFFECTS: Two users share a `count` character roster and `changed` characters changed on each side since they last synced.
+  Compares resending the whole roster as a bulk share against a delta sync (DNP_Sync.py), in bytes over the network and in time.
+  '''
+
+  import asyncio
+  import DNP_Generator
+  import DNP_Share
+  import DNP_ShareServer
+  import DNP_Store
+  import DNP_Sync
+
+  characters = DNP_Generator.generateCharacters(count, seed=1)
+  for character in characters:
+    character.inventory.extend(["rope", "torch", "rations"])
+  resend = sum(DNP_Share.HEADER_SIZE + len(DNP_Share.encodeCharacter(character)) for character in characters)
+
+  def sync(mine, theirs):
+    listening = threading.Event()
+    server = DNP_ShareServer.ShareServer(theirs, "127.0.0.1", 0, senders=1, onListening=lambda port: listening.set())
+    receiver = threading.Thread(target=asyncio.run, args=(server.serve(),))
+    receiver.start()
+    listening.wait()
+    begin = time.perf_counter()
+    with DNP_Share.connectTo("127.0.0.1", server.port) as connection:
+      report = DNP_Sync.syncWith(connection, mine)
+    elapsed = time.perf_counter() - begin
+    receiver.join()
+    return report, elapsed
+
+  with tempfile.TemporaryDirectory() as folder:
+    mine = DNP_Store.CharacterStore(os.path.join(folder, "Mine.sqlite3"))
+    theirs = DNP_Store.CharacterStore(os.path.join(folder, "Theirs.sqlite3"))
+    mine.saveMany(characters)
+    first, firstTime = sync(mine, theirs) # the first sync copies everything over
+
+    names = mine.names()
+    for name in names[:changed]:
+      character = mine.get(name)
+      character.gold = str(int(character.gold) + 100)
+      mine.save(character)
+    for name in names[-changed:]:
+      character = theirs.get(name)
+      character.inventory.append("healing potion")
+      theirs.save(character)
+    later, laterTime = sync(mine, theirs)
+    mine.close()
+    theirs.close()
+
+  print(f"rosterSync ({count} characters, {changed} changed on each side)")
+  print(f"\tresend whole roster:   {resend/1024:.1f} KB")
+  print(f"\tfirst sync:            {first['bytes']/1024:.1f} KB in {firstTime*1000:.1f}ms ({len(first['pushed'])} characters copied)")
+  print(f"\tdelta sync:            {later['bytes']/1024:.1f} KB in {laterTime*1000:.1f}ms ({len(later['pushed'])} pushed, {len(later['pulled'])} pulled, {resend/later['bytes']:.0f}x less than resending)")
+
+
+# Link speeds (bytes per second) the compression benchmark works out send times for: a wired LAN and a slow Wi-Fi connection
+LINK_SPEEDS = {"lan": 1000 * 1000 * 1000 / 8, "slow": 5 * 1000 * 1000 / 8}
+
+
+@benchmark("compression")
+def benchCompression(sizes=(1, 10, 100, 1000)):
+  '''
+  EFFECTS: For rosters of each of `sizes` characters, times every codec setting (DNP_Codec.py) end to end: compressing the bulk share's
+  blocks of frames the way DNP_Share.sendRoster() does, sending the result (worked out from LINK_SPEEDS, so the numbers do not depend on
+  the network the benchmark happens to run on) and decompressing it again. Marks the fastest setting for each link.
+  '''
+
+  import DNP_Codec
+  import DNP_Generator
+  import DNP_Share
+
+  settings = [("none", 0), ("zlib", 1), ("zlib", 6), ("zlib", 9), ("lzma", 0), ("lzma", 6)]
+  if "zstd" in DNP_Codec.available():
+    settings += [("zstd", 1), ("zstd", 3), ("zstd", 9), ("zstd", 19)]
+  else:
+    print("(zstandard is not installed, so zstd is left out:   pip install zstandard)")
+
+  characters = DNP_Generator.generateCharacters(max(sizes), seed=1)
+  for character in characters:
+    character.inventory.extend(["rope", "torch", "rations"])
+
+  for size in sizes:
+    blocks = [bytearray()]
+    for character in characters[:size]:
+      blocks[-1] += DNP_Share.encodeFrame(DNP_Share.FRAME_CHARACTER, DNP_Share.encodeCharacter(character))
+      if len(blocks[-1]) >= DNP_Share.BLOCK_SIZE:
+        blocks.append(bytearray())
+    blocks[-1] += DNP_Share.encodeFrame(DNP_Share.FRAME_END, b"")
+    raw = sum(len(block) for block in blocks)
+
+    results = []
+    for codec, level in settings:
+      packed = [DNP_Codec.compress(block, codec, level) for block in blocks]
+      compressTime = timeIt(lambda: [DNP_Codec.compress(block, codec, level) for block in blocks])
+      decompressTime = timeIt(lambda: [DNP_Codec.decompress(block, codec, DNP_Share.MAX_FRAME_SIZE) for block in packed])
+      sent = sum(len(block) for block in packed)
+      ends = {link: compressTime + sent / speed + decompressTime for link, speed in LINK_SPEEDS.items()}
+      results.append((f"{codec} {level}" if codec != "none" else "none", sent, compressTime, decompressTime, ends))
+
+    best = {link: min(results, key=lambda result: result[4][link])[0] for link in LINK_SPEEDS}
+    print(f"compression ({size} characters, {raw} bytes of frames in {len(blocks)} blocks)")
+    print(f"\t{'setting':10} {'bytes':>8} {'ratio':>6} {'compress':>10} {'decompress':>11} {'LAN total':>11} {'Wi-Fi total':>12}")
+    for label, sent, compressTime, decompressTime, ends in results:
+      marks = "".join(f" <- fastest on {link}" for link in LINK_SPEEDS if best[link] == label)
+      print(f"\t{label:10} {sent:8} {raw/sent:6.2f} {compressTime*1000:8.3f}ms {decompressTime*1000:9.3f}ms {ends['lan']*1000:9.3f}ms {ends['slow']*1000:10.3f}ms{marks}")
+    chosen = {link: " ".join(str(part) for part in DNP_Codec.chooseCodec(raw, DNP_Codec.available(), link)) for link in LINK_SPEEDS}
+    print(f"\tchooseCodec() picks: {chosen['lan']} on lan, {chosen['slow']} on slow Wi-Fi")
+    print()
+
+
+class DroppingLink:
+  '''
+  A connection that drops (like a Wi-Fi link cutting out) once `limit` bytes have been sent over it, counting every byte it sends in `sent`.
+  '''
+
+  def __init__(self, connection, limit, sent):
+    self.connection = connection
+    self.limit = limit
+    self.sent = sent
+
+  def sendall(self, data):
+    if self.limit is not None and len(data) > self.limit:
+      self.connection.sendall(data[:self.limit])
+      self.sent[0] += self.limit
+      self.connection.close()
+      raise ConnectionResetError("the link dropped")
+    if self.limit is not None:
+      self.limit -= len(data)
+    self.connection.sendall(data)
+    self.sent[0] += len(data)
+
+  def recv_into(self, buffer):
+    return self.connection.recv_into(buffer)
+
+  def close(self):
+    self.connection.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *excInfo):
+    self.connection.close()
+
+
+@benchmark("shareResume")
+def benchShareResume(count=10000, drops=(0.4, 0.35)):
+  '''
+  EFFECTS: Sends a `count` character roster (several megabytes of frames) over a link that drops a few times: the first connection drops
+  after sending drops[0] of the roster's bytes, the second after drops[1] and so on (the one after that never drops). Compares starting over after every drop (what a share without resuming has to do) with resuming from the last block the
+  receiver saved (DNP_Share.sendRoster() with reconnect), in bytes sent and in time, and checks every character arrived exactly once.
+  '''
+
+  import asyncio
+  import DNP_Generator
+  import DNP_Share
+  import DNP_ShareServer
+  import DNP_Store
+
+  characters = DNP_Generator.generateCharacters(count, seed=1)
+  for character in characters:
+    character.inventory.extend(["rope", "torch", "rations"])
+  frames = sum(len(block) for block in DNP_Share.RosterTransfer(characters).blocks)
+
+  def share(resume, limits):
+    with tempfile.TemporaryDirectory() as folder:
+      charStore = DNP_Store.CharacterStore(os.path.join(folder, "Characters.sqlite3"))
+      listening = threading.Event()
+      server = DNP_ShareServer.ShareServer(charStore, "127.0.0.1", 0, senders=1, onListening=lambda port: listening.set())
+      receiver = threading.Thread(target=asyncio.run, args=(server.serve(),))
+      receiver.start()
+      listening.wait()
+
+      sent = [0]
+      links = iter(limits)
+      connect = lambda: DroppingLink(DNP_Share.connectTo("127.0.0.1", server.port), next(links, None), sent)
+      begin = time.perf_counter()
+      while True: # without resuming, every drop means sending the whole roster again from the start
+        try:
+          with connect() as connection:
+            report = DNP_Share.sendRoster(connection, characters, reconnect=connect if resume else None)
+          break
+        except (OSError, DNP_Share.ShareError):
+          time.sleep(DNP_Share.RESUME_DELAY)
+      elapsed = time.perf_counter() - begin
+      receiver.join()
+      saved = len(charStore)
+      charStore.close()
+    return sent[0], elapsed, report, saved
+
+  wire, elapsed, report, saved = share(True, [])
+  limits = [int(wire * drop) for drop in drops]
+  restart = share(False, limits)
+  resumed = share(True, limits)
+
+  print(f"shareResume ({count} characters, {frames/1024/1024:.1f} MB of frames, {wire/1024:.0f} KB on the wire, the link drops {len(drops)} times)")
+  print(f"\tno drops:         {wire/1024:8.0f} KB sent in {elapsed*1000:.0f}ms")
+  for label, (sent, elapsed, report, saved) in (("start over:", restart), ("resume:", resumed)):
+    print(f"\t{label:17} {sent/1024:8.0f} KB sent in {elapsed*1000:.0f}ms ({sent/wire:.2f}x the bytes, includes {len(drops)}x {DNP_Share.RESUME_DELAY}s reconnect waits), "
+          f"{saved} in the store, {len(report['saved'])} reported saved, {len(report['conflicts'])} reported as conflicts")
+
+
+
+
+class ThrottledLink:
+  '''
+  A connection that sends at most `bandwidth` bytes per second, standing in for one receiver's own network link in the broadcast benchmark.
+  '''
+
+  def __init__(self, connection, bandwidth):
+    self.connection = connection
+    self.bandwidth = bandwidth
+
+  def sendall(self, data):
+    time.sleep(len(data) / self.bandwidth)
+    self.connection.sendall(data)
+
+  def recv_into(self, buffer):
+    return self.connection.recv_into(buffer)
+
+  def close(self):
+    self.connection.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *excInfo):
+    self.connection.close()
+
+
+def broadcastReceiver(path, ports, saved):
+  '''
+  EFFECTS: Runs in its own process as one receiver of the broadcast benchmark: receives one share into a new store at `path`, putting the
+  server's port on the queue `ports` once it is listening and how many characters the store ends up with on the queue `saved`.
+  '''
+
+  import asyncio
+  import DNP_ShareServer
+  import DNP_Store
+
+  charStore = DNP_Store.CharacterStore(path)
+  server = DNP_ShareServer.ShareServer(charStore, "127.0.0.1", 0, senders=1, onListening=ports.put, discovery=None)
+  asyncio.run(server.serve())
+  saved.put(len(charStore))
+  charStore.close()
+
+
+@benchmark("shareBroadcast")
+def benchShareBroadcast(count=2000, receivers=(1, 2, 4, 8), bandwidth=5e6/8):
+  '''
+  EFFECTS: Sends the same `count` character roster to each number of `receivers` (share servers in their own processes, like players on
+  their own computers), each over its own slow Wi-Fi link of `bandwidth` bytes per second. Compares sending to them one after another
+  (running the sender once per receiver, like sendChar() had to be) with DNP_Share.broadcastRoster() (encoded once, sent to all of them at
+  the same time), in wall clock time and in the sender's own CPU time, and checks every receiver saved every character.
+  (The receivers all decode on this one computer's cores here, so with more receivers than cores the broadcast's wall clock time grows
+  with their decoding, the sender's CPU time shows what the sender itself spends.)
+  '''
+
+  import multiprocessing
+  import DNP_Codec
+  import DNP_Generator
+  import DNP_Share
+
+  characters = DNP_Generator.generateCharacters(count, seed=1)
+  connect = lambda host, port: ThrottledLink(DNP_Share.connectTo(host, port), bandwidth)
+
+  def share(number, broadcast):
+    with tempfile.TemporaryDirectory() as folder:
+      ports, saved = multiprocessing.Queue(), multiprocessing.Queue()
+      processes = [multiprocessing.Process(target=broadcastReceiver, args=(os.path.join(folder, f"Characters{receiver}.sqlite3"), ports, saved))
+                   for receiver in range(number)]
+      for process in processes:
+        process.start()
+      targets = [("127.0.0.1", ports.get()) for process in processes]
+
+      begin, cpu = time.perf_counter(), time.process_time()
+      if broadcast:
+        reports = DNP_Share.broadcastRoster(targets, characters, DNP_Codec.LINK_SLOW, connect=connect)
+      else:
+        reports = []
+        for target in targets:
+          with connect(*target) as connection:
+            reports.append(DNP_Share.sendRoster(connection, characters, DNP_Codec.LINK_SLOW))
+      elapsed, cpu = time.perf_counter() - begin, time.process_time() - cpu
+      counts = [saved.get() for process in processes]
+      for process in processes:
+        process.join()
+    assert all(report["error"] is None for report in reports) and counts == [count] * number
+    return elapsed, cpu
+
+  print(f"shareBroadcast ({count} characters to each receiver, every receiver on its own {bandwidth*8/1e6:.0f} Mbit/s link, {os.cpu_count()} CPU cores)")
+  print(f"\t{'receivers':>9} {'one after another':>18} {'(sender CPU)':>13} {'broadcast':>10} {'(sender CPU)':>13}")
+  for number in receivers:
+    oneByOne, oneByOneCpu = share(number, False)
+    broadcast, broadcastCpu = share(number, True)
+    print(f"\t{number:9} {oneByOne*1000:16.1f}ms {oneByOneCpu*1000:11.1f}ms {broadcast*1000:8.1f}ms {broadcastCpu*1000:11.1f}ms "
+          f"({oneByOne/broadcast:.1f}x faster)")
+
+
+# ---------------------------------- WEB SCRAPING ----------------------------------
+
+def racePageFixture(race="Elf", paragraphs=800):
+  '''
+  EFFECTS: Returns a made up race page (HTML text) laid out like the dnd5e.wikidot.com race pages ageAssignment() scrapes, with the
+  lifespan <li> in the list the real page for `race` has it in, padded out with `paragraphs` paragraphs to about the real page's
+  size (roughly 100 KB).
+  '''
+
+  position = {"Human": 1, "Dragonborn": 1, "Elf": 5, "Tiefling": 5, "Half-Elf": 3, "Half-Orc": 3}.get(race, 2) # (see legacyRaceLifespan())
+  lists = [f"<ul><li>{race} trait {number}: something about the {race.lower()} people.</li></ul>" for number in range(1, 7)]
+  lists[position-1] = f"<ul><li><em>Age.</em> {race}s reach adulthood in their late teens and live less than a century.</li></ul>"
+  filler = "".join(f"<p>Paragraph {number} of {race.lower()} lore, <a href='/lore/{number}'>more</a>.</p>" for number in range(paragraphs))
+  return (f"<html><head><title>{race}</title></head><body><div id='side-bar'>{filler}</div>"
+          f"<div id='page-content'><div class='feature'><div><div>{''.join(lists)}</div></div></div>"
+          f"{filler}</div></body></html>")
+
+
+def pageServer(pages, latency, failures=0):
+  '''
+  EFFECTS: Starts (and returns) a local web server on a thread that serves `pages` ({path: HTML text}) with an ETag, answers a request
+  carrying that ETag with 304 Not Modified, and waits `latency` seconds before answering anything (like a website on the internet).
+  The first `failures` requests for each page are answered 503 Service Unavailable (like a busy website). Connections are kept alive.
+  Its requests and connections counters count every request it answered and every connection made to it.
+  '''
+
+  import hashlib
+  from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+  class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive
+    disable_nagle_algorithm = True # (the headers and the body are written separately, Nagle would hold the body back on a kept-alive connection)
+
+    def setup(self):
+      super().setup()
+      with server.counting:
+        server.connections += 1
+
+    def do_GET(self):
+      time.sleep(latency)
+      with server.counting:
+        server.requests += 1
+        failed = server.failed.get(self.path, 0)
+        server.failed[self.path] = failed + 1
+      if failed < failures or self.path not in pages:
+        self.send_response(503 if self.path in pages else 404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return
+      body = pages[self.path].encode("utf-8")
+      etag = '"' + hashlib.md5(body).hexdigest() + '"'
+      if self.headers.get("If-None-Match") == etag:
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return
+      self.send_response(200)
+      self.send_header("Content-Type", "text/html; charset=utf-8")
+      self.send_header("Content-Length", str(len(body)))
+      self.send_header("ETag", etag)
+      self.end_headers()
+      self.wfile.write(body)
+
+    def log_message(self, *args): # keep the benchmark output clean
+      pass
+
+  server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+  server.daemon_threads = True
+  server.requests = 0
+  server.connections = 0
+  server.failed = {} # path: how many requests for it were answered 503
+  server.counting = threading.Lock()
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  return server
+
+
+class RedirectedCache:
+  '''
+  Stands in for a WebCache (and uses one) but fetches the reference website's pages (DNP_Reference.REFERENCE_URL) from the local page
+  server at `local` instead, so the scraping benchmarks never touch the internet.
+  '''
+
+  def __init__(self, webCache, local):
+    self.webCache = webCache
+    self.local = local
+    self.timeout = webCache.timeout
+
+  def get(self, url, cancel=None):
+    import DNP_Reference
+    return self.webCache.get(url.replace(DNP_Reference.REFERENCE_URL, self.local), cancel)
+
+
+@benchmark("webCache")
+def benchWebCache(lookups=1000, latency=0.05):
+  '''
+  EFFECTS: Times looking up a race page `lookups` times through DNP_WebCache.WebCache against a local web server that takes `latency`
+  seconds to answer (like dnd5e.wikidot.com would), compared with downloading it every time (what ageAssignment() used to do).
+  Covers the first download, repeat lookups from memory, the first lookup of a new session (from disk), revalidating a page that went out
+  of date (304 Not Modified), and offline lookups.
+  '''
+
+  import requests
+  import DNP_WebCache
+
+  server = pageServer({"/elf": racePageFixture()}, latency)
+  url = f"http://127.0.0.1:{server.server_address[1]}/elf"
+
+  with tempfile.TemporaryDirectory() as folder:
+    path = os.path.join(folder, "WebCache.sqlite3")
+    legacy = timeIt(lambda: requests.get(url).text, repeat=5)
+
+    with DNP_WebCache.WebCache(path) as webCache:
+      start = time.perf_counter()
+      webCache.get(url)
+      cold = time.perf_counter() - start
+      start = time.perf_counter()
+      for lookup in range(lookups):
+        webCache.get(url)
+      memory = (time.perf_counter() - start) / lookups
+
+    def newSession(**options): # the first lookup of a session, with nothing in memory yet
+      with DNP_WebCache.WebCache(path, **options) as webCache:
+        start = time.perf_counter()
+        webCache.get(url)
+        return time.perf_counter() - start, webCache.stats
+
+    disk, diskStats = min(newSession() for attempt in range(20))
+    revalidate, revalidateStats = min(newSession(ttl=0) for attempt in range(5))
+    offline, offlineStats = min(newSession(ttl=0, offline=True) for attempt in range(20))
+    size = os.path.getsize(path)
+  server.shutdown()
+
+  print(f"webCache (a {len(racePageFixture())/1024:.0f} KB race page, the website takes {latency*1000:.0f}ms to answer, {server.requests} requests reached it)")
+  print(f"\tdownloaded every time:      {legacy*1000:9.3f}ms per lookup")
+  print(f"\tfirst download (cached):    {cold*1000:9.3f}ms")
+  print(f"\trepeat lookup (memory):     {memory*1000:9.3f}ms ({legacy/memory:.0f}x faster)")
+  print(f"\tnew session (disk):         {disk*1000:9.3f}ms ({legacy/disk:.0f}x faster) {diskStats}")
+  print(f"\tout of date, 304:           {revalidate*1000:9.3f}ms {revalidateStats}")
+  print(f"\toffline (out of date):      {offline*1000:9.3f}ms {offlineStats}")
+  print(f"\tcache database:             {size/1024:.0f} KB")
+
+
+@benchmark("webWarm")
+def benchWebWarm(latency=0.1, workers=(1, 4, 10)):
+  '''
+  EFFECTS: Times caching every race and class page on a new install (DNP_Reference.warmPages()) from a local stand-in for the reference
+  website that takes `latency` seconds to answer: downloading them one after the other on a new connection each (what the app used to
+  do, one page per character made), against DNP_WebCache.WebCache.warm() with each number of `workers`. Also warms up against a website
+  that answers every page's first request with 503, to check the retries, and warms up again once everything is cached.
+  '''
+
+  import requests
+  import DNP_Reference
+  import DNP_WebCache
+  import DungeonsNPythons
+
+  names = list(DungeonsNPythons.RACES) + list(DungeonsNPythons.CLASSES)
+  pages = {f"/{name.lower()}": (racePageFixture(name) if name in DungeonsNPythons.RACES else classPageFixture(name)) for name in names}
+
+  def warmUp(folder, count, failures=0, backoff=DNP_WebCache.DOWNLOAD_BACKOFF, again=False):
+    server = pageServer(pages, latency, failures)
+    local = f"http://127.0.0.1:{server.server_address[1]}/"
+    with DNP_WebCache.WebCache(os.path.join(folder, f"WebCache{count}-{failures}.sqlite3")) as webCache:
+      start = time.perf_counter()
+      failed = webCache.warm(DNP_Reference.referenceUrls(baseUrl=local).values(), workers=count, backoff=backoff)
+      elapsed = time.perf_counter() - start
+      if again:
+        start = time.perf_counter()
+        webCache.warm(DNP_Reference.referenceUrls(baseUrl=local).values(), workers=count)
+        elapsed = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+    return elapsed, sum(error is None for error in failed.values()), server.requests, server.connections
+
+  server = pageServer(pages, latency)
+  local = f"http://127.0.0.1:{server.server_address[1]}/"
+  start = time.perf_counter()
+  for name in names:
+    requests.get(local + name.lower(), headers={"Connection": "close"}).text
+  legacy = time.perf_counter() - start
+  server.shutdown()
+  server.server_close()
+
+  print(f"webWarm ({len(names)} race and class pages, the website takes {latency*1000:.0f}ms to answer)")
+  print(f"\tone after the other, new connections:  {legacy*1000:7.0f}ms")
+  with tempfile.TemporaryDirectory() as folder:
+    for count in workers:
+      elapsed, cached, requestCount, connections = warmUp(folder, count)
+      print(f"\twarm(), {count:2} workers:                 {elapsed*1000:7.0f}ms ({legacy/elapsed:4.1f}x faster) {cached} cached, "
+            f"{requestCount} requests over {connections} connections")
+    elapsed, cached, requestCount, connections = warmUp(folder, DNP_WebCache.WARM_WORKERS, failures=1, backoff=0.05)
+    print(f"\twebsite busy (503 first), retried:      {elapsed*1000:7.0f}ms {cached} cached, {requestCount} requests over {connections} connections")
+    elapsed, cached, requestCount, connections = warmUp(folder, DNP_WebCache.WARM_WORKERS, again=True)
+    print(f"\talready warm:                           {elapsed*1000:7.3f}ms {cached} cached")
+
+
+@benchmark("lifespanPrefetch")
+def benchLifespanPrefetch(latency=0.3, thinking=1.0):
+  '''
+  EFFECTS: Times how long the age prompt waits for a race's lifespan (download and parse, from a local web server that takes `latency`
+  seconds to answer) when it is looked up right there (what ageAssignment() used to do), and when DungeonsNPythons.LifespanPrefetch
+  started on it `thinking` seconds earlier (while the user was picking a class and rolling scores). Also checks that picking a different
+  race cancels the old race's download. (The reference index is left out here, as if it did not have these races, see the reference benchmark.)
+  '''
+
+  import DNP_Reference
+  import DNP_WebCache
+  import DungeonsNPythons
+
+  DNP_Reference._index = {"version": DNP_Reference.INDEX_VERSION, "races": {}, "classes": {}} # an index without any races
+
+  server = pageServer({f"/{race.lower()}": racePageFixture(race) for race in ("Elf", "Dwarf")}, latency)
+  local = f"http://127.0.0.1:{server.server_address[1]}/"
+
+  with tempfile.TemporaryDirectory() as folder:
+    with DNP_WebCache.WebCache(os.path.join(folder, "WebCache.sqlite3")) as webCache:
+      lifespans = DungeonsNPythons.LifespanPrefetch(RedirectedCache(webCache, local))
+      start = time.perf_counter()
+      text = lifespans.get("Elf")
+      cold = time.perf_counter() - start
+
+      webCache.clear()
+      lifespans.cancel()
+      lifespans.start("Elf")
+      time.sleep(thinking)
+      start = time.perf_counter()
+      lifespans.get("Elf")
+      prefetched = time.perf_counter() - start
+
+      lifespans.start("Dwarf")
+      old = lifespans._lookup
+      lifespans.start("Elf") # the user changed their mind
+      cancelled = isinstance(old.exception(timeout=latency + 5), DNP_WebCache.FetchCancelled)
+  server.shutdown()
+  DNP_Reference._index = None # the real index is read again next time
+
+  print(f"lifespanPrefetch (the website takes {latency*1000:.0f}ms to answer, the user takes {thinking*1000:.0f}ms to get to the age prompt)")
+  print(f"\tlooked up at the age prompt:   {cold*1000:8.3f}ms wait ({text[:30]}...)")
+  print(f"\tprefetched when race picked:   {prefetched*1000:8.3f}ms wait")
+  print(f"\tchanging race cancels the old download: {cancelled}")
+
+
+def classPageFixture(charClass="Fighter", paragraphs=400):
+  '''
+  EFFECTS: Returns a made up class page (HTML text) laid out like the dnd5e.wikidot.com class pages, padded out with `paragraphs` paragraphs.
+  '''
+
+  filler = "".join(f"<p>Paragraph {number} about {charClass.lower()} features.</p>" for number in range(paragraphs))
+  return (f"<html><body><div id='page-content'><p>The {charClass.lower()} is a made up class page for the reference benchmark, it only has to read like one.</p>"
+          f"<h3>Hit Points</h3><p><strong>Hit Dice:</strong> 1d10 per {charClass.lower()} level</p>"
+          f"<h3>Proficiencies</h3><p><strong>Saving Throws:</strong> Strength, Constitution</p><p><strong>Skills:</strong> Choose two</p>"
+          f"{filler}</div></body></html>")
+
+
+@benchmark("reference")
+def benchReference(lookups=100000):
+  '''
+  EFFECTS: Times race lifespan lookups in the reference index shipped with the app (DNP_Reference.py): the first lookup (which reads the
+  index) and `lookups` repeat lookups, compared with parsing the lifespan out of a race page (DNP_Engine.raceLifespan(), with the
+  page already cached, so no network at all). Also builds an index from made up race and class pages served locally, to check the build step.
+  '''
+
+  import DNP_Engine
+  import DNP_Reference
+  import DNP_WebCache
+
+  DNP_Reference._index = None
+  start = time.perf_counter()
+  DNP_Reference.lifespan("Elf")
+  first = time.perf_counter() - start
+  start = time.perf_counter()
+  for lookup in range(lookups):
+    DNP_Reference.lifespan(DNP_Engine.RACES[lookup % len(DNP_Engine.RACES)])
+  repeat = (time.perf_counter() - start) / lookups
+
+  pages = {f"/{race.lower()}": racePageFixture(race) for race in DNP_Engine.RACES}
+  pages.update({f"/{charClass.lower()}": classPageFixture(charClass) for charClass in DNP_Engine.CLASSES})
+  server = pageServer(pages, 0)
+  local = f"http://127.0.0.1:{server.server_address[1]}/"
+
+  with tempfile.TemporaryDirectory() as folder:
+    with DNP_WebCache.WebCache(os.path.join(folder, "WebCache.sqlite3")) as webCache:
+      scrape = timeIt(DNP_Engine.raceLifespan, "Elf", RedirectedCache(webCache, local), repeat=10) # (the first of these downloads the page, the fastest is from memory)
+      start = time.perf_counter()
+      built = DNP_Reference.buildIndex(webCache, baseUrl=local)
+      build = time.perf_counter() - start
+      path = os.path.join(folder, "DNP_Reference.json")
+      DNP_Reference.saveIndex(built, path)
+      size = os.path.getsize(path)
+  server.shutdown()
+  DNP_Reference._index = None
+
+  shipped = os.path.getsize(DNP_Reference.INDEX_PATH)
+  print(f"reference (index shipped with the app: {shipped/1024:.1f} KB, {len(DNP_Reference.loadIndex()['races'])} races, {len(DNP_Reference.loadIndex()['classes'])} classes)")
+  print(f"\tfirst lookup (reads index):  {first*1000:9.3f}ms")
+  print(f"\trepeat lookup:               {repeat*1000000:9.3f}us")
+  print(f"\tscraping a cached page:      {scrape*1000:9.3f}ms ({scrape/repeat:.0f}x slower)")
+  print(f"\tbuilding from local pages:   {build*1000:9.1f}ms, {len(built['races'])} races and {len(built['classes'])} classes, {size/1024:.1f} KB, "
+        f"Elf lifespan '{built['races']['Elf']['lifespan']}', Fighter hit die {built['classes']['Fighter']['hitDie']}")
+
+
+# ---------------------------------- HTML EXTRACTION ----------------------------------
+
+def legacyRaceLifespan(page, race):
+  '''
+  EFFECTS: The original way raceLifespan() parsed a race page: the whole page into a BeautifulSoup tree with html.parser, then a CSS
+  selector that had to know which list each race's lifespan is in.
+  '''
+
+  import bs4
+
+  childNum = {"Human": '1', "Dragonborn": '1', "Elf": '5', "Tiefling": '5', "Half-Elf": '3', "Half-Orc": '3'}.get(race, '2')
+  soup = bs4.BeautifulSoup(page, 'html.parser')
+  return soup.select('#page-content > div.feature > div:nth-child(1) > div > ul:nth-child(' + childNum + ') > li')[0].getText()
+
+
+@benchmark("htmlExtract")
+def benchHtmlExtract(repeat=20):
+  '''
+  EFFECTS: Times pulling a race's lifespan (and a class page's text) out of a race and a class page: the original whole page BeautifulSoup
+  parse, against DNP_Extract.extractPage() with every backend installed here. Also checks every backend extracts exactly the same thing.
+  The pages are generated (see racePageFixture() and classPageFixture()), not saved from the reference website: they are laid out like the
+  real pages and about as big, but real pages have more markup in them, so the times are a guide rather than what a real page takes.
+  '''
+
+  import DNP_Extract
+  import DNP_Reference
+
+  racePage = racePageFixture("Elf")
+  classPage = classPageFixture("Fighter")
+
+  same = all(len({repr(DNP_Extract.extractPage(page, backend)) for backend in DNP_Extract.BACKENDS}) == 1 for page in (racePage, classPage))
+  legacy = timeIt(legacyRaceLifespan, racePage, "Elf", repeat=repeat)
+  record("legacyFullParse", legacy)
+
+  print(f"htmlExtract (race page {len(racePage)/1024:.0f} KB, class page {len(classPage)/1024:.0f} KB, every backend extracts the same: {same})")
+  print(f"\tlegacy full parse, race page:     {legacy*1000:8.2f}ms  '{legacyRaceLifespan(racePage, 'Elf')[:40]}...'")
+  for backend in DNP_Extract.BACKENDS:
+    race = timeIt(lambda: DNP_Reference.pageTraits(DNP_Extract.extractPage(racePage, backend))["Age"], repeat=repeat)
+    charClass = timeIt(DNP_Extract.extractPage, classPage, backend, repeat=repeat)
+    record(f"{backend}.racePage", race)
+    record(f"{backend}.classPage", charClass)
+    print(f"\t{backend + ',':12} race page:        {race*1000:8.2f}ms ({legacy/race:4.1f}x faster), class page {charClass*1000:6.2f}ms")
+
+
+# ---------------------------------- RECEIVER DISCOVERY ----------------------------------
+
+def legacyAddressLookup(folder):
+  '''
+  EFFECTS: The original way a receiver found its IP address: pipe the network settings shell command into a text file, read it back, and
+  delete it. 'ipconfig' only exists on Windows, so elsewhere the nearest equivalent ('ip -4 addr', or 'ifconfig') stands in for it.
+  '''
+
+  command = "ipconfig" if os.name == "nt" else "(ip -4 addr || ifconfig) 2>/dev/null"
+  path = os.path.join(folder, "stuff.txt")
+  os.system(f"{command} >> \"{path}\"")
+  with open(path, 'r') as file:
+    data = file.read()
+  os.remove(path)
+  return data
+
+
+@benchmark("discovery")
+def benchDiscovery(rounds=200):
+  '''
+  EFFECTS: Times how long a sender takes to find a receiver with a discovery probe (DNP_Discovery.discoverReceivers(), sent over loopback
+  to a real share server here, so it leaves out the network's own delay), and how long a receiver takes to find its own addresses
+  in-process compared with shelling out to the network settings command the way the legacy share did.
+  '''
+
+  import asyncio
+  import DNP_Discovery
+  import DNP_Generator
+  import DNP_Share
+  import DNP_ShareServer
+  import DNP_Store
+
+  with tempfile.TemporaryDirectory() as folder:
+    charStore = DNP_Store.CharacterStore(os.path.join(folder, "Characters.sqlite3"))
+    listening = threading.Event()
+    server = DNP_ShareServer.ShareServer(charStore, "127.0.0.1", 0, senders=1, onListening=lambda port: listening.set(), name="benchmark", discovery=0)
+    receiver = threading.Thread(target=asyncio.run, args=(server.serve(),))
+    receiver.start()
+    listening.wait()
+    port = server.announcer.transport.get_extra_info("sockname")[1]
+
+    times = []
+    for attempt in range(rounds): # stop at the first answer, like a sender that already sees its receiver
+      start = time.perf_counter()
+      found = DNP_Discovery.discoverReceivers(addresses=["127.0.0.1"], port=port, limit=1)
+      times.append(time.perf_counter() - start)
+    times.sort()
+
+    with DNP_Share.connectTo("127.0.0.1", server.port) as connection: # the one sender the server is waiting for
+      DNP_Share.sendCharacter(connection, DNP_Generator.generateCharacters(1, seed=1)[0])
+    receiver.join()
+    charStore.close()
+
+    inProcess = timeIt(lambda: [DNP_Discovery.localAddresses() for lookup in range(100)]) / 100
+    legacy = timeIt(legacyAddressLookup, folder)
+
+  print(f"discovery ({rounds} probes over loopback, found {found})")
+  print(f"	first answer:       median {times[len(times)//2]*1000:.3f}ms, slowest {times[-1]*1000:.3f}ms ({server.announcer.answered} probes answered)")
+  print(f"	local addresses:    {inProcess*1000:.3f}ms in-process {DNP_Discovery.localAddresses()}")
+  print(f"	shell + text file:  {legacy*1000:.3f}ms ({legacy/inProcess:.0f}x slower)")
+
+
+# ---------------------------------- HOT PATHS ----------------------------------
+# What the app does every time someone uses it, measured the same way on every commit (see --json and --compare in the module docstring)
+
+def scripted(answers, func, *args):
+  '''
+  EFFECTS: Calls func(*args) with every input() prompt answered from `answers` in order and everything it prints thrown away, and returns
+  what it returns. Raises RuntimeError if func asks for more answers than there are (i.e. a prompt that was not expected).
+  '''
+
+  import builtins
+  import contextlib
+  import io
+
+  remaining = iter(answers)
+
+  def answer(prompt=""):
+    try:
+      return next(remaining)
+    except StopIteration:
+      raise RuntimeError(f"no scripted answer left for the prompt {prompt!r}") from None
+
+  realInput = builtins.input
+  builtins.input = answer
+  try:
+    with contextlib.redirect_stdout(io.StringIO()):
+      return func(*args)
+  finally:
+    builtins.input = realInput
+
+
+@benchmark("scoreGeneration")
+def benchScoreGeneration(calls=2000):
+  '''
+  EFFECTS: Times the two ability score steps of character creation, `calls` times each: rolling a set (DNP_Engine.rollScores(), one
+  rollScoreBatch() call), and handing the rolls out to the six abilities (DungeonsNPythons.assignScores(), its prompts answered by a script).
+  '''
+
+  import DNP_Engine
+  import DungeonsNPythons
+
+  rolls = timeIt(lambda: [DNP_Engine.rollScores() for call in range(calls)]) / calls
+  scores = DNP_Engine.rollScores()
+  answers = [str(row) for row in range(1, 7)]
+  assign = timeIt(lambda: [scripted(answers, DungeonsNPythons.assignScores, scores) for call in range(calls)]) / calls
+
+  record("rollScores", rolls)
+  record("assignScores", assign)
+  print(f"scoreGeneration ({calls} calls each, {'numpy' if DNP_Dice.np is not None else 'pure python'} backend)")
+  print(f"\trollScores():    {rolls*1000000:8.2f}us per set {scores}")
+  print(f"\tassignScores():  {assign*1000000:8.2f}us per set (six scripted prompts)")
+
+
+@benchmark("storeOps")
+def benchStoreOps(sizes=(10, 1000, 100000), loads=1000):
+  '''
+  EFFECTS: Times the character store (DNP_Store.CharacterStore) with rosters of each of `sizes` characters: saving the whole roster,
+  opening the store, listing it the way the menus do (summaries()), loading up to `loads` characters straight from disk (a fresh store,
+  so nothing is cached) and saving one edited character.
+  '''
+
+  import DNP_Generator
+  import DNP_Store
+
+  print(f"storeOps (characters made from seed {SEED})")
+  print(f"\t{'roster':>8} {'save all':>11} {'open':>9} {'list':>9} {'load one':>10} {'save one':>10}")
+  for size in sizes:
+    characters = DNP_Generator.generateCharacters(size, seed=SEED)
+    with tempfile.TemporaryDirectory() as folder:
+      path = os.path.join(folder, "Characters.sqlite3")
+      with DNP_Store.CharacterStore(path) as charStore:
+        start = time.perf_counter()
+        charStore.saveMany(characters)
+        saveAll = time.perf_counter() - start
+
+      opening = timeIt(lambda: DNP_Store.CharacterStore(path).close(), repeat=5)
+      with DNP_Store.CharacterStore(path) as charStore:
+        listing = timeIt(charStore.summaries, repeat=5)
+
+      names = random.Random(SEED).sample([character.name for character in characters], min(size, loads))
+      with DNP_Store.CharacterStore(path) as charStore:
+        start = time.perf_counter()
+        for name in names:
+          charStore.get(name)
+        loadOne = (time.perf_counter() - start) / len(names)
+
+        edited = charStore.get(names[0])
+        def saveEdit():
+          edited.gold = int(edited.gold) + 1
+          charStore.save(edited)
+        saveOne = timeIt(saveEdit, repeat=20)
+
+    for metric, value in (("saveAll", saveAll), ("open", opening), ("list", listing), ("loadOne", loadOne), ("saveOne", saveOne)):
+      record(f"{size}.{metric}", value)
+    print(f"\t{size:8} {saveAll*1000:9.1f}ms {opening*1000:7.2f}ms {listing*1000:7.2f}ms {loadOne*1000000:8.1f}us {saveOne*1000000:8.1f}us")
+
+
+@benchmark("characterPickle")
+def benchCharacterPickle(count=10000):
+  '''
+  EFFECTS: Times pickling and unpickling `count` characters one at a time (what the character store did with every character before it
+  had its own columns, and still does when reading old shelve files), and unpickling them the way the store does (DNP_Store.loadCharacter()).
+  '''
+
+  import DNP_Generator
+  import DNP_Store
+
+  characters = DNP_Generator.generateCharacters(count, seed=SEED)
+  dumps = timeIt(lambda: [pickle.dumps(character) for character in characters]) / count
+  pickled = [pickle.dumps(character) for character in characters]
+  loads = timeIt(lambda: [pickle.loads(data) for data in pickled]) / count
+  storeLoads = timeIt(lambda: [DNP_Store.loadCharacter(data) for data in pickled]) / count
+  size = sum(len(data) for data in pickled) / count
+
+  record("dumps", dumps)
+  record("loads", loads)
+  record("loadCharacter", storeLoads)
+  record("size", size, "bytes")
+  print(f"characterPickle ({count} characters, {size:.0f} bytes each pickled)")
+  print(f"\tpickle.dumps():          {dumps*1000000:7.2f}us per character")
+  print(f"\tpickle.loads():          {loads*1000000:7.2f}us per character")
+  print(f"\tDNP_Store.loadCharacter: {storeLoads*1000000:7.2f}us per character")
+
+
+def creationAnswers(name):
+  '''
+  EFFECTS: Returns the answers to every prompt of making one character from the main menu (DungeonsNPythons.main()): an Elf Fighter called
+  `name`, the first roll kept and assigned in order, 120 years old, everything confirmed.
+  '''
+
+  return (["1", "3", "y", "5", "y", "n"] + [str(row) for row in range(1, 7)] + ["y", "1", "y", "120", "y", name, "y", "y"])
+
+
+@benchmark("creation")
+def benchCreation(characters=20, generated=1000):
+  '''
+  EFFECTS: Times the whole character creation flow, headless: DungeonsNPythons.main() run `characters` times with every prompt answered
+  by a script (offline, in a scratch folder), from the welcome screen to the character saved in the store. For comparison, also times
+  making and saving `generated` characters without any prompts (DNP_Generator.generateCharacters() and saveMany()).
+  '''
+
+  import DNP_Generator
+  import DNP_Store
+  import DungeonsNPythons
+
+  home = os.getcwd()
+  with tempfile.TemporaryDirectory() as folder:
+    os.chdir(folder) # the app keeps its characters (and web cache) in 'DNP_Characters' next to where it runs
+    try:
+      times = []
+      for number in range(characters):
+        start = time.perf_counter()
+        scripted(creationAnswers(f"Benchmark {number}"), DungeonsNPythons.main, True)
+        times.append(time.perf_counter() - start)
+      with DNP_Store.CharacterStore() as charStore:
+        saved = len(charStore)
+
+      start = time.perf_counter()
+      with DNP_Store.CharacterStore(os.path.join(folder, "Generated.sqlite3")) as charStore:
+        charStore.saveMany(DNP_Generator.generateCharacters(generated, seed=SEED))
+      headless = (time.perf_counter() - start) / generated
+    finally:
+      os.chdir(home)
+  times.sort()
+
+  record("mainFlow", times[len(times)//2])
+  record("generator", headless)
+  print(f"creation ({characters} characters through main(), {saved} saved)")
+  print(f"\tmain(), scripted:        median {times[len(times)//2]*1000:.2f}ms, slowest {times[-1]*1000:.2f}ms per character (the first one imports the dice engine)")
+  print(f"\tgenerator + saveMany():  {headless*1000000:.1f}us per character")
+
+
+# ---------------------------------- STARTUP ----------------------------------
+
+# How long importing the app may take on a cold start (a fresh interpreter), in seconds. Going over it means something heavy is imported
+# eagerly again (see the list of lazily imported modules at the top of DungeonsNPythons.py)
+IMPORT_BUDGET = 0.05
+
+# Modules the app used to import on startup that should now only be imported by the function that first needs them
+LAZY_MODULES = ("requests", "bs4", "lxml", "selectolax", "numpy", "asyncio", "webbrowser", "shelve", "logging", "concurrent.futures",
+                "DNP_Share", "DNP_ShareServer")
+
+# What the app imported eagerly before it was split up, for the "with everything eager" comparison (only the ones installed are imported)
+EAGER_MODULES = ("requests", "bs4", "numpy", "asyncio", "webbrowser", "shelve", "DNP_Share", "DNP_ShareServer")
+
+
+def importTime(statement, runs):
+  '''
+  EFFECTS: Runs `statement` (import statements) in `runs` fresh interpreters with 'python -X importtime' and returns the fastest total
+  time (seconds) of the modules it imports itself, and which of LAZY_MODULES ended up imported. One more interpreter runs it first, untimed,
+  to compile every module into a scratch bytecode folder the timed ones then load from, just like every start of the app after its first
+  (even if PYTHONDONTWRITEBYTECODE is set here, or the app's folder can not be written to).
+  '''
+
+  import subprocess
+
+  check = f"import sys; print(','.join(module for module in {LAZY_MODULES!r} if module in sys.modules))"
+  environment = {name: value for name, value in os.environ.items() if name not in ("PYTHONDONTWRITEBYTECODE", "PYTHONPYCACHEPREFIX")}
+  best = None
+  with tempfile.TemporaryDirectory() as bytecode:
+    for run in range(runs + 1):
+      finished = subprocess.run([sys.executable, "-X", "importtime", "-X", f"pycache_prefix={bytecode}", "-c", f"{statement}; {check}"],
+                                capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), env=environment, check=True)
+      if run == 0:
+        continue
+      total = 0
+      for line in finished.stderr.splitlines(): # "import time: self [us] | cumulative | imported package", nested imports indented
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit() and not parts[2].startswith("  ") and parts[2].strip() != "site":
+          total += int(parts[1])
+      if best is None or total < best:
+        best = total
+  return best / 1000000, [module for module in finished.stdout.strip().split(",") if module]
+
+
+@benchmark("importTime")
+def benchImportTime(runs=5):
+  '''
+  EFFECTS: Times importing the app (DungeonsNPythons.py) and its engine (DNP_Engine.py) in fresh interpreters with 'python -X importtime',
+  against IMPORT_BUDGET, and checks none of LAZY_MODULES gets imported on the way. Either check failing is a failure (see FAILURES), so
+  'python DNP_Benchmark.py importTime' can guard against a heavy import creeping back in. For comparison, also times importing the
+  modules the app used to import eagerly at startup (the ones of EAGER_MODULES installed here).
+  '''
+
+  import importlib.util
+
+  app, appLoaded = importTime("import DungeonsNPythons", runs)
+  engine, engineLoaded = importTime("import DNP_Engine", runs)
+  eagerModules = [module for module in EAGER_MODULES if importlib.util.find_spec(module) is not None]
+  eager = importTime(f"import {', '.join(['DungeonsNPythons'] + eagerModules)}", runs)[0]
+
+  record("DungeonsNPythons", app)
+  record("DNP_Engine", engine)
+  record("withEverythingEager", eager)
+  print(f"importTime (fastest of {runs} cold starts, budget {IMPORT_BUDGET*1000:.0f}ms)")
+  print(f"\timport DungeonsNPythons:      {app*1000:7.1f}ms {'within budget' if app <= IMPORT_BUDGET else 'OVER BUDGET'}, "
+        f"lazy modules imported: {', '.join(appLoaded) or 'none'}")
+  print(f"\timport DNP_Engine:            {engine*1000:7.1f}ms, lazy modules imported: {', '.join(engineLoaded) or 'none'}")
+  print(f"\twith everything eager:        {eager*1000:7.1f}ms ({eager/app:.1f}x slower, {', '.join(eagerModules)})")
+  if app > IMPORT_BUDGET:
+    FAILURES.append(f"importTime: importing DungeonsNPythons took {app*1000:.1f}ms, over the {IMPORT_BUDGET*1000:.0f}ms budget")
+  for name, loaded in (("DungeonsNPythons", appLoaded), ("DNP_Engine", engineLoaded)):
+    if loaded:
+      FAILURES.append(f"importTime: importing {name} imported {', '.join(loaded)}, which should only be imported when needed")
+
+
+def runInfo():
+  '''
+  EFFECTS: Returns what a JSON results file says about the run besides its results: the seed, the commit (None outside a git checkout),
+  the Python version, the operating system, the CPU cores and whether NumPy was used.
+  '''
+
+  import platform
+  import subprocess
+
+  try:
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    commit = None
+  return {"seed": SEED, "commit": commit, "when": time.strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+          "platform": platform.platform(), "cores": os.cpu_count(), "numpy": DNP_Dice.np is not None}
+
+
+def compareResults(old, new):
+  '''
+  EFFECTS: Prints how every timing in the results `new` changed since the results `old` (both as saved by --json), slowest change first.
+  '''
+
+  changes = []
+  for name, metrics in new["results"].items():
+    for metric, result in metrics.items():
+      before = old["results"].get(name, {}).get(metric)
+      if before is not None and result["unit"] == "s" and before["unit"] == "s" and before["value"] > 0:
+        changes.append((result["value"] / before["value"], f"{name}.{metric}", before["value"], result["value"]))
+
+  def show(seconds):
+    return f"{seconds*1000:9.2f}ms" if seconds >= 0.001 else f"{seconds*1000000:9.2f}us"
+
+  print(f"Compared with {old['info'].get('commit') or 'the old run'} (seed {old['info'].get('seed')}, this run: seed {new['info']['seed']}):")
+  for ratio, metric, before, after in sorted(changes, reverse=True):
+    verdict = "slower" if ratio > 1.1 else "faster" if ratio < 1 / 1.1 else "same"
+    print(f"\t{metric:40} {show(before)} -> {show(after)}  {ratio:5.2f}x  {verdict}")
+
+
+def main(argv):
+  '''
+  EFFECTS: Runs the benchmarks named in argv (or all of them when none are named), each starting from the seed SEED (or '--seed <number>').
+  With '--json <path>' the results are also written to that file, and with '--compare <path>' they are compared with the results in that file.
+  Returns the exit status: 1 if a benchmark's checks failed (see FAILURES) or a benchmark name is unknown, 0 otherwise.
+  '''
+
+  global SEED, _running
+
+  parser = argparse.ArgumentParser(description="Time the parts of Dungeons & Pythons that have to be fast.")
+  parser.add_argument("names", nargs="*", metavar="name", help="benchmarks to run (all of them when none are named, see --list)")
+  parser.add_argument("--list", action="store_true", help="print the names of the benchmarks that are available and stop")
+  parser.add_argument("--seed", type=int, default=SEED, help=f"seed every benchmark starts from (default {SEED})")
+  parser.add_argument("--json", metavar="PATH", help="also write the results to this file")
+  parser.add_argument("--compare", metavar="PATH", help="compare the results with the ones in this file (written by --json)")
+  args = parser.parse_args(argv)
+
+  if args.list:
+    for name in BENCHMARKS:
+      print(name)
+    return 0
+  SEED = args.seed
+
+  for name in args.names or list(BENCHMARKS):
+    if name not in BENCHMARKS:
+      print(f"Unknown benchmark '{name}'. Use --list to see the available benchmarks.")
+      FAILURES.append(f"unknown benchmark '{name}'")
+      continue
+    seedEverything(SEED)
+    _running = name
+    start = time.perf_counter()
+    BENCHMARKS[name]()
+    record("total", time.perf_counter() - start)
+    print()
+
+  results = {"info": runInfo(), "results": RESULTS}
+  if args.json:
+    with open(args.json, 'w', encoding='utf-8') as file:
+      json.dump(results, file, indent=1)
+    print(f"Results written to {args.json}")
+  if args.compare:
+    with open(args.compare, 'r', encoding='utf-8') as file:
+      compareResults(json.load(file), results)
+
+  for failure in FAILURES:
+    print(f"FAILED {failure}")
+  return 1 if FAILURES else 0
+
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
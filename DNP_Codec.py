@@ -0,0 +1,122 @@
+# Code author: Patrick Woolard
+# Email: Jwoolard@augusta.edu
+# Github: https://github.com/JwoolardAU/DungeonsNPythons
+
+
+'''
+Compression codecs for the Character Share.
+
+The old share zipped a shelve with ZipFile's default settings, which mostly added zip and shelve overhead around a few hundred bytes of
+pickle. Now a bulk share (see DNP_Share.sendRoster()) compresses whole blocks of frames at a time, with a codec both sides agreed on:
+
+  - "none"   no compression at all
+  - "zlib"   standard library, any level from 1 (fastest) to 9 (smallest)
+  - "lzma"   standard library, the smallest output but by far the slowest
+  - "zstd"   only when the zstandard module is installed (on both sides), about as small as zlib 9 and faster than zlib 1
+
+The sender offers the codecs it has, the receiver answers with the ones it can decode too, and then chooseCodec() picks a setting for each
+block from its size: a block too small to gain anything goes uncompressed, bigger blocks use the first setting of the link's preferences
+that both sides have. The preferences come from 'python DNP_Benchmark.py compression', which times compress + send + decompress on a fast
+LAN and on a slow Wi-Fi link. zstandard is optional:   pip install zstandard
+'''
+
+
+import lzma # standard library codec
+import zlib # standard library codec
+
+try: # zstandard is optional. Without it zlib is used instead
+  import zstandard
+except ImportError:
+  zstandard = None
+
+
+# What each codec raises for data it can not decompress
+_ERRORS = (zlib.error, lzma.LZMAError) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+# Codec ids, the first byte of every compressed block
+CODEC_IDS = {"none": 0, "zlib": 1, "lzma": 2, "zstd": 3}
+CODEC_NAMES = {number: name for name, number in CODEC_IDS.items()}
+
+# Blocks smaller than this many bytes are sent as they are, compressing them saves less than the codec costs
+MIN_COMPRESS_SIZE = 512
+
+# Link speeds the preferences below are for (see the compression benchmark)
+LINK_LAN = "lan"
+LINK_SLOW = "slow"
+
+# For each link, the (codec, level) settings to use in order of preference (the first one both sides have wins, otherwise nothing is
+# compressed). lzma is never picked, even on a slow link its smaller output saves less time than it takes to compress, but it is still decoded
+PREFERENCES = {
+  LINK_LAN: (("zstd", 1), ("zlib", 1)),
+  LINK_SLOW: (("zstd", 9), ("zlib", 6)),
+}
+
+
+
+def available():
+  '''
+  EFFECTS: Returns the names of the codecs this app can use, in CODEC_IDS order.
+  '''
+
+  return [name for name in CODEC_IDS if name != "zstd" or zstandard is not None]
+
+
+def chooseCodec(size, codecs, link=LINK_LAN):
+  '''
+  EFFECTS: Returns the (codec, level) setting to compress a `size` byte block with, given the codec names both sides have (`codecs`)
+  and how fast the link is (LINK_LAN or LINK_SLOW).
+  '''
+
+  if size < MIN_COMPRESS_SIZE:
+    return ("none", 0)
+  for codec, level in PREFERENCES[link]:
+    if codec in codecs:
+      return (codec, level)
+  return ("none", 0)
+
+
+def compress(data, codec, level=0):
+  '''
+  EFFECTS: Returns `data` compressed with `codec` at `level` (the level is ignored by "none").
+
+  REQUIRES: codec is one of available()
+  '''
+
+  if codec == "zlib":
+    return zlib.compress(data, level)
+  if codec == "lzma":
+    return lzma.compress(data, preset=level)
+  if codec == "zstd":
+    return zstandard.ZstdCompressor(level=level).compress(data)
+  return bytes(data)
+
+
+def decompress(data, codec, limit):
+  '''
+  EFFECTS: Returns `data` decompressed with `codec`. Raises ValueError if it is not valid `codec` data, if the codec is not available, or
+  if it would decompress to more than `limit` bytes (so a tiny hostile block can not fill the receiver's memory).
+  '''
+
+  try:
+    if codec == "none":
+      result = bytes(data)
+    elif codec == "zlib":
+      decompressor = zlib.decompressobj()
+      result = decompressor.decompress(data, limit + 1)
+      if not decompressor.eof and len(result) <= limit:
+        raise ValueError("zlib data is cut short")
+    elif codec == "lzma":
+      decompressor = lzma.LZMADecompressor()
+      result = decompressor.decompress(data, limit + 1)
+      if not decompressor.eof and len(result) <= limit:
+        raise ValueError("lzma data is cut short")
+    elif codec == "zstd" and zstandard is not None:
+      result = zstandard.ZstdDecompressor().stream_reader(bytes(data)).read(limit + 1)
+    else:
+      raise ValueError(f"the codec '{codec}' is not available here")
+  except _ERRORS as error:
+    raise ValueError(f"broken {codec} data ({error})") from None
+
+  if len(result) > limit:
+    raise ValueError(f"{codec} data decompresses to more than {limit} bytes")
+  return result
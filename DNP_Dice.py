@@ -0,0 +1,327 @@
+# Code author: Patrick Woolard
+# Email: Jwoolard@augusta.edu
+# Github: https://github.com/JwoolardAU/DungeonsNPythons
+
+
+'''
+Dice engine for Dungeons & Pythons.
+
+Ability scores in Dungeons & Dragons are rolled as "4d6, drop the lowest": roll four six-sided dice and add up the highest three.
+This module rolls whole batches of ability score sets at once so that generating stat blocks for an entire table of NPCs is cheap.
+It can also work out the exact odds of any roll (no simulation needed), for example "highest score >= 16" or "total modifier >= +3".
+
+If NumPy is installed the batch is produced with one vectorized call. Otherwise a pure-Python fallback is used that gives the exact same
+probabilities (it just takes longer). NumPy is optional:   pip install numpy
+'''
+
+
+import hashlib # deriving independent child seeds when NumPy is not installed
+import random # used for the pure-Python fallback when NumPy is not installed
+from collections import Counter # counting how many dice outcomes give each ability score value
+from fractions import Fraction # exact probabilities (no floating point rounding)
+from functools import lru_cache # memoizing probability distributions so repeat questions are answered instantly
+from math import comb # binomial coefficients for order statistics
+from types import MappingProxyType # read-only views of memoized distributions so callers can't change the cached copy
+
+try: # NumPy is optional. If it is missing we fall back to the standard library
+  import numpy as np
+except ImportError:
+  np = None
+
+
+ABILITY_COUNT = 6 # Strength, Dexterity, Constitution, Intelligence, Wisdom, and Charisma
+DICE_PER_SCORE = 4 # we roll four dice...
+DIE_SIDES = 6 # ... each with six sides, and drop the lowest one
+
+
+def _buildOutcomeTable():
+  '''
+  EFFECTS: Returns a list with the ability score value for every one of the 6^4 = 1296 equally likely ways four six-sided dice can land.
+
+  HELPS: rollScoreBatch()
+
+  IMPLEMENTATION SKETCH:
+    - Walk every combination of four dice faces
+    - Add the highest three faces (the total minus the lowest face) and append that to the table
+  '''
+
+  table = []
+  for a in range(1, DIE_SIDES+1):
+    for b in range(1, DIE_SIDES+1):
+      for c in range(1, DIE_SIDES+1):
+        for d in range(1, DIE_SIDES+1):
+          table.append(a + b + c + d - min(a, b, c, d))
+  return table
+
+
+# Picking one entry of this table uniformly at random is exactly the same as rolling 4d6 and dropping the lowest die,
+# but it only costs one random number per score instead of four random numbers and a sort.
+OUTCOME_TABLE = _buildOutcomeTable()
+
+# NumPy copy of the table so a whole batch of picks can be looked up in one step
+_OUTCOME_ARRAY = np.array(OUTCOME_TABLE, dtype=np.uint8) if np is not None else None
+
+# Shared NumPy generator used when the caller does not supply one (created the first time it is needed)
+_defaultGenerator = None
+
+
+def makeRng(seed=None):
+  '''
+  EFFECTS: Returns a random number generator suited to rollScoreBatch(). This is a NumPy Generator when NumPy is installed and
+  a random.Random otherwise. Passing the same seed gives the same sequence of rolls.
+
+  HELPS: rollScoreBatch() callers that need reproducible rolls
+  '''
+
+  if np is not None:
+    return np.random.default_rng(seed)
+  return random.Random(seed)
+
+
+def spawnSeeds(seed, count):
+  '''
+  EFFECTS: Returns `count` child seeds derived from `seed`. Generators made from different child seeds produce statistically independent
+  streams of rolls, so each worker process in bulk generation can have its own. The same seed always gives the same child seeds
+  (a seed of None uses fresh operating system randomness instead).
+
+  HELPS: Bulk character generation (DNP_Generator.py)
+
+  IMPLEMENTATION SKETCH:
+    - With NumPy, SeedSequence.spawn() makes child seed sequences that are designed to be independent of each other
+    - Without NumPy, each child seed is a SHA-256 hash of the parent seed and the child's index
+    - Either way each child is turned into a plain 128-bit integer so it can seed random.Random as well as makeRng()
+  '''
+
+  if np is not None:
+    children = np.random.SeedSequence(seed).spawn(count)
+    return [int.from_bytes(child.generate_state(4).tobytes(), "little") for child in children]
+
+  if seed is None:
+    seed = random.SystemRandom().getrandbits(128)
+  return [int.from_bytes(hashlib.sha256(f"{seed}:{index}".encode()).digest()[:16], "little") for index in range(count)]
+
+
+def _defaultRng():
+  '''
+  EFFECTS: Returns the generator rollScoreBatch() uses when it is not given one. Without NumPy this is the `random` module itself,
+  so `random.seed()` keeps working the same way it did for the old one-die-at-a-time rollScores().
+
+  HELPS: rollScoreBatch()
+  '''
+
+  global _defaultGenerator
+
+  if np is None:
+    return random
+  if _defaultGenerator is None:
+    _defaultGenerator = np.random.default_rng()
+  return _defaultGenerator
+
+
+def rollScoreBatch(count, rng=None):
+  '''
+  EFFECTS: Returns `count` sets of six ability score values (4d6 drop lowest) as a (count, 6) array.
+  With NumPy this is a uint8 ndarray; without NumPy it is a list of `count` tuples of six ints.
+
+  REQUIRES: count must be a non-negative integer. rng (optional) must come from makeRng() or be the `random` module.
+
+  HELPS: rollScores(), headless character generation
+
+  IMPLEMENTATION SKETCH:
+    - Draw count*6 indexes into OUTCOME_TABLE, every index being equally likely
+    - Look up the ability score for each index (NumPy does this for the whole batch at once)
+    - Shape the values into rows of six (one row per character). Without NumPy the rows are tuples made by zip() in C: a million
+      new lists would set off garbage collection passes that walk every row made so far, while tuples of ints are dropped from the
+      collector's tracking after the first pass they survive
+  '''
+
+  if rng is None:
+    rng = _defaultRng()
+
+  # Vectorized path: one call to draw every index and one fancy-index to turn them into scores
+  if np is not None and isinstance(rng, np.random.Generator):
+    picks = rng.integers(0, len(OUTCOME_TABLE), size=(count, ABILITY_COUNT), dtype=np.uint16)
+    return _OUTCOME_ARRAY[picks]
+
+  # Pure-Python path: random.choices() picks all the table entries in a single C-level loop, and zip() cuts them into rows of six
+  values = rng.choices(OUTCOME_TABLE, k=count*ABILITY_COUNT)
+  return list(zip(*[iter(values)] * ABILITY_COUNT))
+
+
+
+# ---------------------------------- EXACT PROBABILITIES ----------------------------------
+
+# All the functions below return exact fractions.Fraction probabilities. Each one is memoized with lru_cache, so the first
+# call does the (small) amount of work and every repeat call is just a dictionary lookup.
+# Distributions are returned as read-only mappings of {value: probability} sorted by value.
+
+
+def abilityModifier(score):
+  '''
+  EFFECTS: Returns the Dungeons & Dragons ability modifier for an ability score value (i.e. 10 -> +0, 16 -> +3, 7 -> -2)
+
+  REQUIRES: score must be an integer
+  '''
+
+  return (score - 10) // 2
+
+
+@lru_cache(maxsize=None)
+def scorePmf():
+  '''
+  EFFECTS: Returns the exact probability of each ability score value (3 - 18) for a single 4d6-drop-lowest roll.
+
+  IMPLEMENTATION SKETCH:
+    - Count how many of the 1296 equally likely dice outcomes give each score value
+    - Divide each count by 1296
+  '''
+
+  counts = Counter(OUTCOME_TABLE)
+  return MappingProxyType({score: Fraction(counts[score], len(OUTCOME_TABLE)) for score in sorted(counts)})
+
+
+@lru_cache(maxsize=None)
+def scoreCdf():
+  '''
+  EFFECTS: Returns the exact probability that a single 4d6-drop-lowest roll is less than or equal to each score value (3 - 18).
+  '''
+
+  return _cumulative(scorePmf())
+
+
+def probScoreAtLeast(value):
+  '''
+  EFFECTS: Returns the exact probability that a single ability score roll is greater than or equal to `value`.
+  '''
+
+  return sum((prob for score, prob in scorePmf().items() if score >= value), Fraction(0))
+
+
+@lru_cache(maxsize=None)
+def orderStatisticPmf(rank, count=ABILITY_COUNT):
+  '''
+  EFFECTS: Returns the exact distribution of the `rank`-th highest score in a set of `count` scores
+  (rank 1 is the highest score, rank `count` is the lowest).
+
+  REQUIRES: 1 <= rank <= count
+
+  IMPLEMENTATION SKETCH:
+    - The rank-th highest score is >= s exactly when at least `rank` of the scores are >= s
+    - Each score is independent, so that is a binomial tail: sum over j >= rank of C(count, j) p^j (1-p)^(count-j), with p = P(score >= s)
+    - The probability of each exact value s is then P(rank-th highest >= s) - P(rank-th highest >= s+1)
+  '''
+
+  if rank < 1 or rank > count:
+    raise ValueError(f"rank must be between 1 and {count}")
+
+  def atLeast(value):
+    p = probScoreAtLeast(value)
+    return sum((comb(count, j) * p**j * (1-p)**(count-j) for j in range(rank, count+1)), Fraction(0))
+
+  scores = list(scorePmf())
+  return MappingProxyType({score: atLeast(score) - atLeast(score+1) for score in scores})
+
+
+def probHighestAtLeast(value, count=ABILITY_COUNT):
+  '''
+  EFFECTS: Returns the exact probability that the highest score in a set of `count` scores is greater than or equal to `value` (i.e. "highest score >= 16").
+  '''
+
+  return sum((prob for score, prob in orderStatisticPmf(1, count).items() if score >= value), Fraction(0))
+
+
+@lru_cache(maxsize=None)
+def modifierPmf():
+  '''
+  EFFECTS: Returns the exact distribution of the ability modifier (-4 to +4) of a single ability score roll.
+  '''
+
+  pmf = {}
+  for score, prob in scorePmf().items():
+    mod = abilityModifier(score)
+    pmf[mod] = pmf.get(mod, Fraction(0)) + prob
+  return MappingProxyType(dict(sorted(pmf.items())))
+
+
+@lru_cache(maxsize=None)
+def totalModifierPmf(count=ABILITY_COUNT):
+  '''
+  EFFECTS: Returns the exact distribution of the sum of the ability modifiers of `count` independent score rolls (a full set by default).
+  '''
+
+  return _convolvePower(modifierPmf(), count)
+
+
+@lru_cache(maxsize=None)
+def totalModifierCdf(count=ABILITY_COUNT):
+  '''
+  EFFECTS: Returns the exact probability that the total ability modifier of a set of `count` scores is less than or equal to each value.
+  '''
+
+  return _cumulative(totalModifierPmf(count))
+
+
+@lru_cache(maxsize=None)
+def totalScorePmf(count=ABILITY_COUNT):
+  '''
+  EFFECTS: Returns the exact distribution of the sum of `count` independent ability score rolls (a full set by default).
+  '''
+
+  return _convolvePower(scorePmf(), count)
+
+
+def probTotalModifierAtLeast(value, count=ABILITY_COUNT):
+  '''
+  EFFECTS: Returns the exact probability that the total ability modifier of a full set of scores is greater than or equal to `value` (i.e. "total modifier >= +3").
+  '''
+
+  below = Fraction(0)
+  for total, prob in totalModifierCdf(count).items():
+    if total >= value:
+      break
+    below = prob
+  return 1 - below
+
+
+def probRerollBeats(scores):
+  '''
+  EFFECTS: Returns the exact probability that rolling a brand new set of ability scores gives a strictly higher total ability modifier than `scores`.
+  This is what the reroll prompt in character creation shows the user.
+
+  REQUIRES: scores must be a list of ability score integers (normally the six values from rollScores())
+  '''
+
+  current = sum(abilityModifier(int(score)) for score in scores)
+  return probTotalModifierAtLeast(current + 1, len(scores))
+
+
+def _cumulative(pmf):
+  '''
+  EFFECTS: Turns a {value: probability} distribution into a read-only {value: P(X <= value)} mapping.
+
+  HELPS: scoreCdf(), totalModifierCdf()
+  '''
+
+  cdf = {}
+  running = Fraction(0)
+  for value, prob in pmf.items():
+    running += prob
+    cdf[value] = running
+  return MappingProxyType(cdf)
+
+
+def _convolvePower(pmf, count):
+  '''
+  EFFECTS: Returns the distribution of the sum of `count` independent values that each follow `pmf`.
+
+  HELPS: totalModifierPmf(), totalScorePmf()
+  '''
+
+  total = {0: Fraction(1)}
+  for step in range(count):
+    nextTotal = {}
+    for partial, partialProb in total.items():
+      for value, prob in pmf.items():
+        nextTotal[partial + value] = nextTotal.get(partial + value, Fraction(0)) + partialProb * prob
+    total = nextTotal
+  return MappingProxyType(dict(sorted(total.items())))
@@ -0,0 +1,209 @@
+# Code author: Patrick Woolard
+# Email: Jwoolard@augusta.edu
+# Github: https://github.com/JwoolardAU/DungeonsNPythons
+
+
+'''
+Finding receivers on the local network for the Character Share.
+
+The receiver used to find its own IP address by piping 'ipconfig' into a text file, picking the "Wireless LAN adapter Wi-Fi" block out of
+it with a regex, and reading it out to the sender, who typed it in. That took a shell command and a file on every lookup, only worked on
+Windows, and found nothing on a wired connection. Now:
+
+  - localAddresses() asks the operating system (in this process, no shell or files) which IPv4 addresses this computer has
+  - while a receiver is collecting shares it also answers discovery probes (see Announcer, which DNP_ShareServer runs next to its server)
+  - a sender broadcasts a probe to the whole local network (see discoverReceivers()) and every receiver answers straight back with its
+    name and share port, usually within a few milliseconds, so the sender just picks one from a list
+
+Discovery datagrams (UDP, DISCOVERY_PORT):
+  probe:    3 bytes magic b"DNP" | 1 byte b"?" | JSON {"version": share protocol version, "nonce": random id of this probe}
+  answer:   3 bytes magic b"DNP" | 1 byte b"!" | JSON {"version": share protocol version, "nonce": the probe's nonce, "name": receiver name, "port": share port}
+
+The answer goes to whoever sent the probe, and the sender uses the address the answer came from, so it is always one the sender can reach.
+Typing an IP address still works for networks that block broadcasts.
+'''
+
+
+import json # probes and answers carry a small JSON payload
+import socket # UDP broadcasts and looking up this computer's addresses
+import time # how long to keep listening for answers
+import uuid # every probe gets its own nonce
+
+from DNP_Share import MAGIC, PROTOCOL_VERSION, SHARE_PORT
+
+
+# The UDP port receivers listen on for discovery probes (the port next to the share port, both sides must agree on it)
+DISCOVERY_PORT = SHARE_PORT + 1
+
+# How long (in seconds) a sender listens for answers, and how many probes it sends in that time (UDP may drop one)
+DISCOVERY_TIMEOUT = 0.5
+DISCOVERY_PROBES = 3
+
+PROBE = MAGIC + b"?"
+ANSWER = MAGIC + b"!"
+
+# Datagrams bigger than this are not discovery datagrams
+MAX_DATAGRAM_SIZE = 1024
+
+# Any address outside this computer works here, connecting a UDP socket only picks the interface packets to it would leave from and sends nothing
+_ROUTE_PROBE = ("203.0.113.1", 9) # (TEST-NET-3, reserved for documentation so it is never a real host)
+
+
+
+def localAddresses():
+  '''
+  EFFECTS: Returns this computer's IPv4 addresses that other computers on the local network can reach it at, the one its network traffic
+  normally leaves from first. Returns ["127.0.0.1"] if it is not connected to any network.
+
+  IMPLEMENTATION SKETCH:
+    - connect a UDP socket towards an outside address and read which local address the operating system picked for it (nothing is sent)
+    - add the addresses this computer's host name resolves to
+    - leave out loopback addresses (127.x.x.x) unless there is nothing else
+  '''
+
+  addresses = []
+  try:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+      probe.connect(_ROUTE_PROBE)
+      addresses.append(probe.getsockname()[0])
+  except OSError: # no route anywhere (not connected to a network)
+    pass
+  try:
+    for info in socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET):
+      addresses.append(info[4][0])
+  except OSError: # the host name does not resolve
+    pass
+
+  addresses = [address for address in dict.fromkeys(addresses) if not address.startswith("127.") and address != "0.0.0.0"]
+  return addresses or ["127.0.0.1"]
+
+
+def broadcastAddresses():
+  '''
+  EFFECTS: Returns the addresses a probe is broadcast to: the limited broadcast address (255.255.255.255), plus the /24 broadcast address of
+  each local address, because some operating systems only send a limited broadcast out of one of the network interfaces.
+  '''
+
+  addresses = ["255.255.255.255"]
+  for address in localAddresses():
+    if not address.startswith("127."):
+      addresses.append(address.rsplit(".", 1)[0] + ".255")
+  return list(dict.fromkeys(addresses))
+
+
+def encodeProbe(nonce):
+  '''
+  EFFECTS: Returns the probe datagram with id `nonce`.
+  '''
+
+  return PROBE + json.dumps({"version": PROTOCOL_VERSION, "nonce": nonce}).encode("utf-8")
+
+
+def encodeAnswer(nonce, name, port):
+  '''
+  EFFECTS: Returns the answer to probe `nonce` from the receiver called `name` whose share server is on `port`.
+  '''
+
+  return ANSWER + json.dumps({"version": PROTOCOL_VERSION, "nonce": nonce, "name": name, "port": port}).encode("utf-8")
+
+
+def decodeDatagram(data, kind):
+  '''
+  EFFECTS: Returns the JSON payload of the datagram `data` if it is a discovery datagram of `kind` (PROBE or ANSWER) from the same share
+  protocol version, otherwise None (anything else on the port is ignored, never raised).
+  '''
+
+  if len(data) > MAX_DATAGRAM_SIZE or not data.startswith(kind):
+    return None
+  try:
+    payload = json.loads(data[len(kind):].decode("utf-8"))
+  except (UnicodeDecodeError, ValueError):
+    return None
+  if not isinstance(payload, dict) or payload.get("version") != PROTOCOL_VERSION or not isinstance(payload.get("nonce"), str):
+    return None
+  return payload
+
+
+
+class Announcer:
+  '''
+  asyncio datagram protocol that answers discovery probes for a receiver (see the module docstring). DNP_ShareServer starts one with
+  loop.create_datagram_endpoint() on DISCOVERY_PORT while it is collecting shares.
+  '''
+
+  def __init__(self, name, port):
+    '''
+    EFFECTS: Makes an announcer that answers probes with the receiver name `name` and the share server's port `port`.
+    '''
+
+    self.name = name
+    self.port = port
+    self.transport = None
+    self.answered = 0 # how many probes were answered
+
+
+  def connection_made(self, transport):
+    self.transport = transport
+
+
+  def datagram_received(self, data, address):
+    probe = decodeDatagram(data, PROBE)
+    if probe is None:
+      return
+    self.transport.sendto(encodeAnswer(probe["nonce"], self.name, self.port), address)
+    self.answered += 1
+
+
+  def error_received(self, error): # a probe that can not be answered (i.e. its sender is already gone) is just dropped
+    pass
+
+
+  def connection_lost(self, error):
+    pass
+
+
+
+def discoverReceivers(timeout=DISCOVERY_TIMEOUT, addresses=None, port=DISCOVERY_PORT, limit=None, probes=DISCOVERY_PROBES):
+  '''
+  EFFECTS: Broadcasts discovery probes to the local network and returns the receivers that answer within `timeout` seconds, in the order
+  they answered, as {"name", "address", "port"} dictionaries (each receiver only once). Stops early once `limit` receivers have answered.
+  Probes go to broadcastAddresses() unless `addresses` says where to send them. Returns [] if nobody answers or there is no network.
+
+  IMPLEMENTATION SKETCH:
+    - send a probe with a fresh nonce to every address, again every timeout/probes seconds in case UDP dropped one
+    - keep every answer that carries our nonce, using the address it came from and the share port it names
+  '''
+
+  nonce = uuid.uuid4().hex
+  probe = encodeProbe(nonce)
+  addresses = broadcastAddresses() if addresses is None else addresses
+  found = {} # (address, port): receiver
+  deadline = time.monotonic() + timeout
+  nextProbe = time.monotonic()
+
+  with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as connection:
+    connection.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    while True:
+      now = time.monotonic()
+      if now >= deadline or (limit is not None and len(found) >= limit):
+        break
+      if now >= nextProbe:
+        for address in addresses:
+          try:
+            connection.sendto(probe, (address, port))
+          except OSError: # that address is not reachable from here (i.e. no network on that interface)
+            pass
+        nextProbe = now + timeout / probes
+      connection.settimeout(max(0.001, min(deadline, nextProbe) - now))
+      try:
+        data, (address, sourcePort) = connection.recvfrom(MAX_DATAGRAM_SIZE + 1)
+      except socket.timeout:
+        continue
+      except OSError: # i.e. Windows reports an unreachable probe on the next receive, the other probes may still be answered
+        continue
+      answer = decodeDatagram(data, ANSWER)
+      if answer is None or answer["nonce"] != nonce or not isinstance(answer.get("port"), int):
+        continue
+      found.setdefault((address, answer["port"]), {"name": str(answer.get("name", address)), "address": address, "port": answer["port"]})
+
+  return list(found.values())
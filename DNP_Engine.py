@@ -0,0 +1,521 @@
+# Code author: Patrick Woolard
+# Email: Jwoolard@augusta.edu
+# Github: https://github.com/JwoolardAU/DungeonsNPythons
+# Information on Dungeons & Dragons/context on the app contents below: https://en.wikipedia.org/wiki/Dungeons_%26_Dragons
+
+
+'''
+The Dungeons & Pythons engine: everything about characters that does not prompt anyone.
+
+  - the game options (RACES, CLASSES, GENDERS, ALIGNMENTS, ABILITIES) and the Character class
+  - opening the character store (openCharacterStore()) and rolling ability scores (rollScores())
+  - looking up a race's lifespan (raceLifespan(), and LifespanPrefetch to do it in the background)
+
+Importing this module does no work at all beyond defining these: it prints nothing, opens no files, and does not load the networking,
+HTML parsing or NumPy modules, which are only imported by the function that first needs them. That keeps 'python DungeonsNPythons.py'
+quick to start (see the importTime benchmark in DNP_Benchmark.py), and lets other scripts use characters without the interactive app
+(i.e. DNP_Generator.py, DNP_Roster.py). DungeonsNPythons.py holds the interactive prompts and main(), and only imports from here what
+those use.
+'''
+
+
+import os # where the old character shelve lives
+import threading # the race lifespan is looked up in the background while the user keeps making their character (see LifespanPrefetch)
+from collections.abc import MutableMapping # lets a character's packed ability scores behave like a dictionary (see AbilityScores)
+
+from DNP_Store import CharacterStore, migrateShelve # SQLite character storage in a folder called 'DNP_Characters' so charachter infromation gets saved across multiple sessions (see DNP_Store.py)
+from DNP_Reference import REFERENCE_URL, lifespan, pageTraits # race and class information shipped with the app, so it is there instantly and offline (see DNP_Reference.py)
+from DNP_WebCache import FetchCancelled # keeps the web pages scraped for character creation on disk (see DNP_WebCache.py)
+
+
+
+# GAME OPTIONS:
+# Every option a Dungeons & Dragons 5th edition character can pick from. These are shared by the interactive prompts (DungeonsNPythons.py) and by
+# headless character generation (DNP_Generator.py), so they live here in the engine instead of inside each prompt function.
+RACES = ["Dragonborn","Dwarf","Elf","Gnome","Half-Elf","Halfling","Half-Orc","Human","Tiefling"]
+CLASSES = ["Barbarian","Bard","Cleric","Druid","Fighter","Monk","Paladin","Ranger","Rogue","Sorcerer","Warlock","Wizard"]
+GENDERS = ["Woman", "Man", "Ambiguous"]
+ALIGNMENTS = ["Lawful Good", "Neutral Good", "Chaotic Good", "Lawful Neutral", "True Neutral", "Chaotic Neutral", "Lawful Evil", "Neutral Evil", "Chaotic Evil"]
+ABILITIES = ["Strength", "Dexterity", "Constitution", "Intelligence", "Wisdom", "Charisma"]
+LEVELS = range(1, 21) # DND 5e levels range from 1 - 20
+GOLD = range(0, 10000000000000000000) # a character can have 0 - 9999999999999999999 gold pieces (the most character management lets you type)
+
+# While the app is running, character changes are written to disk in batches this many seconds after they are saved (see CharacterStore in DNP_Store.py)
+SESSION_FLUSH_DELAY = 5
+
+# Where characters were saved before the character store existed. Anything left in here gets copied into the store the first time it is opened.
+CHARACTER_SHELF = os.path.join('DNP_Characters', 'Characters')
+
+
+
+# Characters keep race, class, gender, alignment and the six ability scores as small numbers packed into one 10 byte array (see Character below).
+# Each of the first four is stored as its position in RACES, CLASSES, GENDERS or ALIGNMENTS, and NOT_SET marks something that has not been picked yet.
+NOT_SET = 255
+CODE_FIELDS = {"race": 0, "charClass": 1, "gender": 2, "alignment": 3} # byte position of each code
+SCORE_OFFSET = len(CODE_FIELDS) # the six ability scores come right after the four codes, in ABILITIES order
+ABILITY_POSITIONS = {ability: SCORE_OFFSET + index for index, ability in enumerate(ABILITIES)}
+
+
+
+def codeProperty(field, options, default=None):
+  '''
+  EFFECTS: Returns a property that reads and writes one of `options` (i.e. "Elf" out of RACES) as its one byte code in a character's code array.
+  Reading something that was never set gives `default`, and setting None or `default` clears it again.
+
+  REQUIRES: field must be one of the CODE_FIELDS keys. options must have fewer than NOT_SET entries.
+
+  HELPS: Character
+  '''
+
+  position = CODE_FIELDS[field]
+  codes = {option: code for code, option in enumerate(options)}
+
+  def getter(self):
+    code = self._codes[position]
+    return default if code == NOT_SET else options[code]
+
+  def setter(self, value):
+    if value is None or value == default:
+      self._codes[position] = NOT_SET
+    elif value in codes:
+      self._codes[position] = codes[value]
+    else:
+      raise ValueError(f"'{value}' is not a valid {field}. Options are: {', '.join(options)}")
+
+  return property(getter, setter)
+
+
+
+class AbilityScores(MutableMapping):
+  '''
+  A dictionary-like view of a character's six ability scores ({"Strength": 15, "Dexterity": 12, ...}) that reads and writes straight
+  through to the character's code array, so `CharObj.abScores["Wisdom"] = 14` updates the character itself.
+  Scores must be whole numbers from 0 to 254 (character management allows 0 - 40). A score that has not been assigned yet reads as None.
+  '''
+
+  __slots__ = ("_codes",)
+
+  def __init__(self, codes):
+    self._codes = codes
+
+  def __getitem__(self, ability):
+    score = self._codes[ABILITY_POSITIONS[ability]]
+    return None if score == NOT_SET else score
+
+  def __setitem__(self, ability, score):
+    self._codes[ABILITY_POSITIONS[ability]] = NOT_SET if score is None else int(score) # character management hands us the typed text, i.e. '16'
+
+  def __delitem__(self, ability):
+    raise TypeError("every character has all six ability scores, they can be changed but not removed")
+
+  def __iter__(self):
+    return iter(ABILITIES)
+
+  def __len__(self):
+    return len(ABILITIES)
+
+  def __repr__(self):
+    return repr(dict(self)) # prints exactly like the plain dictionary characters used to have
+
+
+
+# CLASS OVERVIEW:
+# The Character class is used as a wrapper for all important details a Dungeons and Dragons character needs (i.e. race, class, ability scores, etc.)
+# Each character object that gets created gets saved to the character store so that saved characters exist across multiple sessions of the application
+# The user can view and edit their character (and details thereof) in character management mode
+# A roster can hold many thousands of characters, so each one is kept small: there is no per-character attribute dictionary (__slots__),
+# and race, class, gender, alignment and ability scores are packed into one small byte array instead of repeating the full strings.
+# Reading and writing them still works exactly like plain attributes (CharObj.race, CharObj.abScores["Strength"], ...).
+class Character:
+
+  __slots__ = ("_codes", "name", "age", "_level", "_gold", "backStory", "inventory", "sessGoals", "_detailLoader")
+
+  # These get filled out in creation mode using constructor 
+  # All except for abScores are strings. abScores is a dictionary-like view (see AbilityScores) that maps strings to integers
+  race = codeProperty("race", RACES)
+  charClass = codeProperty("charClass", CLASSES)
+  gender = codeProperty("gender", GENDERS)
+
+
+  def __new__(cls, *args):
+    '''
+    EFFECTS: Makes a blank character with nothing picked yet. Unpickling and the character store make characters this way without calling __init__.
+    '''
+
+    self = super().__new__(cls)
+    self._setBlank()
+    return self
+
+
+  def _setBlank(self):
+    '''
+    EFFECTS: Resets every field except the details to "not set yet".
+
+    HELPS: __new__(), __setstate__()
+    '''
+
+    self._codes = bytearray([NOT_SET]) * (SCORE_OFFSET + len(ABILITIES))
+    self.name = None
+    self.age = None
+    self._level = None # None until the level is set, then an int
+    self._gold = 0
+
+
+  # Object constructor where we fill out class attributes based on user choices 
+  # This will be called once the user has finalized their decision in main()
+  def __init__(self, r, c, n, a, g, abS):
+    '''
+    EFFECTS: Creates character object based on all user decisions 
+
+    REQUIRES: Each argument not be set to null
+    '''
+    self.race = r
+    self.charClass = c
+    self.name = n
+    self.age = a
+    self.gender = g
+    self.abScores = abS
+    # sessGoals and inventory start out as empty lists, but the lists are only made the first time they are used (see __getattr__)
+
+
+  @property
+  def abScores(self):
+    return AbilityScores(self._codes) # This one can be updated later in character management mode
+
+  @abScores.setter
+  def abScores(self, scores):
+    view = AbilityScores(self._codes)
+    for ability in ABILITIES:
+      view[ability] = None if scores is None else scores.get(ability)
+
+
+  # These get updated in character management mode. For now we set them to default values that get shown until the user updates them 
+  # All are strings except for session goals (sessGoals) or inventory. Both of which are lists of strings
+  DEFAULT_LEVEL = "Not yet set... (Some campaigns require you start at higher levels)"
+  DEFAULT_ALIGNMENT = "Not yet set... (your character's true nature may emerge as their adventures unfold)"
+  alignment = codeProperty("alignment", ALIGNMENTS, DEFAULT_ALIGNMENT)
+
+  @property
+  def level(self):
+    return Character.DEFAULT_LEVEL if self._level is None else str(self._level)
+
+  @level.setter
+  def level(self, level):
+    self._level = None if level is None or level == Character.DEFAULT_LEVEL else int(level)
+
+  @property
+  def gold(self):
+    return str(self._gold)
+
+  @gold.setter
+  def gold(self, gold):
+    self._gold = int(gold)
+
+
+  # The "detail" attributes can get big (a backstory can be up to 4000 letters and the lists have no limit), so the character store
+  # keeps them separately from everything else and only loads them the first time they are actually used (see __getattr__ below).
+  # sessGoals: If you have any goals or notes for the next play session (i.e. 'I curently have 5 health points' or 'sell magic staff') 
+  DETAIL_DEFAULTS = {
+    "backStory": "Not yet set... (Give your character a back story, it will help bring them more to life!)",
+    "inventory": [],
+    "sessGoals": [],
+  }
+
+
+  def __getattr__(self, attr):
+    '''
+    EFFECTS: Python only calls this when `attr` is not found on the character the normal way (which includes a detail attribute that was never set).
+    For a detail attribute (see DETAIL_DEFAULTS) that the character store has not loaded yet, we load every detail attribute now and return
+    the one asked for. A detail attribute that was never set gives its default value (a new empty list of its own for inventory and sessGoals).
+    '''
+
+    if attr not in Character.DETAIL_DEFAULTS:
+      raise AttributeError(attr)
+
+    if not self.detailsLoaded():
+      self._loadDetails()
+    try:
+      return object.__getattribute__(self, attr) # it was just loaded
+    except AttributeError:
+      pass
+
+    default = Character.DETAIL_DEFAULTS[attr]
+    if isinstance(default, list):
+      default = [] # never hand out the shared default list, the character gets a list of its own that it keeps from now on
+      setattr(self, attr, default)
+    return default
+
+
+  def detailsLoaded(self):
+    '''
+    EFFECTS: Returns False if this character's detail attributes are still waiting to be loaded from the character store, True otherwise.
+    A detail attribute that was set without any being read first (i.e. CharObj.backStory = "...") counts as a change, so the other
+    details are loaded right then (without undoing the change) and this returns True, which makes the character store save them.
+    '''
+
+    try:
+      object.__getattribute__(self, "_detailLoader")
+    except AttributeError:
+      return True
+
+    for detail in Character.DETAIL_DEFAULTS:
+      try:
+        object.__getattribute__(self, detail)
+      except AttributeError:
+        continue
+      self._loadDetails()
+      return True
+    return False
+
+
+  def _loadDetails(self):
+    '''
+    EFFECTS: Loads every detail attribute that has not been set yet from the character store (through the loader it left on the character).
+
+    HELPS: __getattr__(), detailsLoaded()
+    '''
+
+    loader = self._detailLoader # the character store leaves a loader function here when it skips the details
+    del self._detailLoader
+    for detail, value in loader().items():
+      try:
+        object.__getattribute__(self, detail) # set since the character was loaded, keep the new value
+      except AttributeError:
+        setattr(self, detail, value)
+
+
+  def __getstate__(self):
+    '''
+    EFFECTS: Returns what gets pickled for this character: the packed code array, name, age, level, gold and the details (loaded first, the loader
+    itself can not be pickled). Details still at their default are pickled as None so every character does not carry the default text around.
+    '''
+
+    details = []
+    for attr, default in Character.DETAIL_DEFAULTS.items():
+      value = getattr(self, attr)
+      details.append(None if value == default else value)
+    return (bytes(self._codes), self.name, self.age, self._level, self._gold, *details)
+
+
+  def __setstate__(self, state):
+    '''
+    EFFECTS: Restores a pickled character. Accepts both the packed state from __getstate__() and the attribute dictionary that characters
+    were pickled as before Character used __slots__ (old shelve files, old character shares), so those still load.
+    '''
+
+    self._setBlank()
+
+    if isinstance(state, dict): # pickled by an older version of the app
+      for attr, value in state.items():
+        setattr(self, attr, value)
+      return
+
+    codes, self.name, self.age, self._level, self._gold, *details = state
+    self._codes = bytearray(codes)
+    for attr, value in zip(Character.DETAIL_DEFAULTS, details):
+      if value is not None:
+        setattr(self, attr, value)
+
+
+  def toRecord(self):
+    '''
+    EFFECTS: Returns the character as a plain dictionary of strings, numbers and lists that can be turned into JSON (used by character share).
+    Anything that has not been set yet is None.
+    '''
+
+    alignment = self.alignment
+    backStory = self.backStory
+    return {
+      "name": self.name, "race": self.race, "charClass": self.charClass, "gender": self.gender, "age": self.age,
+      "alignment": None if alignment == Character.DEFAULT_ALIGNMENT else alignment,
+      "level": self._level, "gold": self._gold, "abScores": dict(self.abScores),
+      "backStory": None if backStory == Character.DETAIL_DEFAULTS["backStory"] else backStory,
+      "inventory": list(self.inventory), "sessGoals": list(self.sessGoals),
+    }
+
+
+  @classmethod
+  def fromRecord(cls, record):
+    '''
+    EFFECTS: Returns a new character made from a dictionary made by toRecord(). Raises ValueError if the record does not describe a valid character
+    (records can come from other users over the network, so nothing in them is trusted).
+    '''
+
+    if not isinstance(record, dict):
+      raise ValueError("a character record must be a JSON object")
+    for field in ("name", "age", "backStory"):
+      if record.get(field) is not None and not isinstance(record[field], str):
+        raise ValueError(f"{field} must be text")
+    for field in ("name", "race", "charClass", "gender", "age"): # everything character creation always fills in
+      if not record.get(field):
+        raise ValueError(f"a character needs a {field}")
+    for field in ("inventory", "sessGoals"):
+      if record.get(field) is not None and not (isinstance(record[field], list) and all(isinstance(item, str) for item in record[field])):
+        raise ValueError(f"{field} must be a list of text")
+    if record.get("abScores") is not None and not isinstance(record["abScores"], dict):
+      raise ValueError("abScores must map ability names to scores")
+
+    character = cls.__new__(cls)
+    try:
+      for field in ("name", "race", "charClass", "gender", "age", "alignment", "level", "gold", "backStory", "inventory", "sessGoals"):
+        if record.get(field) is not None:
+          setattr(character, field, record[field])
+      for ability, score in (record.get("abScores") or {}).items():
+        character.abScores[ability] = score
+    except (KeyError, TypeError, OverflowError) as error: # an ability that does not exist, or a score/level/gold that is not a whole number
+      raise ValueError(f"invalid character field ({error})") from None
+    if character._level is not None and character._level not in LEVELS: # the same limits character management holds typed values to
+      raise ValueError(f"level must be from {LEVELS[0]} to {LEVELS[-1]}")
+    if character._gold not in GOLD:
+      raise ValueError(f"gold must be from {GOLD[0]} to {GOLD[-1]}")
+    return character
+
+
+
+def openCharacterStore(flushDelay=None):
+  '''
+  EFFECTS: Opens (and returns) the permanent character store. If the user does not have a 'DNP_Characters' folder yet, one is made for them first.
+  The first time the store is opened, any characters saved in the old character shelve are copied into it.
+  With a flushDelay (in seconds) the store writes saved characters behind in batches instead of straight away.
+
+  HELPS: DungeonsNPythons.main(), DNP_Generator.py
+  '''
+
+  charStore = CharacterStore(flushDelay=flushDelay) # this makes the DNP_Characters folder if it does not already exist
+
+  # One-shot migration from the old shelve. We remember that it happened so later sessions skip straight past it.
+  if charStore.getMeta("shelveMigrated") is None:
+    copied = migrateShelve(charStore, CHARACTER_SHELF)
+    if copied:
+      print(f"Moved {copied} saved characters into the new character store.\n")
+    charStore.setMeta("shelveMigrated", "yes")
+
+  return charStore
+
+
+
+def rollScores():
+  '''
+  EFECTS: Returns list of six ability scores values that were calculated according to Dungeons & Dragons rules.
+
+  HELPS: DungeonsNPythons.main()
+
+  IMPLEMENTATION SKETCH: 
+    - In order to simulate the same probability as rolling a real dice for ability scores, we follow the same strategy:
+        - For each ability score, we roll a six-sided dice four times.
+        - We take the sum of the highest three rolls and that becomes an ability score value
+        - We do this process a total of six times for each ability score
+    - The dice rolling itself is done by the batch dice engine in DNP_Dice.py (rollScoreBatch), we just ask it for a batch of one
+    - We then return the list of ability score integer values.
+  '''
+
+  from DNP_Dice import rollScoreBatch # imported here, so NumPy is only loaded once dice are actually rolled
+
+  # rollScoreBatch(1) gives back one row of six scores. We turn each value into a plain python int before returning the list
+  return [int(value) for value in rollScoreBatch(1)[0]]
+
+
+
+def raceLifespan(raceChoice, webCache, cancel=None):
+  '''
+  EFFECTS: Returns the text (webscrapped) about how long characters of the race `raceChoice` live. The web page is fetched through the WebCache
+  `webCache`, so it is only downloaded again once the cached copy is out of date (see DNP_WebCache.py). Raises an exception if the page can not be
+  obtained or does not contain the information, and DNP_WebCache.FetchCancelled if the threading.Event `cancel` is set before it is done.
+
+  HELPS: DungeonsNPythons.ageAssignment(), LifespanPrefetch
+
+  IMPLEMENTATION SKETCH:
+    - Obtain the web page containing information about a character's race (from the cache if it has it)
+    - Extract only the list items of the page's content (see DNP_Extract.py), not a whole BeautifulSoup tree of the page
+    - Pick the one named "Age" out of them, wherever on the page it is
+  '''
+
+  # Attempt to obtain data scrapped from website (data correlating to information about the user's selected race)
+  # In the event gathering the webscrapped data failed (and the page was never cached), an exception is raised
+  page = webCache.get(REFERENCE_URL + raceChoice.lower(), cancel) # i.e. http://dnd5e.wikidot.com/elf
+  if cancel is not None and cancel.is_set(): # (the page was cached) no need to parse it for a race nobody wants anymore
+    raise FetchCancelled(f"the lifespan of the {raceChoice} race is not needed anymore")
+
+  # This obtains the specific string containing information about a particular race's longevity and how long they live on average from the webscrapped page html data.
+  # (the "Age." trait, found by its name, so it no longer matters which of the page's lists each race keeps it in)
+  from DNP_Extract import extractPage # imported here, so the HTML parser is only loaded once a page really has to be scraped
+  traits = pageTraits(extractPage(page))
+  if "Age" not in traits:
+    raise LookupError(f"the {raceChoice} page does not say how long they live")
+  return traits["Age"]
+
+
+
+class LifespanPrefetch:
+  '''
+  Looks up a race's lifespan as soon as the race is picked: straight from the reference index shipped with the app (see DNP_Reference.py),
+  or if it does not have the race, by scraping it (see raceLifespan()) on a background thread, so the download and parsing happen while the
+  user is still picking a class and rolling scores, and ageAssignment() finds the text ready instead of making the user wait.
+  Only one race is looked up at a time: starting another race cancels the lookup of the old one.
+  '''
+
+  def __init__(self, webCache):
+    '''
+    EFFECTS: Makes a prefetcher that looks races up through the WebCache `webCache`.
+    '''
+
+    self.webCache = webCache
+    self.race = None # the race being looked up (or looked up already)
+    self._lookup = None # Future for the lookup's text
+    self._cancel = None # threading.Event that cancels the lookup
+
+
+  def start(self, raceChoice):
+    '''
+    EFFECTS: Starts looking up the lifespan of `raceChoice` in the background (unless it already is), cancelling any other race's lookup.
+    '''
+
+    from concurrent.futures import Future # imported here, it loads the logging module (more than the rest of this file takes to import)
+
+    if raceChoice == self.race:
+      return
+    self.cancel()
+    self.race = raceChoice
+    self._lookup = Future()
+    self._cancel = threading.Event()
+
+    # The reference index shipped with the app usually has it already (see DNP_Reference.py), then nothing needs to be looked up at all
+    text = lifespan(raceChoice)
+    if text is not None:
+      self._lookup.set_result(text)
+      return
+    # daemon thread, so a slow website never keeps the app open after the user exits
+    threading.Thread(target=self._run, args=(raceChoice, self._lookup, self._cancel), daemon=True).start()
+
+
+  def _run(self, raceChoice, lookup, cancel):
+    '''
+    EFFECTS: Looks the lifespan of `raceChoice` up and hands the text (or the exception) to the Future `lookup`. Runs on its own thread.
+
+    HELPS: start()
+    '''
+
+    try:
+      lookup.set_result(raceLifespan(raceChoice, self.webCache, cancel))
+    except Exception as error:
+      lookup.set_exception(error)
+
+
+  def cancel(self):
+    '''
+    EFFECTS: Cancels the lookup in progress (if any). Its download stops at the next piece and its result is never used.
+    '''
+
+    if self._cancel is not None:
+      self._cancel.set()
+    self.race = self._lookup = self._cancel = None
+
+
+  def get(self, raceChoice):
+    '''
+    EFFECTS: Returns the lifespan text of `raceChoice`, waiting for its background lookup to finish (starting one first if `raceChoice`
+    is not the race being looked up). Raises whatever the lookup raised.
+    '''
+
+    self.start(raceChoice)
+    return self._lookup.result(timeout=self.webCache.timeout + 5) # (the download gives up after the cache's timeout anyway)
@@ -0,0 +1,182 @@
+# Code author: Patrick Woolard
+# Email: Jwoolard@augusta.edu
+# Github: https://github.com/JwoolardAU/DungeonsNPythons
+
+
+'''
+Pulling the few pieces Dungeons & Pythons needs out of a scraped reference page.
+
+A race page on the reference website is about 100 KB of HTML, and all that is ever used from it is a handful of list items and paragraphs
+inside its '#page-content' block. Parsing the whole page into a BeautifulSoup tree with the pure Python 'html.parser' (what ageAssignment()
+used to do) takes most of the time a cached lookup takes. extractPage() only parses what it needs:
+
+  - everything before the '#page-content' block (the page's head, scripts and side bar) is skipped before any parser sees it
+  - the fastest parser installed is used, all of them giving the very same result:
+      "selectolax"   (optional, pip install selectolax)   a C parser (lexbor), several times faster than the others
+      "lxml"         (optional, pip install lxml)         a C parser (libxml2)
+      "html.parser"  (always there, through bs4)           with a SoupStrainer, so only the '#page-content' block is made into a tree
+  - only the list items, the paragraphs and the text of that block are pulled out, as plain strings (no tree is kept)
+
+From the shell:   python DNP_Extract.py <saved page.html> [backend]    (prints what is extracted from a saved page)
+'''
+
+
+import sys # command line arguments
+
+try: # selectolax is optional. Without it lxml or html.parser is used instead
+  from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+  LexborHTMLParser = None
+
+try: # lxml is optional too
+  import lxml.html
+except ImportError:
+  lxml = None
+
+
+# Every backend installed here, fastest first. BACKEND is the one extractPage() uses unless told otherwise
+BACKENDS = tuple(name for name, module in (("selectolax", LexborHTMLParser), ("lxml", lxml), ("html.parser", True)) if module)
+BACKEND = BACKENDS[0]
+
+# The id of the block holding the page's own content on the reference website (everything else is navigation)
+CONTENT_ID = "page-content"
+
+# A list item whose first child is one of these tags is a named trait: "<li><strong>Age.</strong> Humans reach adulthood...</li>"
+NAME_TAGS = ("strong", "em", "b", "i")
+
+
+
+def contentSection(html):
+  '''
+  EFFECTS: Returns `html` from the start of its '#page-content' block on (the whole of `html` if it does not seem to have one). Parsers
+  fill in the <html> and <body> tags this cuts off, so the block parses the same either way.
+
+  HELPS: extractPage()
+  '''
+
+  for marker in (f'id="{CONTENT_ID}"', f"id='{CONTENT_ID}'"):
+    found = html.find(marker)
+    if found != -1:
+      start = html.rfind("<", 0, found)
+      return html[start:] if start != -1 else html
+  return html
+
+
+def _clean(text):
+  '''
+  EFFECTS: Returns `text` with every run of white space turned into a single space (and none at either end), so every backend's text
+  reads the same.
+
+  HELPS: the backends
+  '''
+
+  return " ".join(text.split())
+
+
+def _item(name, text):
+  '''
+  EFFECTS: Returns the (name, text) pair for a list item whose whole text is `text` and whose leading bold/italic name is `name` (None if
+  it has none): the name without its trailing '.' or ':', and the text after it. ("", text) if it has no name.
+
+  HELPS: the backends
+  '''
+
+  if name is None:
+    return ("", text)
+  return (name.rstrip(".:").strip(), text[len(name):].strip() if text.startswith(name) else text)
+
+
+def _selectolax(html):
+  '''
+  EFFECTS: extractPage() with the selectolax (lexbor) parser. Returns None if there is no '#page-content' block.
+  '''
+
+  content = LexborHTMLParser(html).css_first(f"#{CONTENT_ID}")
+  if content is None:
+    return None
+  items = []
+  for item in content.css("li"):
+    first = next((child for child in item.iter(include_text=True) if child.tag != "-text" or child.text().strip()), None)
+    name = _clean(first.text(separator=" ")) if first is not None and first.tag in NAME_TAGS else None
+    items.append(_item(name, _clean(item.text(separator=" "))))
+  return {"items": items,
+          "paragraphs": [_clean(paragraph.text(separator=" ")) for paragraph in content.css("p")],
+          "text": _clean(content.text(separator=" "))}
+
+
+def _lxml(html):
+  '''
+  EFFECTS: extractPage() with the lxml parser. Returns None if there is no '#page-content' block.
+  '''
+
+  found = lxml.html.fromstring(html).xpath(f"//*[@id='{CONTENT_ID}']")
+  if not found:
+    return None
+  content = found[0]
+  items = []
+  for item in content.iter("li"):
+    first = item[0] if len(item) and not (item.text or "").strip() else None
+    name = _clean(" ".join(first.itertext())) if first is not None and first.tag in NAME_TAGS else None
+    items.append(_item(name, _clean(" ".join(item.itertext()))))
+  return {"items": items,
+          "paragraphs": [_clean(" ".join(paragraph.itertext())) for paragraph in content.iter("p")],
+          "text": _clean(" ".join(content.itertext()))}
+
+
+def _htmlParser(html):
+  '''
+  EFFECTS: extractPage() with bs4 and html.parser, only making the '#page-content' block into a tree. Returns None if there is no
+  '#page-content' block.
+  '''
+
+  import bs4 # only needed when neither C parser is installed
+
+  content = bs4.BeautifulSoup(html, 'html.parser', parse_only=bs4.SoupStrainer(id=CONTENT_ID)).find(id=CONTENT_ID)
+  if content is None:
+    return None
+  items = []
+  for item in content.find_all("li"):
+    first = next((child for child in item.children if getattr(child, "name", None) or str(child).strip()), None)
+    name = _clean(first.get_text(" ")) if getattr(first, "name", None) in NAME_TAGS else None
+    items.append(_item(name, _clean(item.get_text(" "))))
+  return {"items": items,
+          "paragraphs": [_clean(paragraph.get_text(" ")) for paragraph in content.find_all("p")],
+          "text": _clean(content.get_text(" "))}
+
+
+_BACKENDS = {"selectolax": _selectolax, "lxml": _lxml, "html.parser": _htmlParser}
+
+
+def extractPage(html, backend=None):
+  '''
+  EFFECTS: Returns what is in the '#page-content' block of the reference page `html` (text) as
+    {"items": [(name, text)] of every list item (name is "" unless it starts with a bold or italic name, see NAME_TAGS),
+     "paragraphs": [text] of every paragraph, "text": all of the block's text},
+  every text with its white space tidied up. Everything is empty if the page has no '#page-content' block. Parses with `backend` (one of
+  BACKENDS, BACKEND by default).
+
+  IMPLEMENTATION SKETCH:
+    - Skip everything before the '#page-content' block (see contentSection())
+    - Parse the rest with the backend and pull the list items, paragraphs and text out of the block
+    - If cutting the page short lost the block somehow (i.e. the marker was inside a script), parse the whole page instead
+  '''
+
+  extract = _BACKENDS[backend or BACKEND]
+  section = contentSection(html)
+  page = extract(section)
+  if page is None and section is not html:
+    page = extract(html)
+  return page if page is not None else {"items": [], "paragraphs": [], "text": ""}
+
+
+
+if __name__ == "__main__":
+  arguments = sys.argv[1:]
+  if not arguments or arguments[0].startswith("-"):
+    print(f"Usage: python DNP_Extract.py <saved page.html> [{' | '.join(BACKENDS)}]")
+  else:
+    with open(arguments[0], 'r', encoding='utf-8', errors='replace') as file:
+      extracted = extractPage(file.read(), arguments[1] if len(arguments) > 1 else None)
+    for name, text in extracted["items"]:
+      print(f"  - {name}: {text}" if name else f"  - {text}")
+    print(f"{len(extracted['items'])} list items, {len(extracted['paragraphs'])} paragraphs, {len(extracted['text'])} characters of text")
@@ -0,0 +1,336 @@
+# Code author: Patrick Woolard
+# Email: Jwoolard@augusta.edu
+# Github: https://github.com/JwoolardAU/DungeonsNPythons
+
+
+'''
+Headless (no prompts) character generation for Dungeons & Pythons.
+
+Every step of interactive character creation asks the user something. This module makes fully filled out Character objects
+without asking anybody anything, without opening a web browser and without touching the network. It is handy for stocking a
+campaign with NPCs.
+
+From python:
+
+    from DNP_Generator import generateCharacter, generateCharacters
+    npc = generateCharacter({"race": "Elf", "charClass": "Wizard"})
+    party = generateCharacters(5, seed=42)
+
+From the shell (makes 500 random characters and saves them to the character store):
+
+    python DNP_Generator.py 500
+    python DNP_Generator.py 20 --race Dwarf --class Fighter --seed 7
+
+Seeding a whole campaign world with hundreds of thousands of NPCs can be spread over every CPU core with bulkGenerate()
+(or '--workers 0' from the shell).
+'''
+
+
+import argparse # command line options for the generator
+import os # counting CPU cores for bulk generation
+import random # random choices for race, class, gender, age, name, etc.
+import time # reporting how fast characters were generated
+from concurrent.futures import ProcessPoolExecutor # spreading bulk generation over several worker processes
+
+from DNP_Dice import makeRng, rollScoreBatch, spawnSeeds
+from DNP_Engine import Character, RACES, CLASSES, GENDERS, ALIGNMENTS, ABILITIES, openCharacterStore
+
+
+# Longest name the interactive nameAssignment() allows
+MAX_NAME_LENGTH = 40
+
+# Youngest adult age and oldest typical age (in years) for each race. Generated characters get an age somewhere in between.
+RACE_AGES = {
+  "Dragonborn": (15, 80),
+  "Dwarf": (50, 350),
+  "Elf": (100, 750),
+  "Gnome": (40, 425),
+  "Half-Elf": (20, 180),
+  "Halfling": (20, 150),
+  "Half-Orc": (14, 75),
+  "Human": (18, 90),
+  "Tiefling": (18, 100),
+}
+
+# Syllables that generated names are pieced together from (first part + second part), loosely in the style of each race
+NAME_PARTS = {
+  "Dragonborn": (["Ar", "Bala", "Dona", "Ghe", "Kri", "Medra", "Nala", "Pandj", "Rho", "Sora", "Thava", "Vorl"], ["jhan", "sar", "aar", "esh", "v", "nn", "dar", "ed", "gar", "kan", "rin", "thyn"]),
+  "Dwarf": (["Ad", "Bar", "Bru", "Dain", "Ebe", "Gar", "Har", "Kil", "Mor", "Rur", "Tor", "Vond"], ["rik", "endd", "enor", "in", "rk", "dain", "bek", "dal", "gran", "ik", "bek", "al"]),
+  "Elf": (["Ad", "Ara", "Bei", "Ca", "Enia", "Gal", "Ivel", "Laue", "Mia", "Quar", "Sova", "Thia"], ["ran", "lia", "ro", "rdoc", "lynn", "inndra", "ellar", "cian", "lee", "ion", "nal", "ri"]),
+  "Gnome": (["Al", "Bim", "Car", "Dim", "Ell", "Fonk", "Nis", "Orr", "Roy", "Seeb", "Wren", "Zook"], ["ston", "pos", "lin", "ble", "ywick", "in", "syl", "yn", "wyn", "o", "ellen", "bo"]),
+  "Half-Elf": (["Ara", "Bren", "Cael", "Dar", "Eli", "Fen", "Gwen", "Hal", "Ila", "Ker", "Lia", "Tam"], ["dor", "ric", "wyn", "el", "ana", "ris", "lyn", "an", "ira", "ath", "ne", "sin"]),
+  "Halfling": (["Al", "And", "Cal", "Cor", "Eld", "Gar", "Lid", "Mer", "Pip", "Ros", "Ver", "Wel"], ["ton", "ry", "lie", "rin", "on", "ret", "da", "ric", "pin", "ie", "na", "by"]),
+  "Half-Orc": (["Dench", "Feng", "Gell", "Hen", "Hol", "Imsh", "Kei", "Krus", "Mhur", "Ront", "Shau", "Yev"], ["", "k", "ag", "ga", "ren", "th", "ra", "ku", "rek", "ag", "tha", "elg"]),
+  "Human": (["Ander", "Bran", "Dar", "Eve", "Geth", "Helm", "Jan", "Kath", "Mal", "Nor", "Ros", "Ste"], ["", "a", "vin", "ric", "lyn", "ar", "ne", "ra", "cor", "ton", "ie", "phan"]),
+  "Tiefling": (["Ak", "Am", "Bar", "Dam", "Ek", "Iad", "Kal", "Leu", "Mor", "Nem", "Ori", "Ska"], ["menos", "non", "akas", "akos", "emon", "os", "lista", "cis", "thai", "eia", "anna", "mos"]),
+}
+
+# Which abilities matter most to each class (most important first). Generated characters put their best rolls into these.
+# Any ability not listed gets the leftover rolls in the usual Strength -> Charisma order.
+CLASS_PRIORITIES = {
+  "Barbarian": ["Strength", "Constitution", "Dexterity"],
+  "Bard": ["Charisma", "Dexterity", "Constitution"],
+  "Cleric": ["Wisdom", "Constitution", "Strength"],
+  "Druid": ["Wisdom", "Constitution", "Dexterity"],
+  "Fighter": ["Strength", "Constitution", "Dexterity"],
+  "Monk": ["Dexterity", "Wisdom", "Constitution"],
+  "Paladin": ["Strength", "Charisma", "Constitution"],
+  "Ranger": ["Dexterity", "Wisdom", "Constitution"],
+  "Rogue": ["Dexterity", "Intelligence", "Charisma"],
+  "Sorcerer": ["Charisma", "Constitution", "Dexterity"],
+  "Warlock": ["Charisma", "Constitution", "Dexterity"],
+  "Wizard": ["Intelligence", "Constitution", "Dexterity"],
+}
+
+# Keys a character spec can contain. Anything left out of a spec gets picked at random.
+SPEC_KEYS = ("race", "charClass", "gender", "age", "name", "alignment", "abScores")
+
+# How many characters each bulk generation job makes. Every job has its own random stream, so the characters made for a given
+# seed are the same no matter how many worker processes share the jobs.
+BULK_CHUNK_SIZE = 5000
+
+
+
+def assignScoresByClass(scores, charClass):
+  '''
+  EFFECTS: Returns an ability score dictionary (same shape as assignScores() returns) that puts the highest of the six `scores`
+  into the abilities `charClass` relies on most.
+
+  REQUIRES: scores must contain six integer values and charClass must be one of CLASSES
+
+  HELPS: generateCharacter()
+  '''
+
+  priorities = CLASS_PRIORITIES[charClass]
+  order = priorities + [ability for ability in ABILITIES if ability not in priorities]
+  best = sorted((int(score) for score in scores), reverse=True)
+
+  assigned = dict(zip(order, best))
+  return {ability : assigned[ability] for ability in ABILITIES} # keep the usual Strength -> Charisma key order
+
+
+def randomName(race, rng):
+  '''
+  EFFECTS: Returns a made up name in the style of `race`.
+
+  HELPS: generateCharacter()
+  '''
+
+  firstParts, secondParts = NAME_PARTS[race]
+  return rng.choice(firstParts) + rng.choice(secondParts)
+
+
+def uniqueName(name, takenNames):
+  '''
+  EFFECTS: Returns `name` if no character in `takenNames` already uses it. Otherwise returns the name with a number on the end
+  (i.e. 'Thia 2', 'Thia 3', ...) so that it is unique, just like the character store requires.
+
+  HELPS: generateCharacter(), DNP_Generator bulk generation
+  '''
+
+  if name not in takenNames:
+    return name
+
+  number = 2
+  while True:
+    suffix = f" {number}"
+    candidate = name[:MAX_NAME_LENGTH - len(suffix)] + suffix
+    if candidate not in takenNames:
+      return candidate
+    number += 1
+
+
+def checkSpec(spec):
+  '''
+  EFFECTS: Raises a ValueError if the character spec has a key or value that character creation would not allow.
+
+  HELPS: generateCharacter(), generateCharacters()
+  '''
+
+  for key in spec:
+    if key not in SPEC_KEYS:
+      raise ValueError(f"'{key}' is not a character spec option. Options are: {', '.join(SPEC_KEYS)}")
+
+  for key, options in (("race", RACES), ("charClass", CLASSES), ("gender", GENDERS), ("alignment", ALIGNMENTS)):
+    if key in spec and spec[key] not in options:
+      raise ValueError(f"'{spec[key]}' is not a valid {key}. Options are: {', '.join(options)}")
+
+  if "name" in spec and (spec["name"] == '' or len(spec["name"]) > MAX_NAME_LENGTH):
+    raise ValueError(f"name must be between 1 and {MAX_NAME_LENGTH} letters")
+
+
+def generateCharacter(spec=None, rng=None, scores=None, takenNames=None):
+  '''
+  EFFECTS: Returns a fully filled out Character. Anything given in `spec` (a dictionary using the SPEC_KEYS keys, e.g. {"race": "Elf"})
+  is used as is, everything else is picked at random.
+
+  REQUIRES: rng (optional) is a random.Random. scores (optional) is six rolled ability score values to use instead of rolling new ones.
+  takenNames (optional) is a set of names already in use; the new name is added to it.
+
+  IMPLEMENTATION SKETCH:
+    - Pick race, class, gender and alignment from the spec or at random
+    - Roll six ability scores (unless given) and assign the best rolls to the abilities the class needs most
+    - Pick an age in the race's usual range and a race-styled name, making sure the name is unique
+    - Build and return the Character object
+  '''
+
+  spec = spec or {}
+  scoreRng = rng # the scores come from the caller's generator too, so a seeded character comes out the same every time (None: the dice engine's own)
+  rng = rng or random
+  checkSpec(spec)
+
+  race = spec.get("race") or rng.choice(RACES)
+  charClass = spec.get("charClass") or rng.choice(CLASSES)
+  gender = spec.get("gender") or rng.choice(GENDERS)
+
+  if "abScores" in spec:
+    abScores = dict(spec["abScores"])
+  else:
+    if scores is None:
+      scores = rollScoreBatch(1, scoreRng)[0]
+    abScores = assignScoresByClass(scores, charClass)
+
+  youngest, oldest = RACE_AGES[race]
+  age = str(spec.get("age") or rng.randint(youngest, oldest)) # ages are kept as strings, same as ageAssignment()
+
+  name = spec.get("name") or randomName(race, rng)
+  if takenNames is not None:
+    name = uniqueName(name, takenNames)
+    takenNames.add(name)
+
+  newChar = Character(race, charClass, name, age, gender, abScores)
+  newChar.alignment = spec.get("alignment") or rng.choice(ALIGNMENTS)
+  return newChar
+
+
+def generateCharacters(count, spec=None, seed=None, takenNames=None):
+  '''
+  EFFECTS: Returns a list of `count` generated characters (see generateCharacter()). Giving the same seed gives the same characters.
+  Every ability score for the whole list is rolled in one rollScoreBatch() call, from a child seed of `seed` of its own (see spawnSeeds()),
+  so the scores are independent of the race, class and name picks.
+
+  REQUIRES: count must be a non-negative integer
+  '''
+
+  spec = spec or {}
+  checkSpec(spec)
+
+  choiceSeed, scoreSeed = spawnSeeds(seed, 2) # seeding both generators with `seed` itself would give them the very same stream without NumPy
+  rng = random.Random(choiceSeed)
+  takenNames = set() if takenNames is None else takenNames
+  scoreRows = rollScoreBatch(count, makeRng(scoreSeed))
+
+  return [generateCharacter(spec, rng, scoreRows[row], takenNames) for row in range(count)]
+
+
+def _generateChunk(job):
+  '''
+  EFFECTS: Makes one chunk of bulk generated characters. `job` is a (count, spec, seed) tuple.
+  This runs inside a worker process, so it must stay a plain top level function (worker processes can only be handed those).
+
+  HELPS: bulkGenerate()
+  '''
+
+  count, spec, seed = job
+  return generateCharacters(count, spec, seed)
+
+
+def bulkGenerate(count, spec=None, seed=None, workers=None, save=True, chunkSize=BULK_CHUNK_SIZE):
+  '''
+  EFFECTS: Makes `count` characters spread over `workers` processes (one per CPU core when workers is None) and returns how many were made.
+  When `save` is True the characters are saved to the character store one chunk (one transaction) at a time as the workers finish them.
+  The same seed gives the same characters no matter how many workers are used.
+
+  REQUIRES: count must be a non-negative integer and chunkSize a positive integer
+
+  MODIFIES: Permanent character store (when save is True)
+
+  IMPLEMENTATION SKETCH:
+    - Split the work into chunks of chunkSize characters, each chunk getting its own independent child seed (see spawnSeeds() in DNP_Dice.py)
+    - Hand the chunks out to a ProcessPoolExecutor (or just run them here when there is only one worker)
+    - As chunks come back (in order), rename any characters whose name is already taken and save the chunk in one go
+  '''
+
+  spec = spec or {}
+  checkSpec(spec) # fail here instead of in every worker
+
+  if workers is None:
+    workers = os.cpu_count() or 1
+
+  sizes = [min(chunkSize, count - start) for start in range(0, count, chunkSize)]
+  jobs = list(zip(sizes, [spec]*len(sizes), spawnSeeds(seed, len(sizes))))
+
+  charStore = openCharacterStore() if save else None
+  takenNames = set(charStore.names()) if save else set()
+  made = 0
+
+  try:
+    if workers > 1 and len(jobs) > 1:
+      executor = ProcessPoolExecutor(max_workers=workers)
+      chunks = executor.map(_generateChunk, jobs)
+    else:
+      executor = None
+      chunks = map(_generateChunk, jobs)
+
+    for chunk in chunks:
+      # Each worker only knows about the names in its own chunk, so clashes between chunks (or with saved characters) get sorted out here
+      for newChar in chunk:
+        newChar.name = uniqueName(newChar.name, takenNames)
+        takenNames.add(newChar.name)
+      if save:
+        charStore.saveMany(chunk) # the whole chunk is saved in one transaction
+      made += len(chunk)
+  finally:
+    if executor is not None:
+      executor.shutdown()
+    if save:
+      charStore.close()
+
+  return made
+
+
+def saveCharacters(characters):
+  '''
+  EFFECTS: Saves every character in `characters` to the permanent character store in a single transaction.
+
+  MODIFIES: Permanent character store
+  '''
+
+  charStore = openCharacterStore()
+  try:
+    charStore.saveMany(characters)
+  finally:
+    charStore.close()
+
+
+def cli(argv=None):
+  '''
+  EFFECTS: Command line entry point. Generates characters and saves them to the character store (run 'python DNP_Generator.py --help' for options).
+  '''
+
+  parser = argparse.ArgumentParser(description="Make Dungeons & Pythons characters without any prompts and save them to the character store.")
+  parser.add_argument("count", type=int, help="how many characters to make")
+  parser.add_argument("--seed", type=int, default=None, help="random seed (the same seed makes the same characters)")
+  parser.add_argument("--race", choices=RACES)
+  parser.add_argument("--class", dest="charClass", choices=CLASSES)
+  parser.add_argument("--gender", choices=GENDERS)
+  parser.add_argument("--alignment", choices=ALIGNMENTS)
+  parser.add_argument("--dry-run", action="store_true", help="make the characters but do not save them")
+  parser.add_argument("--workers", type=int, default=1, help="worker processes to spread the work over (0 = one per CPU core)")
+  args = parser.parse_args(argv)
+
+  spec = {key: getattr(args, key) for key in ("race", "charClass", "gender", "alignment") if getattr(args, key)}
+
+  start = time.perf_counter()
+
+  # Every worker count goes through bulkGenerate() (one worker runs right here), so the chunks and their seeds, and with them the
+  # characters made from a --seed, are the same however many workers there are
+  made = bulkGenerate(args.count, spec, args.seed, args.workers or None, save=not args.dry_run)
+
+  elapsed = time.perf_counter() - start
+  rate = made / elapsed if elapsed > 0 else float("inf")
+  print(f"Made {made} characters in {elapsed:.2f}s ({rate:.0f} characters per second)" + (" (not saved)" if args.dry_run else ""))
+
+
+if __name__ == "__main__":
+  cli()
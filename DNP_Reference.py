@@ -0,0 +1,266 @@
+# Code author: Patrick Woolard
+# Email: Jwoolard@augusta.edu
+# Github: https://github.com/JwoolardAU/DungeonsNPythons
+
+
+'''
+Race and class reference index for Dungeons & Pythons.
+
+Character creation used to scrape a race's lifespan off the internet every time (with a CSS selector that had to know which list on
+each race's page held it), and asking about a race or class only opened a web browser. The reference index is a small JSON file shipped
+with the app ('DNP_Reference.json', next to this file) that already holds, for every race and class the app offers:
+
+  - races:    a summary, the lifespan text, and the racial traits (ability score increase, size, speed, ...)
+  - classes:  a summary, the hit die, the primary ability and the saving throws
+
+It is only read the first time something is looked up (about 13 KB, so well under a millisecond), after that every lookup is one
+dictionary read, and it never needs the internet. The index carries a version (INDEX_VERSION): an index from a different version of
+the app is ignored, and everything falls back on scraping as before.
+
+Building the index (a one-off step, run again when the reference pages change):
+    python DNP_Reference.py --build [--offline]    scrapes every race and class page (through the web cache, see DNP_WebCache.py)
+    python DNP_Reference.py --warm                 only caches every race and class page (all of them downloaded at the same time)
+    python DNP_Reference.py Elf                    prints what the index has on a race or class
+Both --build and --warm take '--base <url>' to use another copy of the reference website (i.e. a local one for testing).
+'''
+
+
+import json # the index file
+import os # where the index file lives
+import re # picking hit dice and saving throws out of class pages
+import sys # command line arguments
+import time # when the index was built
+
+
+# Where the index lives (next to the app's code, it ships with it)
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'DNP_Reference.json')
+
+# Bumped whenever the index layout changes. An index with another version is ignored (see loadIndex())
+INDEX_VERSION = 1
+
+# Where the index is built from: every race and class has a page at REFERENCE_URL + its name in lower case (i.e. .../half-elf)
+REFERENCE_URL = 'http://dnd5e.wikidot.com/'
+
+# The index as loaded by loadIndex() (None until the first lookup)
+_index = None
+
+
+
+def loadIndex(path=INDEX_PATH):
+  '''
+  EFFECTS: Returns the reference index (read from `path` the first time, kept in memory after that). Returns an empty index if the file
+  is missing, broken, or from another INDEX_VERSION, so every lookup just finds nothing.
+  '''
+
+  global _index
+  if _index is None:
+    try:
+      with open(path, 'r', encoding='utf-8') as file:
+        index = json.load(file)
+      if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        raise ValueError(f"reference index version {index.get('version') if isinstance(index, dict) else None}")
+    except (OSError, ValueError):
+      index = {"version": INDEX_VERSION, "races": {}, "classes": {}}
+    _index = index
+  return _index
+
+
+def raceInfo(race):
+  '''
+  EFFECTS: Returns the index entry for `race` ({"summary", "lifespan", "traits": {name: text}}), or None if the index does not have it.
+  '''
+
+  return loadIndex()["races"].get(race)
+
+
+def classInfo(charClass):
+  '''
+  EFFECTS: Returns the index entry for `charClass` ({"summary", "hitDie", "primaryAbility", "savingThrows"}), or None if the index does not have it.
+  '''
+
+  return loadIndex()["classes"].get(charClass)
+
+
+def lifespan(race):
+  '''
+  EFFECTS: Returns the text about how long characters of `race` live, or None if the index does not have it.
+  '''
+
+  info = raceInfo(race)
+  return info.get("lifespan") if info is not None else None
+
+
+
+def pageTraits(page):
+  '''
+  EFFECTS: Returns {name: text} for every list item on the reference page `page` (as extracted by DNP_Extract.extractPage()) that starts
+  with a bold or italic name ("<li><strong>Age.</strong> Humans reach adulthood...</li>"), the first one of each name (the race's own
+  trait comes before any subrace's). This finds a trait by its name wherever it is on the page, instead of by which list it is in.
+
+  HELPS: buildIndex(), DNP_Engine.raceLifespan()
+  '''
+
+  traits = {}
+  for name, text in page["items"]:
+    if name and text and name not in traits:
+      traits[name] = text
+  return traits
+
+
+def pageSummary(page):
+  '''
+  EFFECTS: Returns the first paragraph of the reference page `page` (as extracted by DNP_Extract.extractPage()) that reads like a sentence
+  (at least 60 characters), or "".
+
+  HELPS: buildIndex()
+  '''
+
+  for text in page["paragraphs"]:
+    if len(text) >= 60:
+      return text
+  return ""
+
+
+def referenceUrls(races=None, classes=None, baseUrl=REFERENCE_URL):
+  '''
+  EFFECTS: Returns {name: url} of the reference page of every race in `races` and class in `classes` (all of the app's by default), races first.
+  '''
+
+  import DNP_Engine # imported here because DNP_Engine itself imports this module
+
+  races = DNP_Engine.RACES if races is None else races
+  classes = DNP_Engine.CLASSES if classes is None else classes
+  return {name: baseUrl + name.lower() for name in list(races) + list(classes)} # i.e. http://dnd5e.wikidot.com/half-elf
+
+
+def warmPages(webCache, races=None, classes=None, baseUrl=REFERENCE_URL, workers=None):
+  '''
+  EFFECTS: Caches the reference page of every race in `races` and class in `classes` (all of the app's by default) in the WebCache
+  `webCache`, downloading up to `workers` at the same time (see DNP_WebCache.WebCache.warm()). Returns {name: None if its page is cached,
+  or the exception that stopped it}.
+
+  MODIFIES: webCache
+  '''
+
+  urls = referenceUrls(races, classes, baseUrl)
+  options = {} if workers is None else {"workers": workers}
+  failures = webCache.warm(urls.values(), **options)
+  return {name: failures[url] for name, url in urls.items()}
+
+
+def buildIndex(webCache, races=None, classes=None, baseUrl=REFERENCE_URL):
+  '''
+  EFFECTS: Scrapes the reference page of every race in `races` and class in `classes` (all of the app's by default) through the WebCache
+  `webCache` and returns the index. A page that can not be obtained is left out (and its name listed in the index's "missing").
+
+  IMPLEMENTATION SKETCH:
+    - Cache every page first, all of them downloading at the same time (see warmPages())
+    - For each race page: the summary, every named trait (pageTraits()), and the "Age" trait as the lifespan
+    - For each class page: the summary, and the hit die, primary ability and saving throws picked out of the page's text
+  '''
+
+  import DNP_Engine # imported here because DNP_Engine itself imports this module
+  from DNP_Extract import extractPage # (and the HTML parser with it) only the build step parses pages
+
+  races = DNP_Engine.RACES if races is None else races
+  classes = DNP_Engine.CLASSES if classes is None else classes
+  index = {"version": INDEX_VERSION, "source": baseUrl, "built": time.strftime("%Y-%m-%d"), "races": {}, "classes": {}, "missing": []}
+  failures = warmPages(webCache, races, classes, baseUrl)
+
+  for race in races:
+    try:
+      if failures[race] is not None: # (already tried again as many times as it is worth)
+        raise failures[race]
+      page = extractPage(webCache.get(baseUrl + race.lower()))
+    except Exception as error: # one missing page should not stop the rest of the build
+      print(f"Could not obtain the {race} page: {error}")
+      index["missing"].append(race)
+      continue
+    traits = pageTraits(page)
+    index["races"][race] = {"summary": pageSummary(page), "lifespan": traits.pop("Age", None), "traits": traits}
+
+  for charClass in classes:
+    try:
+      if failures[charClass] is not None:
+        raise failures[charClass]
+      page = extractPage(webCache.get(baseUrl + charClass.lower()))
+    except Exception as error:
+      print(f"Could not obtain the {charClass} page: {error}")
+      index["missing"].append(charClass)
+      continue
+    text = page["text"]
+    hitDie = re.search(r"Hit Dice:?\s*1(d\d+)", text)
+    primary = re.search(r"Primary Ability:?\s*(.+?)(?:\s{2,}|\.|$)", text)
+    saves = re.search(r"Saving Throws:?\s*([A-Za-z, ]+?)(?=\s+Skills|\s*$)", text)
+    index["classes"][charClass] = {"summary": pageSummary(page), "hitDie": hitDie.group(1) if hitDie else None,
+                                   "primaryAbility": primary.group(1).strip() if primary else None,
+                                   "savingThrows": saves.group(1).strip() if saves else None}
+
+  return index
+
+
+def saveIndex(index, path=INDEX_PATH):
+  '''
+  EFFECTS: Writes `index` to `path` (whole, or not at all if writing fails part way) and makes the next lookup read it.
+  '''
+
+  global _index
+  temporary = path + ".tmp"
+  with open(temporary, 'w', encoding='utf-8', newline='\n') as file:
+    json.dump(index, file, indent=1, ensure_ascii=False)
+    file.write("\n")
+  os.replace(temporary, path)
+  _index = None
+
+
+def describe(name):
+  '''
+  EFFECTS: Returns the lines of text describing the race or class `name` from the index ([] if the index does not have it).
+
+  HELPS: DungeonsNPythons.pickRace(), DungeonsNPythons.pickClass(), running this file
+  '''
+
+  race, charClass = raceInfo(name), classInfo(name)
+  lines = []
+  if race is not None:
+    lines.append(race["summary"])
+    if race.get("lifespan"):
+      lines.append(f"  - Age: {race['lifespan']}")
+    lines += [f"  - {trait}: {text}" for trait, text in race["traits"].items()]
+  elif charClass is not None:
+    lines.append(charClass["summary"])
+    for label, key in (("Hit Die", "hitDie"), ("Primary Ability", "primaryAbility"), ("Saving Throws", "savingThrows")):
+      if charClass.get(key):
+        lines.append(f"  - {label}: {charClass[key]}")
+  return lines
+
+
+
+if __name__ == "__main__":
+  arguments = sys.argv[1:]
+  baseUrl = arguments[arguments.index("--base") + 1] if "--base" in arguments[:-1] else REFERENCE_URL
+  baseUrl = baseUrl if baseUrl.endswith("/") else baseUrl + "/"
+  if arguments and arguments[0] == "--build":
+    from DNP_WebCache import WebCache
+    with WebCache(offline="--offline" in arguments) as webCache:
+      built = buildIndex(webCache, baseUrl=baseUrl)
+    saveIndex(built)
+    print(f"Saved {len(built['races'])} races and {len(built['classes'])} classes to {INDEX_PATH}" +
+          (f" ({', '.join(built['missing'])} could not be obtained)" if built["missing"] else ""))
+  elif arguments and arguments[0] == "--warm":
+    from DNP_WebCache import WebCache
+    start = time.perf_counter()
+    with WebCache() as webCache:
+      failures = warmPages(webCache, baseUrl=baseUrl)
+      stats = webCache.stats
+    for name, error in failures.items():
+      if error is not None:
+        print(f"Could not obtain the {name} page: {error}")
+    print(f"Cached {sum(error is None for error in failures.values())} of {len(failures)} reference pages in {time.perf_counter() - start:.2f}s "
+          f"({stats['downloaded']} downloaded, {stats['revalidated']} checked and unchanged)")
+  elif arguments:
+    for line in describe(" ".join(arguments)) or [f"The reference index has nothing on '{' '.join(arguments)}'."]:
+      print(line)
+  else:
+    print("Usage: python DNP_Reference.py --build [--offline] [--base <url>]   |   python DNP_Reference.py --warm [--base <url>]   |   "
+          "python DNP_Reference.py <race or class>")
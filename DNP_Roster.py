@@ -0,0 +1,488 @@
+# Code author: Patrick Woolard
+# Email: Jwoolard@augusta.edu
+# Github: https://github.com/JwoolardAU/DungeonsNPythons
+
+
+'''
+Roster analytics for Dungeons & Pythons.
+
+Questions about a whole roster ("average Strength of all Fighters", "level distribution by race") used to mean loading every
+character and walking its abScores one at a time. A Roster keeps just the numbers those questions need, one column per field:
+
+  - race and charClass as small codes (their position in RACES / CLASSES)
+  - level and gold as numbers (a level of 0 means it has not been set yet)
+  - the six ability scores as one (N, 6) block, in ABILITIES order
+
+With NumPy installed every column is an array and filter(), groupBy() and crossTab() each run as a handful of vectorized calls.
+Without NumPy the same answers come from plain Python loops (just slower).
+
+From python:
+
+    from DNP_Roster import Roster
+    roster = Roster.fromStore(charStore)             # stays up to date as characters are saved or deleted in charStore
+    roster.groupBy("charClass", "Strength")          # {"Barbarian": 14.2, "Bard": 10.1, ...}
+    roster.crossTab("race", "level")                 # {"Dwarf": {1: 12, 2: 7, ...}, ...}
+    roster.names(roster.filter(race="Elf", minLevel=5))
+
+From the shell (prints a short report about every saved character):
+
+    python DNP_Roster.py
+'''
+
+
+from array import array # compact columns when NumPy is not installed
+
+try: # NumPy is optional. If it is missing we fall back to plain Python loops
+  import numpy as np
+except ImportError:
+  np = None
+
+from DNP_Engine import RACES, CLASSES, ABILITIES, NOT_SET
+
+
+# The categorical columns and the labels their codes stand for
+LABELS = {"race": RACES, "charClass": CLASSES, "level": list(range(21))}
+
+# The numeric columns that can be aggregated (the six abilities plus level and gold)
+VALUES = ABILITIES + ["level", "gold"]
+
+# What each column holds for a character that has not had it set yet (gold always has a value)
+MISSING = dict({"race": NOT_SET, "charClass": NOT_SET, "level": 0, "gold": None}, **{ability: NOT_SET for ability in ABILITIES})
+
+# The biggest level and gold the level ("B") and gold ("Q") columns hold. Anything outside 0 - these (a level or gold that only a broken
+# database or a bad share could hold) is stored as the nearest value they can hold, so one bad character can not break the whole roster
+MAX_LEVEL = LABELS["level"][-1]
+MAX_GOLD = 2**64 - 1
+
+# How groupBy() can combine the values in each group
+AGGREGATES = ("count", "sum", "mean", "min", "max")
+
+# Rows the columns start out with room for (they double in size whenever they fill up)
+START_CAPACITY = 64
+
+
+
+# The race and charClass labels turned around: label -> code (see _code())
+_CODES = {key: {label: code for code, label in enumerate(LABELS[key])} for key in ("race", "charClass")}
+
+
+def _code(key, value):
+  '''
+  EFFECTS: Returns the code of `value` in the `key` column ("race" or "charClass"), or NOT_SET if it is not one of the options (i.e. a race that was never picked).
+
+  HELPS: Roster
+  '''
+
+  return _CODES[key].get(value, NOT_SET)
+
+
+def _levelNumber(level):
+  '''
+  EFFECTS: Returns a level (text like "5", an int, or None / "Not yet set...") as a number that fits the level column (0 - MAX_LEVEL),
+  0 meaning it has not been set yet.
+
+  HELPS: Roster.fromStore(), Roster.update(), Roster._put()
+  '''
+
+  try:
+    return min(max(int(level), 0), MAX_LEVEL)
+  except (TypeError, ValueError, OverflowError):
+    return 0
+
+
+def _goldNumber(gold):
+  '''
+  EFFECTS: Returns an amount of gold as a number that fits the gold column (0 - MAX_GOLD). Gold that is not a number at all counts as 0.
+
+  HELPS: Roster.fromStore(), Roster.update(), Roster._put()
+  '''
+
+  try:
+    return min(max(int(gold), 0), MAX_GOLD)
+  except (TypeError, ValueError, OverflowError):
+    return 0
+
+
+
+class Roster:
+  '''
+  Column-by-column copy of the numbers in a set of characters, made for fast reports over the whole roster.
+  Rows are added and replaced with update() and removed with remove(); a roster made with Roster.fromStore() does that by itself
+  every time a character is saved or deleted in the store.
+  '''
+
+  def __init__(self, capacity=START_CAPACITY):
+    '''
+    EFFECTS: Makes an empty roster with room for `capacity` characters before its columns have to grow.
+    '''
+
+    self._names = [] # row -> character name
+    self._rows = {} # character name -> row
+    self._allocate(max(1, capacity))
+
+
+  def _allocate(self, capacity):
+    '''
+    EFFECTS: Makes (or grows) every column to hold `capacity` rows, keeping the rows already there.
+
+    HELPS: __init__(), _extend(), _put()
+    '''
+
+    count = len(self._names)
+    if np is not None:
+      columns = {
+        "race": np.full(capacity, NOT_SET, dtype=np.uint8),
+        "charClass": np.full(capacity, NOT_SET, dtype=np.uint8),
+        "level": np.zeros(capacity, dtype=np.uint8),
+        "gold": np.zeros(capacity, dtype=np.uint64), # gold can go up to 9999999999999999999, which only fits unsigned
+        "scores": np.full((capacity, len(ABILITIES)), NOT_SET, dtype=np.uint8),
+      }
+      if count:
+        for column, values in columns.items():
+          values[:count] = self._columns[column][:count]
+    else:
+      # Plain arrays grow by themselves, capacity only matters for NumPy
+      columns = self._columns if count else {
+        "race": array("B"), "charClass": array("B"), "level": array("B"), "gold": array("Q"), "scores": array("B"),
+      }
+    self._columns = columns
+    self._capacity = capacity
+
+
+  def __len__(self):
+    return len(self._names)
+
+  def __contains__(self, name):
+    return name in self._rows
+
+
+  @classmethod
+  def fromStore(cls, store, follow=True):
+    '''
+    EFFECTS: Returns a Roster of every character in the character store `store`. Only the small summary columns are read, no character gets built.
+    With follow=True the roster listens to the store and updates itself whenever a character is saved or deleted (see CharacterStore.listen()).
+    '''
+
+    rows = store.rosterRows(ABILITIES)
+    roster = cls(len(rows))
+
+    # Work out every column in plain lists first, then hand each one over in one go (much faster than filling in one row at a time)
+    raceCodes, classCodes = _CODES["race"], _CODES["charClass"]
+    roster._extend(
+      [row[0] for row in rows],
+      [raceCodes.get(row[1], NOT_SET) for row in rows],
+      [classCodes.get(row[2], NOT_SET) for row in rows],
+      [_levelNumber(row[3]) for row in rows], # the store keeps a level that was never set as NULL
+      [_goldNumber(row[4]) for row in rows],
+      [NOT_SET if score is None else int(score) for row in rows for score in row[5:]])
+
+    if follow:
+      store.listen(roster.characterChanged)
+    return roster
+
+
+  def characterChanged(self, name, character):
+    '''
+    EFFECTS: Store listener (see fromStore()): `character` was just saved under `name`, or deleted if character is None.
+    '''
+
+    if character is None:
+      self.remove(name)
+    else:
+      self.update(character)
+
+
+  def update(self, character):
+    '''
+    EFFECTS: Adds `character` to the roster, or replaces its row if a character with the same name is already in it.
+    '''
+
+    abScores = character.abScores or {}
+    self._put(character.name, character.race, character.charClass, character.level, character.gold,
+      [abScores.get(ability) for ability in ABILITIES])
+
+
+  def _extend(self, names, races, charClasses, levels, golds, scores):
+    '''
+    EFFECTS: Adds a new row for every name in `names` with the matching codes and numbers from the other lists (scores holds six per name, in ABILITIES order).
+
+    REQUIRES: None of the names may be in the roster already.
+
+    HELPS: fromStore()
+    '''
+
+    start = len(self._names)
+    end = start + len(names)
+    self._names.extend(names)
+    self._rows.update((name, row) for row, name in enumerate(names, start))
+
+    if np is not None:
+      if end > self._capacity:
+        self._allocate(max(end, self._capacity * 2))
+      columns = self._columns
+      columns["race"][start:end] = races
+      columns["charClass"][start:end] = charClasses
+      columns["level"][start:end] = levels
+      columns["gold"][start:end] = np.array(golds, dtype=np.uint64)
+      columns["scores"][start:end] = np.array(scores, dtype=np.uint8).reshape(-1, len(ABILITIES))
+      return
+
+    for column, values in (("race", races), ("charClass", charClasses), ("level", levels), ("gold", golds), ("scores", scores)):
+      self._columns[column].extend(values)
+
+
+  def _put(self, name, race, charClass, level, gold, scores):
+    '''
+    EFFECTS: Writes one character's numbers into its row (a new row at the end for a new name). A level or gold the columns can not hold
+    is stored as the nearest value they can (see MAX_LEVEL).
+
+    HELPS: update()
+    '''
+
+    level, gold = _levelNumber(level), _goldNumber(gold)
+    scores = [NOT_SET if score is None else int(score) for score in scores]
+    row = self._rows.get(name)
+
+    if row is None: # new character: add a row at the end
+      row = len(self._names)
+      if np is not None and row == self._capacity:
+        self._allocate(self._capacity * 2)
+      self._names.append(name)
+      self._rows[name] = row
+      if np is None:
+        for column, value in (("race", NOT_SET), ("charClass", NOT_SET), ("level", 0), ("gold", 0)):
+          self._columns[column].append(value)
+        self._columns["scores"].extend(scores)
+
+    columns = self._columns
+    columns["race"][row] = _code("race", race)
+    columns["charClass"][row] = _code("charClass", charClass)
+    columns["level"][row] = level
+    columns["gold"][row] = gold
+    if np is not None:
+      columns["scores"][row] = scores
+    else:
+      start = row * len(ABILITIES)
+      columns["scores"][start:start+len(ABILITIES)] = array("B", scores)
+
+
+  def remove(self, name):
+    '''
+    EFFECTS: Removes the character called `name` from the roster (nothing happens if it is not in it).
+
+    IMPLEMENTATION SKETCH:
+      - Move the last row into the removed character's row, so the columns never have holes in them
+      - Shrink the roster by one row
+    '''
+
+    row = self._rows.pop(name, None)
+    if row is None:
+      return
+
+    last = len(self._names) - 1
+    columns = self._columns
+    if row != last:
+      lastName = self._names[last]
+      self._names[row] = lastName
+      self._rows[lastName] = row
+      for column in ("race", "charClass", "level", "gold"):
+        columns[column][row] = columns[column][last]
+      if np is not None:
+        columns["scores"][row] = columns["scores"][last]
+      else:
+        width = len(ABILITIES)
+        columns["scores"][row*width:(row+1)*width] = columns["scores"][last*width:(last+1)*width]
+
+    self._names.pop()
+    if np is None:
+      for column in ("race", "charClass", "level", "gold"):
+        columns[column].pop()
+      del columns["scores"][last*len(ABILITIES):]
+
+
+  def column(self, value):
+    '''
+    EFFECTS: Returns one column for every character in the roster: "race", "charClass", "level", "gold" or an ability name (i.e. "Strength").
+    race and charClass come back as codes (positions in RACES / CLASSES). An ability score that was never assigned is NOT_SET and a level
+    that was never set is 0. With NumPy this is an array view (no copy), otherwise a list.
+    '''
+
+    count = len(self._names)
+    if value in ABILITIES:
+      index = ABILITIES.index(value)
+      if np is not None:
+        return self._columns["scores"][:count, index]
+      return list(self._columns["scores"][index::len(ABILITIES)])
+    if value not in self._columns or value == "scores":
+      raise ValueError(f"'{value}' is not a roster column. Columns are: race, charClass, {', '.join(VALUES)}")
+    if np is not None:
+      return self._columns[value][:count]
+    return list(self._columns[value])
+
+
+  def filter(self, race=None, charClass=None, minLevel=None, maxLevel=None):
+    '''
+    EFFECTS: Returns a mask (one True/False per roster row) of the characters matching every filter given, i.e. roster.filter(race="Elf", minLevel=5).
+    Masks can be combined with & and | (NumPy) and handed to names(), groupBy() and crossTab(). Without NumPy the mask is a list of bools.
+    A level filter leaves out characters whose level has not been set.
+    '''
+
+    tests = [] # (column, lowest allowed value, highest allowed value)
+    if race is not None:
+      code = _code("race", race)
+      tests.append((self.column("race"), code, code))
+    if charClass is not None:
+      code = _code("charClass", charClass)
+      tests.append((self.column("charClass"), code, code))
+    if minLevel is not None or maxLevel is not None:
+      tests.append((self.column("level"), max(1, minLevel or 1), 20 if maxLevel is None else maxLevel))
+
+    if np is not None:
+      mask = np.ones(len(self), dtype=bool)
+      for values, low, high in tests:
+        mask &= (values >= low) & (values <= high)
+      return mask
+
+    mask = [True] * len(self)
+    for values, low, high in tests:
+      mask = [keep and low <= value <= high for keep, value in zip(mask, values)]
+    return mask
+
+
+  def names(self, mask=None):
+    '''
+    EFFECTS: Returns the names of the characters selected by `mask` (see filter()), or of every character when no mask is given.
+    '''
+
+    if mask is None:
+      return list(self._names)
+    if np is not None:
+      return [self._names[row] for row in np.flatnonzero(mask)]
+    return [name for name, keep in zip(self._names, mask) if keep]
+
+
+  def _select(self, columns, mask):
+    '''
+    EFFECTS: Returns a list with each of the named columns, keeping only the rows that are in `mask` (every row when mask is None)
+    and that have every one of those columns set (see MISSING).
+
+    HELPS: groupBy(), crossTab()
+    '''
+
+    data = [self.column(column) for column in columns]
+    missing = [MISSING[column] for column in columns]
+
+    if np is not None:
+      keep = np.ones(len(self), dtype=bool) if mask is None else np.array(mask, dtype=bool)
+      for values, unset in zip(data, missing):
+        if unset is not None:
+          keep &= values != unset
+      return [values[keep] for values in data]
+
+    rows = [row for row in range(len(self)) if (mask is None or mask[row])
+      and all(unset is None or values[row] != unset for values, unset in zip(data, missing))]
+    return [[values[row] for row in rows] for values in data]
+
+
+  def groupBy(self, key, value=None, aggregate="mean", mask=None):
+    '''
+    EFFECTS: Groups the characters by `key` ("race", "charClass" or "level") and combines `value` (an ability name, "level" or "gold") in each
+    group with `aggregate` (one of AGGREGATES). Returns {group label: result} for every group that has at least one character, i.e.
+    roster.groupBy("charClass", "Strength") is the average Strength of each class. With no value it counts the characters in each group.
+    Characters whose key or value has not been set yet are left out. `mask` (see filter()) limits which characters are looked at.
+    count, min and max give whole numbers; sum and mean give floats.
+
+    IMPLEMENTATION SKETCH (NumPy):
+      - Keep the rows where both the key and value are set (and that are in the mask)
+      - count and sum are np.bincount over the group codes (sums weighted by the values), mean is one divided by the other
+      - min and max start every group at the largest / smallest possible value and fold the values in with np.minimum.at / np.maximum.at
+    '''
+
+    if key not in LABELS:
+      raise ValueError(f"Can only group by one of: {', '.join(LABELS)}")
+    if value is None: # counting characters: gold is always set, so counting gold counts every character that has the key set
+      value, aggregate = "gold", "count"
+    if value not in VALUES:
+      raise ValueError(f"'{value}' is not a value that can be aggregated. Values are: {', '.join(VALUES)}")
+    if aggregate not in AGGREGATES:
+      raise ValueError(f"'{aggregate}' is not an aggregate. Aggregates are: {', '.join(AGGREGATES)}")
+
+    keys, values = self._select([key, value], mask)
+    labels = LABELS[key]
+
+    if np is not None:
+      size = len(labels)
+      counts = np.bincount(keys, minlength=size)
+      if aggregate == "count":
+        results = counts
+      elif aggregate in ("sum", "mean"):
+        results = np.bincount(keys, weights=values.astype(np.float64), minlength=size)
+        if aggregate == "mean":
+          results = results / np.maximum(counts, 1)
+      else:
+        fold = np.minimum if aggregate == "min" else np.maximum
+        results = np.full(size, np.iinfo(values.dtype).max if aggregate == "min" else 0, dtype=values.dtype)
+        fold.at(results, keys, values)
+      return {labels[code]: results[code].item() for code in np.flatnonzero(counts)}
+
+    groups = {}
+    for code, number in zip(keys, values):
+      groups.setdefault(code, []).append(number)
+    combine = {"count": len, "sum": lambda numbers: float(sum(numbers)), "mean": lambda numbers: sum(numbers) / len(numbers), "min": min, "max": max}[aggregate]
+    return {labels[code]: combine(groups[code]) for code in sorted(groups)}
+
+
+  def crossTab(self, rowKey, columnKey, mask=None):
+    '''
+    EFFECTS: Counts characters by two keys at once and returns {row label: {column label: count}}, leaving out empty cells,
+    i.e. roster.crossTab("race", "level") is the level distribution of each race. Characters missing either key are left out.
+    '''
+
+    for key in (rowKey, columnKey):
+      if key not in LABELS:
+        raise ValueError(f"Can only group by one of: {', '.join(LABELS)}")
+
+    rowCodes, columnCodes = self._select([rowKey, columnKey], mask)
+    rowLabels, columnLabels = LABELS[rowKey], LABELS[columnKey]
+    table = {}
+
+    if np is not None:
+      width = len(columnLabels)
+      counts = np.bincount(rowCodes.astype(np.int64) * width + columnCodes, minlength=len(rowLabels) * width).reshape(len(rowLabels), width)
+      for rowCode in np.flatnonzero(counts.sum(axis=1)):
+        table[rowLabels[rowCode]] = {columnLabels[columnCode]: counts[rowCode, columnCode].item() for columnCode in np.flatnonzero(counts[rowCode])}
+      return table
+
+    for rowCode, columnCode in sorted(zip(rowCodes, columnCodes)):
+      cells = table.setdefault(rowLabels[rowCode], {})
+      cells[columnLabels[columnCode]] = cells.get(columnLabels[columnCode], 0) + 1
+    return table
+
+
+
+def report(roster):
+  '''
+  EFFECTS: Prints a short report about every character in `roster`: how many there are, the average of each ability score by class,
+  and the level distribution by race.
+  '''
+
+  print(f"{len(roster)} characters\n")
+
+  print("Average ability scores by class")
+  averages = {ability: roster.groupBy("charClass", ability) for ability in ABILITIES}
+  print("\t" + "Class".ljust(12) + "".join(ability[:3].rjust(6) for ability in ABILITIES))
+  for charClass in CLASSES:
+    if charClass in averages[ABILITIES[0]]:
+      print("\t" + charClass.ljust(12) + "".join(f"{averages[ability][charClass]:6.1f}" for ability in ABILITIES))
+
+  print("\nLevel distribution by race (characters whose level is set)")
+  for race, levels in roster.crossTab("race", "level").items():
+    print(f"\t{race.ljust(12)}" + ", ".join(f"level {level}: {count}" for level, count in levels.items()))
+
+
+
+if __name__ == "__main__":
+  from DNP_Engine import openCharacterStore
+
+  with openCharacterStore() as charStore:
+    report(Roster.fromStore(charStore, follow=False))
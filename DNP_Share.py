@@ -0,0 +1,717 @@
+# Code author: Patrick Woolard
+# Email: Jwoolard@augusta.edu
+# Github: https://github.com/JwoolardAU/DungeonsNPythons
+
+
+'''
+Character share networking for Dungeons & Pythons.
+
+Characters used to be shared by writing a temporary shelve to disk, zipping it, and sending the zip file 2048 bytes at a time
+(and the receiver did all of that in reverse). Now a character is turned into a small JSON record in memory and sent over the
+TCP connection as one "frame": a fixed size header that says what kind of frame it is and exactly how many bytes follow, then those bytes.
+Nothing is ever written to disk, and the receiver knows how much to read before it reads it, so it reads straight into one buffer
+of the right size (see FrameReader) instead of gluing together lots of small chunks.
+
+Frame header (network byte order):   3 bytes magic b"DNP" | 1 byte protocol version | 1 byte frame type | 4 bytes payload length
+
+Characters travel as JSON (see Character.toRecord()) rather than as pickles, because unpickling data from the network can run any code
+the sender likes. A record that does not describe a valid character is rejected (ShareError).
+
+A single character is one character frame. Many characters (up to the whole roster) go over one connection as a bulk share (see sendRoster()):
+  sender:    roster frame | block frame | block frame | ... | end frame
+  receiver:                codecs frame                                  report frame
+The sender first splits the character frames into blocks of about BLOCK_SIZE bytes, and the roster frame carries the share's "manifest":
+a transfer id and the size and checksum of every block. The receiver answers with the compression codecs both sides have (see DNP_Codec.py)
+and the block to start from. Each block then goes out as it is or, when it is big enough to be worth it, as one packed frame (1 byte codec
+id then the compressed frames) inside a block frame. The receiver checks every block against the manifest and saves it in one transaction
+together with how far the transfer has got, so if the connection drops (or a block arrives damaged) the sender just reconnects and the
+receiver tells it which block to resume from: nothing that already arrived is sent again. A character the receiver can not take (its name
+is already used, or its record is broken) is listed in the report instead of stopping the share.
+
+The same roster can go to many receivers at once (see broadcastRoster(), i.e. a DM handing one NPC party to every player): it is encoded,
+and each block compressed, only once, and the same bytes are sent to every receiver over its own TCP connection, all at the same time.
+'''
+
+
+import hashlib # block checksums
+import json # characters travel as JSON records
+import os # checking which operating system we are on
+import socket # the TCP connection to the other user
+import struct # packing and unpacking frame headers
+import threading # a roster sent to many receivers is packed by whichever of their connections needs a block first
+import time # waiting a moment before resuming a broken share
+import uuid # every bulk share gets its own transfer id
+from concurrent.futures import ThreadPoolExecutor # sending one roster to many receivers at the same time
+
+from DNP_Codec import CODEC_IDS, CODEC_NAMES, LINK_LAN, available, chooseCodec, compress, decompress
+from DNP_Engine import Character
+
+
+# The port the receiving user listens on. Chosen mostly arbitrarily, both sides must agree on it. It has to be above 1023 (Linux and macOS only
+# let administrators listen on ports below that) and below 32768 (where Linux starts handing out ports to outgoing connections)
+SHARE_PORT = 31002
+
+# How long (in seconds) the sender waits for the receiver before giving up
+CONNECT_TIMEOUT = 10
+
+# How long (in seconds) the receiver waits for more data from a connected sender before giving up on it
+RECEIVE_TIMEOUT = 30
+
+# Socket receive buffer asked of the operating system, so big frames arrive in a few large reads instead of many small ones
+RECEIVE_BUFFER_SIZE = 1024 * 1024
+
+MAGIC = b"DNP"
+PROTOCOL_VERSION = 3 # 2 added codec negotiation and packed frames, 3 checksummed blocks and resuming
+
+# Frame types
+FRAME_CHARACTER = 1 # payload is one character record (JSON)
+FRAME_ROSTER = 2 # starts a bulk share, payload is {"count": characters coming, "codecs": [the sender's codecs], "transfer": id, "blocks": [[size, checksum]]} (JSON)
+FRAME_END = 3 # ends a bulk share, no payload
+FRAME_REPORT = 4 # the receiver's answer to a bulk share, payload is the report (JSON, see receiveRoster())
+FRAME_SYNC = 5 # one step of a roster sync, payload is JSON (see DNP_Sync.py)
+FRAME_PACKED = 6 # payload is 1 byte codec id then compressed whole frames, only ever sent inside a block frame (see packFrames())
+FRAME_CODECS = 7 # the receiver's answer to a roster frame, payload is {"codecs": [codecs both sides have], "resume": first block to send} (JSON)
+FRAME_BLOCK = 8 # one block of a bulk share, payload is 4 byte block number then the block's frames (or one packed frame holding them)
+
+# A bulk share's character frames are split into blocks of about this many bytes. A block is sent with one send, checked and saved by the
+# receiver in one transaction, and is what a broken share resumes from
+BLOCK_SIZE = 64 * 1024
+
+# Bytes in a block checksum
+CHECKSUM_SIZE = 16
+
+# How many times a broken bulk share is tried (the first try included), and how long (in seconds) to wait before each resume
+SEND_ATTEMPTS = 5
+RESUME_DELAY = 2
+
+# Frames bigger than this are refused, so a bad or hostile sender can not make the receiver allocate unlimited memory
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+_HEADER = struct.Struct("!3sBBI")
+HEADER_SIZE = _HEADER.size
+_BLOCK_NUMBER = struct.Struct("!I")
+
+
+
+class ShareError(Exception):
+  '''
+  Raised when the other user sends something that is not a valid Dungeons & Pythons frame or character.
+  '''
+
+
+
+def encodeCharacter(character):
+  '''
+  EFFECTS: Returns `character` as compact JSON bytes (see Character.toRecord()).
+  '''
+
+  return json.dumps(character.toRecord(), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decodeCharacter(payload):
+  '''
+  EFFECTS: Returns the Character described by the JSON in `payload` (bytes, bytearray or memoryview). Raises ShareError if it is not a valid character record.
+  '''
+
+  try:
+    return Character.fromRecord(json.loads(str(payload, "utf-8"))) # decodes straight out of the receive buffer, no extra copy of the bytes
+  except (ValueError, UnicodeDecodeError) as error:
+    raise ShareError(f"received an invalid character ({error})") from None
+
+
+def encodeJSON(value):
+  '''
+  EFFECTS: Returns `value` as compact JSON bytes (for the roster and report frames).
+  '''
+
+  return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decodeJSON(payload):
+  '''
+  EFFECTS: Returns the value of the JSON in `payload`. Raises ShareError if it is not JSON.
+  '''
+
+  try:
+    return json.loads(str(payload, "utf-8"))
+  except (ValueError, UnicodeDecodeError) as error:
+    raise ShareError(f"received a broken message ({error})") from None
+
+
+def encodeFrame(frameType, payload):
+  '''
+  EFFECTS: Returns the bytes of one frame: the header followed by `payload`.
+
+  REQUIRES: payload is bytes (or a bytearray) of at most MAX_FRAME_SIZE bytes
+  '''
+
+  return _HEADER.pack(MAGIC, PROTOCOL_VERSION, frameType, len(payload)) + payload
+
+
+def parseHeader(header):
+  '''
+  EFFECTS: Returns (frame type, payload length) from the bytes of a frame header. Raises ShareError if it is not a Dungeons & Pythons frame header.
+  '''
+
+  magic, version, frameType, size = _HEADER.unpack(header)
+  if magic != MAGIC:
+    raise ShareError("the other side is not a Dungeons & Pythons character share (or is an old version of the app)")
+  if version != PROTOCOL_VERSION:
+    raise ShareError(f"the other user's app speaks character share version {version}, this app speaks version {PROTOCOL_VERSION}")
+  if size > MAX_FRAME_SIZE:
+    raise ShareError(f"the other user tried to send {size} bytes at once, which is more than a character share allows")
+  return frameType, size
+
+
+def packFrames(frames, codecs, link=LINK_LAN):
+  '''
+  EFFECTS: Returns the bytes to send for `frames` (whole frames back to back): one packed frame when chooseCodec() picks a codec for a block
+  that size and compressing it actually makes it smaller, otherwise `frames` as they are.
+
+  REQUIRES: codecs are the codec names both sides have (see sendRoster())
+  '''
+
+  codec, level = chooseCodec(len(frames), codecs, link)
+  if codec != "none":
+    packed = compress(frames, codec, level)
+    if len(packed) + HEADER_SIZE + 1 < len(frames):
+      return _HEADER.pack(MAGIC, PROTOCOL_VERSION, FRAME_PACKED, len(packed) + 1) + bytes((CODEC_IDS[codec],)) + packed
+  return bytes(frames)
+
+
+def unpackFrames(payload):
+  '''
+  EFFECTS: Returns the frames (bytes, back to back) in the packed frame payload `payload`. Raises ShareError if it does not decompress.
+  '''
+
+  if len(payload) < 1 or payload[0] not in CODEC_NAMES:
+    raise ShareError("received a packed frame with an unknown codec")
+  try:
+    return decompress(payload[1:], CODEC_NAMES[payload[0]], MAX_FRAME_SIZE)
+  except ValueError as error:
+    raise ShareError(f"received a broken packed frame ({error})") from None
+
+
+def splitFrames(frames):
+  '''
+  EFFECTS: Returns a list of (frame type, payload) for the whole frames back to back in `frames` (a memoryview). Raises ShareError if it
+  ends part way through a frame.
+  '''
+
+  split = []
+  while frames:
+    if len(frames) < HEADER_SIZE:
+      raise ShareError("received a block that ends part way through a frame")
+    frameType, size = parseHeader(frames[:HEADER_SIZE])
+    if len(frames) < HEADER_SIZE + size:
+      raise ShareError("received a block that ends part way through a frame")
+    split.append((frameType, frames[HEADER_SIZE:HEADER_SIZE+size]))
+    frames = frames[HEADER_SIZE+size:]
+  return split
+
+
+def checksum(block):
+  '''
+  EFFECTS: Returns the checksum (hex text) of the bytes in `block`.
+  '''
+
+  return hashlib.blake2b(block, digest_size=CHECKSUM_SIZE).hexdigest()
+
+
+def agreeCodecs(offered):
+  '''
+  EFFECTS: Returns the codecs from `offered` (the other side's list) that this app has too, or [] if it is not a list.
+  '''
+
+  if not isinstance(offered, list):
+    return []
+  mine = available()
+  return [codec for codec in offered if codec in mine]
+
+
+def claimCharacters(frames, taken, report):
+  '''
+  EFFECTS: Returns the characters in `frames` ((frame type, payload) pairs) whose names are not in `taken`, adding their names to `taken`.
+  A name that is already taken is added to report["conflicts"] instead, and a record that is not a valid character to report["rejected"].
+  Raises ShareError if one of the frames is not a character frame.
+
+  MODIFIES: taken, report
+  '''
+
+  characters = []
+  for frameType, payload in frames:
+    if frameType != FRAME_CHARACTER:
+      raise ShareError(f"expected a character but the other user sent frame type {frameType}")
+    try:
+      character = decodeCharacter(payload)
+    except ShareError as error:
+      report["rejected"].append(str(error))
+      continue
+    if character.name in taken:
+      report["conflicts"].append(character.name)
+    else:
+      taken.add(character.name) # claimed now, so a second character with the same name gets a conflict even before this one is saved
+      characters.append(character)
+  return characters
+
+
+
+class RosterTransfer:
+  '''
+  One bulk share, ready to send: its character frames split into blocks of about BLOCK_SIZE bytes, and the manifest (the size and checksum
+  of every block) the receiver checks them against. It is kept for the whole share, so a share that breaks off can resume on a new
+  connection without encoding anything again (see sendRoster()), and the same transfer can be sent to many receivers at once without
+  encoding or compressing anything twice (see broadcastRoster()).
+  '''
+
+  def __init__(self, characters):
+    '''
+    EFFECTS: Encodes every character in `characters` (one at a time, so a generator that loads each character from the store as it is
+    needed works too) into blocks.
+    '''
+
+    self.id = uuid.uuid4().hex
+    self.count = 0
+    self.blocks = []
+    block = bytearray()
+    for character in characters:
+      block += encodeFrame(FRAME_CHARACTER, encodeCharacter(character))
+      self.count += 1
+      if len(block) >= BLOCK_SIZE:
+        self.blocks.append(bytes(block))
+        block.clear()
+    if block:
+      self.blocks.append(bytes(block))
+    self.manifest = [[len(block), checksum(block)] for block in self.blocks]
+    self._frames = {} # (block number, (codec, level)): block frame, so each block is packed once however many times it is sent
+    self._packing = threading.Lock() # the connections of a broadcast ask for blocks from their own threads
+
+
+  def offer(self):
+    '''
+    EFFECTS: Returns the payload of the roster frame that starts (or resumes) this share.
+    '''
+
+    return encodeJSON({"count": self.count, "codecs": available(), "transfer": self.id, "blocks": self.manifest})
+
+
+  def blockFrame(self, number, codecs, link=LINK_LAN):
+    '''
+    EFFECTS: Returns the block frame (bytes) for block `number`, packed with one of `codecs` when that is worth it (see packFrames()).
+    A block frame is only built once for each setting chooseCodec() picks, later calls (resumes, other receivers) get the same bytes.
+    '''
+
+    key = (number, chooseCodec(len(self.blocks[number]), codecs, link))
+    frame = self._frames.get(key)
+    if frame is None:
+      with self._packing: # receivers that want a block someone else is packing wait for it instead of packing it again
+        frame = self._frames.get(key)
+        if frame is None:
+          frame = encodeFrame(FRAME_BLOCK, _BLOCK_NUMBER.pack(number) + packFrames(self.blocks[number], codecs, link))
+          self._frames[key] = frame
+    return frame
+
+
+
+class BulkReceipt:
+  '''
+  The receiving side of one bulk share: the manifest from its roster frame, which block comes next, and what happened to every character
+  received so far (in earlier connections too, when the share is being resumed). How far a share has got is kept in the store's meta table,
+  saved in the same transaction as each block's characters (see record()), so it is always exactly what has really been saved:
+
+    "transfer:<id>"            the next block to arrive
+    "transfer:<id>:<block>"    what happened to that block's characters (written once, so saving a block never rewrites the blocks before it)
+
+  All of them are deleted in the same transaction as the last block, so a finished share leaves nothing behind.
+  '''
+
+  def __init__(self, payload):
+    '''
+    EFFECTS: Reads the roster frame payload `payload`. Raises ShareError if it is broken.
+    '''
+
+    offer = decodeJSON(payload)
+    try:
+      self.transfer = offer["transfer"]
+      self.manifest = [(int(size), str(blockChecksum)) for size, blockChecksum in offer["blocks"]]
+      self.codecs = agreeCodecs(offer.get("codecs"))
+      if not isinstance(self.transfer, str):
+        raise TypeError(self.transfer)
+    except (KeyError, TypeError, ValueError, AttributeError):
+      raise ShareError("received a broken roster frame") from None
+
+    self.key = f"transfer:{self.transfer}"
+    self.next = 0 # the next block to arrive
+    self.totals = {"saved": [], "conflicts": [], "rejected": []} # the report for the whole share so far
+
+
+  def _blockKey(self, number):
+    '''
+    EFFECTS: Returns the store meta key that holds what happened to the characters of block `number` (see the class docstring).
+    '''
+
+    return f"{self.key}:{number}"
+
+
+  def resume(self, store):
+    '''
+    EFFECTS: Picks up from how far this share got in `store` before, if it is being resumed.
+    '''
+
+    progress = store.getMeta(self.key)
+    if progress is None:
+      return
+    for number in range(int(progress)):
+      block = store.getMeta(self._blockKey(number))
+      if block is None: # this block's row is missing, so it counts as not received and the share carries on from it
+        break
+      for key, names in self.totals.items():
+        names += json.loads(block)[key]
+      self.next = number + 1
+
+
+  def answer(self):
+    '''
+    EFFECTS: Returns the payload of the codecs frame that answers the roster frame: the codecs both sides have and the block to send first.
+    '''
+
+    return encodeJSON({"codecs": self.codecs, "resume": self.next})
+
+
+  def open(self, payload):
+    '''
+    EFFECTS: Returns a list of (frame type, payload) for the frames in the block frame payload `payload`. Raises ShareError if it is not
+    the block that comes next or it does not match its size and checksum in the manifest (it was damaged on the way).
+    '''
+
+    if len(payload) < _BLOCK_NUMBER.size:
+      raise ShareError("received a broken block")
+    number, = _BLOCK_NUMBER.unpack(payload[:_BLOCK_NUMBER.size])
+    if number != self.next or number >= len(self.manifest):
+      raise ShareError(f"expected block {self.next} but the other user sent block {number}")
+
+    frames = payload[_BLOCK_NUMBER.size:]
+    if len(frames) >= HEADER_SIZE and parseHeader(frames[:HEADER_SIZE]) == (FRAME_PACKED, len(frames) - HEADER_SIZE):
+      frames = memoryview(unpackFrames(frames[HEADER_SIZE:]))
+
+    size, expected = self.manifest[number]
+    if len(frames) != size or checksum(frames) != expected:
+      raise ShareError(f"block {number} was damaged on the way (it does not match its checksum)")
+    return splitFrames(frames)
+
+
+  def record(self, saved, conflicts, rejected):
+    '''
+    EFFECTS: Moves on to the next block, adding what happened to the characters of the one just opened (the names `saved`, the names that
+    were `conflicts` and the reasons records were `rejected`) to the totals. Returns {key: value} for the store's meta table, to save in the
+    same transaction as the block's characters (see CharacterStore.saveMany()): the new progress and this block's names, or, after the last
+    block, None for every key of the share so they are all deleted.
+    '''
+
+    number = self.next
+    self.next += 1
+    block = {"saved": saved, "conflicts": conflicts, "rejected": rejected}
+    for key, names in block.items():
+      self.totals[key] += names
+    if self.next == len(self.manifest): # the share is done, and finish() reports it from the totals
+      return dict.fromkeys([self.key] + [self._blockKey(earlier) for earlier in range(number)])
+    return {self.key: str(self.next), self._blockKey(number): json.dumps(block)}
+
+
+  def finish(self):
+    '''
+    EFFECTS: Returns the report to send back once the sender's end frame arrives, covering the whole share. Raises ShareError if the share
+    ended before every block arrived.
+    '''
+
+    if self.next < len(self.manifest):
+      raise ShareError(f"the share ended after {self.next} of its {len(self.manifest)} blocks")
+    return {**self.totals, "error": None}
+
+
+
+def sendFrame(connection, frameType, payload):
+  '''
+  EFFECTS: Sends one frame over the socket `connection` with a single sendall() call (header and payload in one buffer, so a small
+  character leaves in one TCP segment instead of dozens of 2048 byte sends).
+  '''
+
+  connection.sendall(encodeFrame(frameType, payload))
+
+
+class FrameReader:
+  '''
+  Reads frames from one connection. Every byte is read with recv_into() straight into a buffer that is allocated once and reused for
+  every frame (it only grows when a frame is bigger than any before it), so receiving never builds and joins lists of small chunks.
+  '''
+
+  def __init__(self, connection, bufferSize=0):
+    '''
+    EFFECTS: Makes a reader for the socket `connection` with a `bufferSize` byte buffer ready (it grows as needed).
+    '''
+
+    self.connection = connection
+    self._header = bytearray(HEADER_SIZE)
+    self._buffer = bytearray(bufferSize)
+
+
+  def _fill(self, view):
+    '''
+    EFFECTS: Reads from the connection until the memoryview `view` is full. Raises ShareError if the other user hangs up first.
+
+    HELPS: read()
+    '''
+
+    while view:
+      received = self.connection.recv_into(view)
+      if received == 0:
+        raise ShareError("the other user disconnected in the middle of sending")
+      view = view[received:]
+
+
+  def read(self):
+    '''
+    EFFECTS: Reads one whole frame and returns (frame type, payload). The payload is a memoryview into the reader's buffer, so it is only
+    good until the next read() (copy it with bytes() to keep it). Raises ShareError if what arrives is not a Dungeons & Pythons frame.
+    '''
+
+    self._fill(memoryview(self._header))
+    frameType, size = parseHeader(self._header)
+
+    if size > len(self._buffer):
+      self._buffer = bytearray(size)
+    payload = memoryview(self._buffer)[:size]
+    self._fill(payload)
+    return frameType, payload
+
+
+def receiveFrame(connection):
+  '''
+  EFFECTS: Reads one whole frame from the socket `connection` and returns (frame type, payload). See FrameReader.read().
+  '''
+
+  return FrameReader(connection).read()
+
+
+def listenForShare(host='', port=SHARE_PORT):
+  '''
+  EFFECTS: Returns a server socket listening for a sender on `port` ('' for host means any sender may connect).
+  Connections it accepts get a large receive buffer. Raises OSError if the port can not be opened (i.e. it is already in use).
+  '''
+
+  server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+  if os.name != "nt": # lets the next share reuse the port right away. (On Windows this option would let other apps steal the port instead)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+  server.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER_SIZE) # set before listen() so accepted connections start with it
+  server.bind((host, port))
+  server.listen()
+  return server
+
+
+def acceptShare(server, timeout=RECEIVE_TIMEOUT):
+  '''
+  EFFECTS: Waits for a sender to connect to `server` and returns the connection. Once connected, a sender that goes quiet for `timeout`
+  seconds is given up on (reads raise OSError) instead of leaving the receiver waiting forever.
+  '''
+
+  connection, address = server.accept()
+  connection.settimeout(timeout)
+  return connection
+
+
+def connectTo(host, port=SHARE_PORT, timeout=CONNECT_TIMEOUT):
+  '''
+  EFFECTS: Opens (and returns) a TCP connection to the receiving user at `host`. Raises OSError if that fails or takes longer than `timeout` seconds.
+  '''
+
+  connection = socket.create_connection((host, port), timeout=timeout)
+  connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) # a share is one frame, send it right away instead of waiting to fill a packet
+  return connection
+
+
+def sendCharacter(connection, character):
+  '''
+  EFFECTS: Sends `character` over `connection` as one character frame.
+  '''
+
+  sendFrame(connection, FRAME_CHARACTER, encodeCharacter(character))
+
+
+def receiveCharacter(connection):
+  '''
+  EFFECTS: Reads one character frame from `connection` and returns the Character in it. Raises ShareError for anything else.
+  '''
+
+  frameType, payload = receiveFrame(connection)
+  if frameType != FRAME_CHARACTER:
+    raise ShareError(f"expected a character but the other user sent frame type {frameType}")
+  return decodeCharacter(payload)
+
+
+def sendRoster(connection, characters, link=LINK_LAN, reconnect=None, attempts=SEND_ATTEMPTS, onResume=None):
+  '''
+  EFFECTS: Sends every character in `characters` over `connection` as one bulk share, compressed for a `link` speed link (see DNP_Codec.py),
+  then waits for the receiver's report and returns it (see receiveRoster()). If the share breaks off (the connection drops, or the receiver
+  finds a damaged block) and `reconnect` is given, reconnect() is called for a new connection and the share resumes from the first block
+  the receiver does not have yet, up to `attempts` tries in all (onResume(attempt) is called before each resume, i.e. to tell the user).
+  Raises ShareError or OSError if the last try breaks off too.
+
+  IMPLEMENTATION SKETCH:
+    - Encode the characters into blocks up front (RosterTransfer), so a resume never has to encode or load anything again
+    - Send the share (see _sendTransfer()); if it breaks, wait RESUME_DELAY seconds, reconnect and send it again from the roster frame,
+      the receiver says which block to carry on from
+  '''
+
+  return _sendResuming(connection, RosterTransfer(characters), link, reconnect, attempts, onResume)
+
+
+def broadcastRoster(receivers, characters, link=LINK_LAN, connect=connectTo, attempts=SEND_ATTEMPTS, onResume=None):
+  '''
+  EFFECTS: Sends every character in `characters` to every receiver in `receivers` ((host, port) pairs) as a bulk share, to all of them at
+  the same time, and returns their reports in the same order (see receiveRoster()). Each receiver has its own connection (made with
+  connect(host, port)) and resumes on its own if it breaks off (onResume((host, port), attempt) is called before each resume). A receiver
+  that can not be reached, or whose last try breaks off too, gets a report with no characters saved and the "error" that stopped it,
+  the others are not held up by it.
+
+  IMPLEMENTATION SKETCH:
+    - Encode the characters into blocks once (RosterTransfer), every receiver's share is sent from the same transfer
+    - One thread per receiver connects and sends the share (see sendRoster()); a block is packed by the first connection that needs it and
+      every other connection sends those same bytes (see RosterTransfer.blockFrame()), so adding receivers adds sending, not encoding
+    - The sends mostly wait on the network, which happens outside the GIL, so the time stays about that of the slowest receiver
+  '''
+
+  transfer = RosterTransfer(characters)
+
+  def send(receiver):
+    reconnect = lambda: connect(*receiver)
+    resumed = None if onResume is None else lambda attempt: onResume(receiver, attempt)
+    try:
+      with reconnect() as connection:
+        return _sendResuming(connection, transfer, link, reconnect, attempts, resumed)
+    except (OSError, ShareError) as error:
+      return {"saved": [], "conflicts": [], "rejected": [], "error": str(error) or "the connection to the receiver timed out"}
+
+  if not receivers:
+    return []
+  with ThreadPoolExecutor(max_workers=len(receivers)) as pool:
+    return list(pool.map(send, receivers))
+
+
+def _sendResuming(connection, transfer, link, reconnect, attempts, onResume):
+  '''
+  EFFECTS: Sends the bulk share `transfer` over `connection`, resuming it on a connection from reconnect() when it breaks off, and returns
+  the receiver's report (see sendRoster()).
+
+  HELPS: sendRoster(), broadcastRoster()
+  '''
+
+  for attempt in range(1, attempts + 1):
+    try:
+      if attempt == 1:
+        return _sendTransfer(connection, transfer, link)
+      with reconnect() as connection: # connections made for a resume are ours to close
+        return _sendTransfer(connection, transfer, link)
+    except (OSError, ShareError):
+      if reconnect is None or attempt == attempts:
+        raise
+    if onResume is not None:
+      onResume(attempt)
+    time.sleep(RESUME_DELAY)
+
+
+def _sendTransfer(connection, transfer, link):
+  '''
+  EFFECTS: Sends (or resumes) the bulk share `transfer` over `connection` and returns the receiver's report. Raises ShareError if the
+  receiver's answers are not codecs and then a report.
+
+  HELPS: sendRoster()
+
+  IMPLEMENTATION SKETCH:
+    - Send the roster frame with the manifest and read back the codecs both sides have and the block to start from
+    - Send each block from there as one send (packed when that is worth it), then the end frame, and read the report frame
+  '''
+
+  reader = FrameReader(connection)
+  sendFrame(connection, FRAME_ROSTER, transfer.offer())
+  frameType, payload = reader.read()
+  if frameType != FRAME_CODECS:
+    raise ShareError(f"expected the receiver's codecs but the other user sent frame type {frameType}")
+  answer = decodeJSON(payload)
+  resume = answer.get("resume") if isinstance(answer, dict) else None
+  if not isinstance(resume, int) or not 0 <= resume <= len(transfer.blocks):
+    raise ShareError("received a broken answer to the roster frame")
+  codecs = agreeCodecs(answer.get("codecs"))
+
+  for number in range(resume, len(transfer.blocks)):
+    connection.sendall(transfer.blockFrame(number, codecs, link))
+  sendFrame(connection, FRAME_END, b"")
+
+  frameType, payload = reader.read()
+  if frameType != FRAME_REPORT:
+    raise ShareError(f"expected a report but the other user sent frame type {frameType}")
+  return decodeJSON(payload)
+
+
+def receiveRoster(connection, store):
+  '''
+  EFFECTS: Receives a share from `connection` (a bulk share, or a single character from a user who sends just one) and saves
+  the characters in it to the CharacterStore `store`. Returns a report of what happened:
+    {"saved": [names saved], "conflicts": [names not saved because a character with that name already exists],
+     "rejected": [reasons for records that were not valid characters], "error": None, or why the share stopped early}
+  and, if a bulk share stopped early, "resumable": True (the sender can reconnect and carry on where it stopped).
+  A bulk share is answered with the report for the whole share, including what arrived before it was resumed.
+
+  MODIFIES: store
+
+  IMPLEMENTATION SKETCH:
+    - Answer the roster frame with the codecs both sides have and the block to start from (see BulkReceipt), then read every frame with
+      one FrameReader (one receive buffer for the whole share)
+    - Check each block against the manifest, and turn its frames into characters; skip (and report) any whose name is taken, by the
+      store or earlier in the share
+    - Save each block's characters in one transaction, together with how far the share has got, so a big share does not hold one huge
+      transaction open and a resumed share carries on from exactly what was saved
+    - If the connection breaks (or a block is damaged), keep the blocks that fully arrived and say why the share stopped in the report
+  '''
+
+  report = {"saved": [], "conflicts": [], "rejected": [], "error": None}
+  taken = set(store.names()) # read once, instead of asking the store about every character that arrives
+  reader = FrameReader(connection)
+  receipt = None
+  answer = None
+
+  try:
+    frameType, payload = reader.read()
+    if frameType == FRAME_CHARACTER: # a single character share is just the one frame
+      characters = claimCharacters([(frameType, payload)], taken, report)
+      store.saveMany(characters)
+      report["saved"] = [character.name for character in characters]
+    elif frameType != FRAME_ROSTER:
+      raise ShareError(f"expected a character but the other user sent frame type {frameType}")
+    else:
+      receipt = BulkReceipt(payload)
+      receipt.resume(store)
+      sendFrame(connection, FRAME_CODECS, receipt.answer())
+      frameType, payload = reader.read()
+      while frameType == FRAME_BLOCK:
+        found = {"conflicts": [], "rejected": []}
+        characters = claimCharacters(receipt.open(payload), taken, found)
+        names = [character.name for character in characters]
+        store.saveMany(characters, receipt.record(names, found["conflicts"], found["rejected"]))
+        report["saved"] += names
+        report["conflicts"] += found["conflicts"]
+        report["rejected"] += found["rejected"]
+        frameType, payload = reader.read()
+      if frameType != FRAME_END:
+        raise ShareError(f"expected a block but the other user sent frame type {frameType}")
+      answer = receipt.finish()
+  except (OSError, ShareError) as error:
+    report["error"] = str(error)
+    if receipt is not None and receipt.next < len(receipt.manifest):
+      report["resumable"] = True
+
+  if answer is not None:
+    try:
+      sendFrame(connection, FRAME_REPORT, encodeJSON(answer))
+    except OSError: # the sender hung up without waiting for the report, the characters are saved either way
+      pass
+  return report
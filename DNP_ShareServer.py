@@ -0,0 +1,447 @@
+# Code author: Patrick Woolard
+# Email: Jwoolard@augusta.edu
+# Github: https://github.com/JwoolardAU/DungeonsNPythons
+
+
+'''
+Multi-sender Character Share server for Dungeons & Pythons.
+
+The blocking receiver in DNP_Share.py takes one sender and stops, so a DM collecting characters from six players had to start receiving
+six times in a row. A ShareServer runs on asyncio instead and takes any number of senders at the same time, each connection handled as
+its own task. It speaks exactly the same frames (a single character, or a bulk share, see DNP_Share.py), so senders do not change at all.
+
+  - every read has a timeout, so a sender that goes quiet only ever ties up its own connection
+  - received characters are saved by one commit task, which merges whatever batches are waiting into a single transaction, so the
+    store is only ever written by one thing at a time and many senders do not mean many tiny transactions
+  - the commit queue is bounded: when saving falls behind, the connections stop reading until it catches up, and TCP makes the senders
+    wait in turn (backpressure), so a crowd of fast senders can not pile up received characters in memory
+  - a name is claimed by the first sender to send it, any other sender using it (at the same time or later) gets a conflict
+  - a bulk share that breaks off part way does not count as a finished sender: how far it got is saved with its characters, and the
+    sender can reconnect and resume it (see DNP_Share.BulkReceipt)
+  - a sender can also start a roster sync (see DNP_Sync.py), which is answered here the same way
+  - while it is listening it also answers discovery probes, so senders on the local network find it without typing an IP address
+    (see DNP_Discovery.py)
+
+From python:
+
+    from DNP_ShareServer import collectShares
+    reports = collectShares(charStore, senders=6)    # returns once six senders are done (or when Ctrl+C is pressed, with senders=None)
+'''
+
+
+import asyncio # many senders at once on one thread
+import os # checking which operating system we are on
+import socket # this computer's name, for senders discovering it
+
+from DNP_Share import (SHARE_PORT, RECEIVE_TIMEOUT, HEADER_SIZE, FRAME_CHARACTER, FRAME_ROSTER, FRAME_END, FRAME_REPORT, FRAME_SYNC, FRAME_CODECS,
+                       FRAME_BLOCK, ShareError, BulkReceipt, parseHeader, claimCharacters, decodeJSON, encodeFrame, encodeJSON)
+from DNP_Sync import RosterState
+from DNP_Discovery import DISCOVERY_PORT, Announcer
+
+
+# How many received batches may wait to be saved before connections stop reading (see ShareServer)
+COMMIT_QUEUE_SIZE = 16
+
+
+
+async def readFrame(reader, timeout=RECEIVE_TIMEOUT):
+  '''
+  EFFECTS: Reads one whole frame from the asyncio StreamReader `reader` and returns (frame type, payload). Raises ShareError if the sender
+  hangs up part way or what arrives is not a Dungeons & Pythons frame, and TimeoutError if the sender goes quiet for `timeout` seconds.
+  '''
+
+  try:
+    header = await asyncio.wait_for(reader.readexactly(HEADER_SIZE), timeout)
+    frameType, size = parseHeader(header)
+    payload = await asyncio.wait_for(reader.readexactly(size), timeout)
+  except asyncio.IncompleteReadError:
+    raise ShareError("the other user disconnected in the middle of sending") from None
+  return frameType, payload
+
+
+class ShareServer:
+  '''
+  Receives characters from many senders at the same time and saves them to one CharacterStore (see the module docstring).
+  Call serve() from asyncio, or use collectShares().
+  '''
+
+  def __init__(self, store, host='', port=SHARE_PORT, senders=None, timeout=RECEIVE_TIMEOUT, onListening=None, onReport=None,
+               name=None, discovery=DISCOVERY_PORT):
+    '''
+    EFFECTS: Makes a server that saves received characters to `store`. It stops after `senders` senders are done (None means it keeps going
+    until it is cancelled). onListening(port) is called once the server is ready for senders, and onReport(report) each time a sender is
+    done, with the same report DNP_Share.receiveRoster() returns. While listening it answers discovery probes on the UDP port `discovery`
+    (None turns that off) as `name` (this computer's host name by default).
+    '''
+
+    self.store = store
+    self.host = host
+    self.port = port
+    self.senders = senders
+    self.timeout = timeout
+    self.onListening = onListening
+    self.onReport = onReport
+    self.name = name or socket.gethostname()
+    self.discovery = discovery
+
+    self.reports = [] # one report per sender, in the order the senders finished
+    self._finished = 0 # senders that are done (not counting those that broke off part way and may resume)
+    self._taken = None # every name in the store or claimed by a sender so far
+    self._commits = None # (batch of characters, store meta to save with it, future) waiting for the commit task
+    self._done = None # set once `senders` senders are done
+    self._handlers = set() # connections being received right now
+    self._transfers = {} # transfer id: (handler task, writer) of the connection receiving that bulk share
+    self.busiest = 0 # the most senders that were being received at the same time
+    self.announcer = None # answers discovery probes while listening (None if discovery is off or its port could not be opened)
+
+
+  async def serve(self):
+    '''
+    EFFECTS: Listens for senders and receives from them until `senders` of them are done (or until cancelled), then returns the reports.
+    Raises OSError if the port can not be opened (i.e. it is already in use).
+
+    MODIFIES: store
+    '''
+
+    self._taken = set(self.store.names()) # read once, instead of asking the store about every character that arrives
+    self._commits = asyncio.Queue(COMMIT_QUEUE_SIZE)
+    self._done = asyncio.Event()
+    committer = asyncio.create_task(self._commit())
+
+    try:
+      # (on Windows reuse_address would let other apps steal the port instead, see DNP_Share.listenForShare())
+      server = await asyncio.start_server(self._handle, self.host, self.port, reuse_address=os.name != "nt")
+      async with server:
+        self.port = server.sockets[0].getsockname()[1] # the real port when port 0 (any free port) was asked for
+        await self._announce()
+        if self.onListening is not None:
+          self.onListening(self.port)
+        await self._done.wait()
+        self._stopAnnouncing() # stopped listening, so stop being found
+      if self._handlers: # anyone who connected before we stopped listening still gets received
+        await asyncio.wait(self._handlers)
+    finally:
+      committer.cancel()
+      self._stopAnnouncing()
+    return self.reports
+
+
+  async def _announce(self):
+    '''
+    EFFECTS: Starts answering discovery probes on the UDP port self.discovery (as self.announcer). Does nothing if discovery is off or
+    the port can not be opened (i.e. another receiver on this computer has it), senders can still type the IP address then.
+
+    HELPS: serve()
+    '''
+
+    if self.discovery is None:
+      return
+    try:
+      transport, self.announcer = await asyncio.get_running_loop().create_datagram_endpoint(
+        lambda: Announcer(self.name, self.port), local_addr=(self.host or "0.0.0.0", self.discovery), allow_broadcast=True)
+    except OSError:
+      self.announcer = None
+
+
+  def _stopAnnouncing(self):
+    '''
+    EFFECTS: Stops answering discovery probes (if we were).
+
+    HELPS: serve()
+    '''
+
+    if self.announcer is not None and self.announcer.transport is not None:
+      self.announcer.transport.close()
+
+
+  async def _handle(self, reader, writer):
+    '''
+    EFFECTS: Receives one sender's share (a single character or a bulk share), hands the characters to the commit task a block at a time,
+    and once they are saved answers a bulk share with its report. A sender that starts a sync instead is answered by _sync().
+
+    HELPS: serve()
+    '''
+
+    self._handlers.add(asyncio.current_task())
+    self.busiest = max(self.busiest, len(self._handlers))
+    report = {"saved": [], "conflicts": [], "rejected": [], "error": None}
+    pending = [] # (names, future) for each batch handed to the commit task
+    answer = None
+
+    frameType = None
+    try:
+      frameType, payload = await readFrame(reader, self.timeout)
+      if frameType == FRAME_SYNC:
+        await self._sync(reader, writer, payload, report)
+      else:
+        answer = await self._receive(reader, writer, frameType, payload, report, pending)
+    except (OSError, ShareError) as error: # TimeoutError is an OSError
+      report["error"] = str(error) or "the other user stopped sending for too long"
+
+    for names, saved in pending:
+      try:
+        await saved
+        report["saved"] += names
+      except Exception as error: # whatever stopped the save (see _commit()) is this sender's error, not the server's
+        report["error"] = report["error"] or f"the characters could not be saved ({error})"
+        self._taken.difference_update(names) # they were never saved, so someone else may send them
+        if frameType == FRAME_ROSTER: # the store says which block was saved last, so the sender can resume from the one that was not
+          report["resumable"] = True
+
+    try:
+      if answer is not None and report["error"] is None:
+        writer.write(encodeFrame(FRAME_REPORT, encodeJSON(answer)))
+        await asyncio.wait_for(writer.drain(), self.timeout)
+      writer.close()
+      await writer.wait_closed()
+    except OSError: # the sender hung up without waiting for the report, the characters are saved either way
+      pass
+
+    self.reports.append(report)
+    if self.onReport is not None:
+      self.onReport(report)
+    self._handlers.discard(asyncio.current_task())
+    self._transfers = {transfer: handler for transfer, handler in self._transfers.items() if handler[0] is not asyncio.current_task()}
+    if not report.get("resumable"): # a sender whose share broke off part way is not done, it can reconnect and resume
+      self._finished += 1
+    if self.senders is not None and self._finished >= self.senders:
+      self._done.set()
+
+
+  async def _receive(self, reader, writer, frameType, payload, report, pending):
+    '''
+    EFFECTS: Receives the rest of a share that started with the frame (frameType, payload), answering a bulk share's roster frame through
+    `writer`, adding what happens to each character to `report` and (names, future) for every batch handed to the commit task to `pending`.
+    Returns the report to send back for a bulk share (covering the whole share, see DNP_Share.BulkReceipt), or None for a single character.
+    Raises ShareError or OSError if the share breaks off part way (every block that fully arrived has still been handed over by then, and
+    the report says whether the sender can resume).
+
+    HELPS: _handle()
+    '''
+
+    if frameType == FRAME_CHARACTER: # a single character share is just the one frame
+      characters = claimCharacters([(frameType, payload)], self._taken, report)
+      if characters:
+        pending.append(await self._queue(characters))
+      return None
+    if frameType != FRAME_ROSTER:
+      raise ShareError(f"expected a character but the other user sent frame type {frameType}")
+
+    receipt = BulkReceipt(payload)
+    if receipt.transfer in self._transfers: # the sender came back to resume while its old connection is still being read (and saved)
+      handler, oldWriter = self._transfers[receipt.transfer]
+      oldWriter.close() # what already arrived on it still gets saved, then it stops
+      await asyncio.wait([handler])
+    self._transfers[receipt.transfer] = (asyncio.current_task(), writer)
+    receipt.resume(self.store)
+
+    try:
+      await self._send(writer, FRAME_CODECS, receipt.answer())
+      frameType, payload = await readFrame(reader, self.timeout)
+      after = None # the future of the block before, a block is only saved if the one before it was (see _commit())
+      while frameType == FRAME_BLOCK:
+        found = {"conflicts": [], "rejected": []}
+        characters = claimCharacters(receipt.open(payload), self._taken, found)
+        report["conflicts"] += found["conflicts"]
+        report["rejected"] += found["rejected"]
+        meta = receipt.record([character.name for character in characters], found["conflicts"], found["rejected"])
+        pending.append(await self._queue(characters, meta, after)) # waits here (and stops reading) while the commit queue is full
+        after = pending[-1][1]
+        if after.done() and not after.cancelled() and after.exception() is not None: # no point reading more blocks that would not be saved either
+          raise ShareError(f"the characters could not be saved ({after.exception()})")
+        frameType, payload = await readFrame(reader, self.timeout)
+      if frameType != FRAME_END:
+        raise ShareError(f"expected a block but the other user sent frame type {frameType}")
+      return receipt.finish()
+    except (OSError, ShareError):
+      if receipt.next < len(receipt.manifest):
+        report["resumable"] = True
+      raise
+
+
+  async def _sync(self, reader, writer, hello, report):
+    '''
+    EFFECTS: Answers a roster sync (see DNP_Sync.py) that started with the payload `hello`: tells the starter which characters differ, saves
+    the changes it pushes (through the commit task, like any received characters) and sends back the changes it pulls. Fills in `report`
+    with "sync": True, the characters changed here ("saved") and sent back ("sent"), and the conflicts the starter found.
+    Raises ShareError or OSError if the sync breaks off part way.
+
+    HELPS: _handle()
+    '''
+
+    report["sync"] = True
+    report["sent"] = []
+    state = await asyncio.to_thread(RosterState, self.store) # reading and hashing a big roster should not hold up the other connections
+    hello = decodeJSON(hello)
+    await self._send(writer, FRAME_SYNC, encodeJSON(state.answerHello(hello)))
+    ask = await self._readSync(reader)
+    await self._send(writer, FRAME_SYNC, encodeJSON(state.answerFields(ask)))
+    plan = await self._readSync(reader)
+    try:
+      peer = hello["store"]
+      characters, rejected = state.merge(plan["push"])
+      conflicts = dict(plan["conflicts"])
+      values = state.values(plan["pull"])
+    except (KeyError, TypeError, AttributeError, ValueError):
+      raise ShareError("received a broken sync message") from None
+    report["rejected"] += rejected
+    report["conflicts"] += list(conflicts)
+
+    keep = []
+    for character in characters:
+      if character.name not in state.records: # a character new to us, its name has to be claimed like any received character
+        if character.name in self._taken:
+          report["conflicts"].append(character.name)
+          continue
+        self._taken.add(character.name)
+      keep.append(character)
+
+    saved = []
+    if keep:
+      names, done = await self._queue(keep)
+      try:
+        await done
+        saved = names
+      except Exception as error:
+        report["error"] = f"the characters could not be saved ({error})"
+        self._taken.difference_update(name for name in names if name not in state.records)
+
+    await self._send(writer, FRAME_SYNC, encodeJSON({"values": values, "saved": saved, "rejected": rejected}))
+    saved = set(saved)
+    skip = {name for name in plan["push"] if name not in saved}
+    base = await asyncio.to_thread(self.store.syncBase, peer)
+    bases = state.newBase(base, [character for character in keep if character.name in saved], conflicts, skip)
+    await asyncio.to_thread(self.store.setSyncBase, peer, bases)
+    report["saved"] = [name for name in plan["push"] if name in saved]
+    report["sent"] = list(values)
+
+
+  async def _readSync(self, reader):
+    '''
+    EFFECTS: Reads the next message of a sync from the starter. Raises ShareError if it is not a sync message.
+
+    HELPS: _sync()
+    '''
+
+    frameType, payload = await readFrame(reader, self.timeout)
+    if frameType != FRAME_SYNC:
+      raise ShareError(f"expected a sync message but the other user sent frame type {frameType}")
+    message = decodeJSON(payload)
+    if not isinstance(message, dict):
+      raise ShareError("received a broken sync message")
+    return message
+
+
+  async def _send(self, writer, frameType, payload):
+    '''
+    EFFECTS: Sends one frame to a sender, waiting (up to the timeout) while the connection's send buffer is full.
+
+    HELPS: _receive(), _sync()
+    '''
+
+    writer.write(encodeFrame(frameType, payload))
+    await asyncio.wait_for(writer.drain(), self.timeout)
+
+
+  async def _queue(self, batch, meta=None, after=None):
+    '''
+    EFFECTS: Hands `batch` (and the store `meta` to save with it, see CharacterStore.saveMany()) to the commit task and returns
+    (its names, a future that is done once it is saved). If `after` (the future of the batch handed over before it, by the same bulk share)
+    fails, this batch is not saved either. Waits while the commit queue is full, which is what pushes back on senders when saving can not keep up.
+
+    HELPS: _handle()
+    '''
+
+    saved = asyncio.get_running_loop().create_future()
+    await self._commits.put((batch, meta, saved, after))
+    return [character.name for character in batch], saved
+
+
+  async def _commit(self):
+    '''
+    EFFECTS: Saves the batches handed over by every connection, one transaction at a time, until cancelled. A batch that can not be saved
+    (whatever the reason, i.e. a received character SQLite can not store) only fails its own connection: the commit task keeps going.
+    Neither is any later batch of the same bulk share saved, so the progress saved with them never skips the block that was lost.
+
+    HELPS: serve()
+
+    IMPLEMENTATION SKETCH:
+      - Wait for a batch, then take every other batch already waiting too, and save them all in one saveMany() transaction
+      - Do the saving on a worker thread so the connections keep being read from meanwhile
+      - If that fails, nothing was saved: save each batch in its own transaction instead, so only the batch that is at fault fails
+      - Tell every batch's connection it was saved (or why it could not be)
+    '''
+
+    while True:
+      waiting = [await self._commits.get()]
+      while not self._commits.empty():
+        waiting.append(self._commits.get_nowait())
+      waiting = [(batch, meta, saved, after) for batch, meta, saved, after in waiting if not self._skip(saved, after)]
+      if not waiting:
+        continue
+
+      characters = [character for batch, meta, saved, after in waiting for character in batch]
+      meta = {key: value for batch, batchMeta, saved, after in waiting if batchMeta for key, value in batchMeta.items()} # a later block's progress replaces an earlier one's
+      try:
+        await asyncio.to_thread(self.store.saveMany, characters, meta)
+      except Exception as error:
+        if len(waiting) == 1:
+          self._settle(waiting[0][2], error)
+        else:
+          for batch, meta, saved, after in waiting:
+            if self._skip(saved, after):
+              continue
+            try:
+              await asyncio.to_thread(self.store.saveMany, batch, meta)
+            except Exception as batchError:
+              self._settle(saved, batchError)
+            else:
+              self._settle(saved)
+      else:
+        for batch, meta, saved, after in waiting:
+          self._settle(saved)
+
+
+  def _skip(self, saved, after):
+    '''
+    EFFECTS: Returns True (failing the future `saved` too) if the batch before it in the same bulk share, whose future is `after`, could
+    not be saved, so this one must not be saved either.
+
+    HELPS: _commit()
+    '''
+
+    if after is None or not after.done() or after.cancelled() or after.exception() is None:
+      return False
+    self._settle(saved, ShareError("an earlier block of this share could not be saved"))
+    return True
+
+
+  @staticmethod
+  def _settle(saved, error=None):
+    '''
+    EFFECTS: Tells the connection waiting on the future `saved` that its batch was saved (or could not be, because of `error`). Nothing
+    happens if the connection stopped waiting (its task was cancelled).
+
+    HELPS: _commit()
+    '''
+
+    if saved.done():
+      return
+    if error is None:
+      saved.set_result(None)
+    else:
+      saved.set_exception(error)
+
+
+
+def collectShares(store, host='', port=SHARE_PORT, senders=None, onListening=None, onReport=None, name=None):
+  '''
+  EFFECTS: Receives characters from senders (any number of them at the same time) into `store` until `senders` senders are done, and returns
+  their reports (see ShareServer). With senders=None it keeps going until Ctrl+C is pressed, which raises KeyboardInterrupt as usual
+  (every report so far has already been given to onReport by then). Raises OSError if the port can not be opened.
+
+  MODIFIES: store
+  '''
+
+  server = ShareServer(store, host, port, senders, onListening=onListening, onReport=onReport, name=name)
+  return asyncio.run(server.serve())
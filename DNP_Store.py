@@ -0,0 +1,689 @@
+# Code author: Patrick Woolard
+# Email: Jwoolard@augusta.edu
+# Github: https://github.com/JwoolardAU/DungeonsNPythons
+
+
+'''
+Character storage for Dungeons & Pythons.
+
+Characters used to be kept in a shelve file (a pickled dbm database keyed by character name). Every question about the roster meant
+unpickling every character, writes were not transactional, and the dbm flavour underneath changed from platform to platform.
+
+CharacterStore keeps characters in an SQLite database instead ('DNP_Characters/Characters.sqlite3'):
+  - the database runs in WAL mode so reads never wait on writes
+  - every small field of a character is a real column (race, charClass, level and alignment are indexed), so listing and filtering never builds a whole character
+  - the big "detail" fields (backStory, inventory, sessGoals) live in their own table and are only read the first time they are used
+  - saveMany() writes a whole batch of characters in one transaction
+  - every character remembers when it was last written, and what it looked like the last time it was synced with each other roster (see DNP_Sync.py)
+  - recently used characters stay in memory, and with a flushDelay saves are written behind in batches (see CharacterStore)
+
+migrateShelve() copies every character out of an old shelve file into the store (the app does this once, automatically).
+From the shell:   python DNP_Store.py --migrate [path to old shelve]
+'''
+
+
+import io # unpickling characters from bytes
+import json # ability scores and the detail lists are stored as JSON text
+import os # file/folder control operations
+import pickle # reading pickled characters out of old shelve files and version 1 databases
+import sqlite3 # the database itself
+import sys # command line arguments
+import threading # the write-behind flush timer
+import time # when each character was last written
+from collections import OrderedDict # the least-recently-used character cache
+from functools import partial # the detail loader a lazily loaded character carries
+
+
+# Where the character database lives
+STORE_PATH = os.path.join('DNP_Characters', 'Characters.sqlite3')
+
+# Where the old shelve based character storage lives (see migrateShelve())
+LEGACY_SHELF = os.path.join('DNP_Characters', 'Characters')
+
+# Bumped whenever the table layout changes
+# 1: one row per character with the whole character pickled in a 'data' column
+# 2: small fields are plain columns, the detail fields (see Character.DETAIL_DEFAULTS) are in character_details
+# 3: characters.modified (when each character was last written) and the sync_base table
+SCHEMA_VERSION = 3
+
+# A level column of NULL means the level has not been set yet (new characters show the "Not yet set..." text instead)
+# A backStory of NULL means it has not been set yet either
+_SCHEMA = [
+  '''CREATE TABLE IF NOT EXISTS characters (
+    name TEXT PRIMARY KEY,
+    race TEXT,
+    charClass TEXT,
+    gender TEXT,
+    age TEXT,
+    alignment TEXT,
+    level INTEGER,
+    gold TEXT,
+    abScores TEXT,
+    modified REAL
+  )''',
+  "CREATE INDEX IF NOT EXISTS characters_race ON characters(race)",
+  "CREATE INDEX IF NOT EXISTS characters_charClass ON characters(charClass)",
+  "CREATE INDEX IF NOT EXISTS characters_level ON characters(level)",
+  "CREATE INDEX IF NOT EXISTS characters_alignment ON characters(alignment)",
+  '''CREATE TABLE IF NOT EXISTS character_details (
+    name TEXT PRIMARY KEY,
+    backStory TEXT,
+    inventory TEXT,
+    sessGoals TEXT
+  )''',
+  '''CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+  )''',
+  '''CREATE TABLE IF NOT EXISTS sync_base (
+    peer TEXT,
+    name TEXT,
+    fields TEXT,
+    PRIMARY KEY (peer, name)
+  )''',
+]
+
+# The indexed version 1 tables that the version 2 layout replaces (see CharacterStore._upgrade())
+_V1_INDEXES = ["characters_race", "characters_charClass", "characters_level", "characters_alignment"]
+
+_SUMMARY_COLUMNS = "name, race, charClass, gender, age, alignment, level, gold, abScores"
+
+
+
+class _CharacterUnpickler(pickle.Unpickler):
+  '''
+  Characters pickled while the app was running as 'python DungeonsNPythons.py' remember their class as '__main__.Character'.
+  That only resolves inside the app itself, so anywhere else (DNP_Generator.py, DNP_Store.py --migrate, ...) we look the class up
+  in the engine (DNP_Engine.py, where Character lives now) instead.
+  '''
+
+  def find_class(self, module, name):
+    try:
+      return super().find_class(module, name)
+    except AttributeError:
+      if module != "__main__":
+        raise
+      import DNP_Engine # imported here because DNP_Engine itself imports this module
+      return getattr(DNP_Engine, name)
+
+
+def loadCharacter(data):
+  '''
+  EFFECTS: Returns the Character object pickled in `data` (bytes).
+
+  HELPS: CharacterStore._upgrade(), migrateShelve()
+  '''
+
+  return _CharacterUnpickler(io.BytesIO(data)).load()
+
+
+def _levelNumber(level):
+  '''
+  EFFECTS: Returns a character's level as an int for the indexed level column, or None if it has not been set yet
+  (new characters have the text "Not yet set..." as their level).
+
+  HELPS: _summaryRow()
+  '''
+
+  try:
+    return int(level)
+  except (TypeError, ValueError):
+    return None
+
+
+def _summaryRow(character):
+  '''
+  EFFECTS: Returns the characters table row for `character` (every field except the details).
+
+  HELPS: CharacterStore._write()
+  '''
+
+  c = character
+  return (c.name, c.race, c.charClass, c.gender, c.age, c.alignment, _levelNumber(c.level), c.gold, json.dumps(dict(c.abScores)))
+
+
+def _detailRow(character):
+  '''
+  EFFECTS: Returns the character_details table row for `character`. Reading the details loads them if they were not loaded yet,
+  so only call this for characters whose details are loaded (see CharacterStore._write()).
+
+  HELPS: CharacterStore._write()
+  '''
+
+  backStory = character.backStory
+  if backStory == type(character).DETAIL_DEFAULTS["backStory"]: # stored as NULL so the default text is not stored for every character
+    backStory = None
+  return (character.name, backStory, json.dumps(character.inventory), json.dumps(character.sessGoals))
+
+
+
+class CharacterStore:
+  '''
+  SQLite backed character storage. Behaves a lot like the old shelve: characters are keyed by name, `name in store` checks whether
+  a character exists and store.names() lists them in the order they were made.
+
+  get() only reads the small fields of a character. Its detail fields (backStory, inventory, sessGoals) are read from the database
+  the first time one of them is used, so opening a character just to look at its level or gold never reads its backstory.
+
+  The store keeps the most recently used characters in memory (an LRU cache of `cacheSize` characters), so opening a
+  character again is free. When `flushDelay` is given the store is "write-behind": save() only marks the character as changed (dirty)
+  and every dirty character is written to disk in one transaction `flushDelay` seconds later, when flush() is called, or when the store
+  is closed (the app also closes its store when python exits).
+  '''
+
+  def __init__(self, path=STORE_PATH, cacheSize=256, flushDelay=None, characterClass=None):
+    '''
+    EFFECTS: Opens (creating if needed) the character database at `path`. A version 1 database is upgraded to the current layout.
+
+    REQUIRES: cacheSize must be a non-negative integer. flushDelay (optional) is a number of seconds.
+    characterClass (optional) is the class characters are loaded as (DNP_Engine.Character by default).
+    '''
+
+    folder = os.path.dirname(path)
+    if folder:
+      os.makedirs(folder, exist_ok=True)
+
+    self.path = path
+    self.cacheSize = cacheSize
+    self.flushDelay = flushDelay
+    self.characterClass = characterClass
+
+    self._cache = OrderedDict() # name -> Character, least recently used first
+    self._dirty = set() # names of cached characters that have changes not written to disk yet
+    self._timer = None # pending write-behind flush
+    self._lock = threading.RLock() # the flush timer runs on its own thread, so every use of the connection/cache goes through this lock
+    self._listeners = [] # functions told about every save and delete (see listen())
+
+    self.connection = sqlite3.connect(path, check_same_thread=False)
+    self.connection.execute("PRAGMA journal_mode=WAL") # readers and the writer no longer block each other
+    self.connection.execute("PRAGMA synchronous=NORMAL") # safe with WAL, and far fewer disk flushes per commit
+
+    version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+    if version == 1:
+      self._upgrade()
+    elif version == 2:
+      with self.connection:
+        self.connection.execute("BEGIN")
+        self.connection.execute("ALTER TABLE characters ADD COLUMN modified REAL") # NULL (never) for characters written before version 3
+        for statement in _SCHEMA:
+          self.connection.execute(statement)
+        self.connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    elif version != SCHEMA_VERSION:
+      with self.connection:
+        self.connection.execute("BEGIN") # table creation is not started in a transaction automatically
+        for statement in _SCHEMA:
+          self.connection.execute(statement)
+        self.connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+
+  def _upgrade(self):
+    '''
+    EFFECTS: Rewrites a version 1 database (whole characters pickled in one column) in the current layout, in one transaction.
+
+    MODIFIES: Character database
+
+    IMPLEMENTATION SKETCH:
+      - Unpickle every character out of the old table (in the order they were saved)
+      - Drop the old table and its indexes and create the current tables
+      - Write the characters back in the same order, so names() lists them the same way as before
+    '''
+
+    characters = [loadCharacter(row[0]) for row in self.connection.execute("SELECT data FROM characters ORDER BY rowid")]
+    with self.connection:
+      self.connection.execute("BEGIN") # dropping and creating tables is not started in a transaction automatically
+      for index in _V1_INDEXES:
+        self.connection.execute(f"DROP INDEX IF EXISTS {index}")
+      self.connection.execute("DROP TABLE characters")
+      for statement in _SCHEMA:
+        self.connection.execute(statement)
+      self._write(characters)
+      self.connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *excInfo):
+    self.close()
+
+  def __contains__(self, name):
+    with self._lock:
+      if name in self._cache:
+        return True
+      return self.connection.execute("SELECT 1 FROM characters WHERE name = ?", (name,)).fetchone() is not None
+
+  def __len__(self):
+    return len(self.names())
+
+
+  def names(self):
+    '''
+    EFFECTS: Returns a list of every character name in the order the characters were saved (including new characters that are waiting to be written).
+    '''
+
+    with self._lock:
+      names = [row[0] for row in self.connection.execute("SELECT name FROM characters ORDER BY rowid")]
+      if self._dirty:
+        saved = set(names)
+        names += [name for name in self._cache if name in self._dirty and name not in saved]
+      return names
+
+
+  def find(self, race=None, charClass=None, level=None, alignment=None):
+    '''
+    EFFECTS: Returns (name, race, charClass, level, alignment) rows for every character matching all the filters given
+    (i.e. store.find(race="Elf", level=5)). Only the indexed columns are read, no character gets built.
+    Any changes waiting to be written are flushed first so the results are up to date.
+    '''
+
+    filters = []
+    values = []
+    for column, value in (("race", race), ("charClass", charClass), ("level", level), ("alignment", alignment)):
+      if value is not None:
+        filters.append(f"{column} = ?")
+        values.append(value)
+
+    where = (" WHERE " + " AND ".join(filters)) if filters else ""
+    with self._lock:
+      self.flush()
+      return self.connection.execute(f"SELECT name, race, charClass, level, alignment FROM characters{where} ORDER BY rowid", values).fetchall()
+
+
+  def summaries(self):
+    '''
+    EFFECTS: Returns (name, race, charClass, level, gold) for every character in the order they were saved (the same order as names()).
+    Only the small columns are read, so this is cheap enough to show next to every name in a menu. level is None if it has not been set yet.
+    '''
+
+    with self._lock:
+      self.flush()
+      return self.connection.execute("SELECT name, race, charClass, level, gold FROM characters ORDER BY rowid").fetchall()
+
+
+  def rosterRows(self, abilities):
+    '''
+    EFFECTS: Returns (name, race, charClass, level, gold, score, score, ...) for every character in the order they were saved, with one score
+    for each ability named in `abilities` (None for a score that was never assigned, and a level of None if it was never set).
+    These are all the numbers roster analytics need (see DNP_Roster.py), read without building any character.
+
+    IMPLEMENTATION SKETCH:
+      - Let SQLite pick each score out of the abScores JSON (json_extract), which is much faster than decoding the JSON in python
+      - Older SQLite builds without the JSON functions decode the JSON in python instead
+    '''
+
+    paths = [f'$."{ability}"' for ability in abilities]
+    with self._lock:
+      self.flush()
+      try:
+        scores = "".join(", json_extract(abScores, ?)" for ability in abilities)
+        return self.connection.execute(f"SELECT name, race, charClass, level, gold{scores} FROM characters ORDER BY rowid", paths).fetchall()
+      except sqlite3.OperationalError: # no JSON functions in this SQLite
+        rows = self.connection.execute("SELECT name, race, charClass, level, gold, abScores FROM characters ORDER BY rowid").fetchall()
+
+    results = []
+    for row in rows:
+      scores = json.loads(row[5]) or {}
+      results.append(row[:5] + tuple(scores.get(ability) for ability in abilities))
+    return results
+
+
+  def listen(self, listener):
+    '''
+    EFFECTS: From now on listener(name, character) is called every time a character is saved (straight away, even in write-behind mode),
+    and listener(name, None) every time one is deleted. This is how a DNP_Roster.Roster stays up to date.
+    '''
+
+    self._listeners.append(listener)
+
+
+  def _tell(self, name, character):
+    '''
+    EFFECTS: Tells every listener that `character` was saved as `name` (or that it was deleted, when character is None). By now the change
+    is already in the database, so a listener that fails only gets a message printed: it can not undo the save, and the other listeners
+    (and the rest of a saveMany()) still have to hear about it.
+
+    HELPS: save(), saveMany(), delete()
+    '''
+
+    for listener in self._listeners:
+      try:
+        listener(name, character)
+      except Exception as error:
+        print(f"A character store listener failed on {name!r}: {error!r}", file=sys.stderr)
+
+
+  def get(self, name):
+    '''
+    EFFECTS: Returns the Character called `name`. Raises KeyError if there is no such character.
+    Recently used characters come straight from the cache (the very same object), without touching the disk.
+    Otherwise only the small fields are read now; the detail fields are read the first time one of them is used.
+    '''
+
+    with self._lock:
+      if name in self._cache:
+        self._cache.move_to_end(name) # now the most recently used
+        return self._cache[name]
+
+      row = self.connection.execute(f"SELECT {_SUMMARY_COLUMNS} FROM characters WHERE name = ?", (name,)).fetchone()
+      if row is None:
+        raise KeyError(name)
+      character = self._build(row)
+      self._remember(character)
+      return character
+
+
+  def records(self):
+    '''
+    EFFECTS: Returns (record, modified) for every character in the order they were saved, where record is what Character.toRecord() gives
+    and modified is when the character was last written (a time.time() value, or 0 if it was written before the store kept track).
+    Everything is read in one query, which is what lets DNP_Sync.py compare whole rosters cheaply.
+    '''
+
+    with self._lock:
+      self.flush()
+      rows = self.connection.execute(
+        f"SELECT {', '.join('c.' + column for column in _SUMMARY_COLUMNS.split(', '))}, c.modified, d.backStory, d.inventory, d.sessGoals "
+        "FROM characters c LEFT JOIN character_details d ON d.name = c.name ORDER BY c.rowid").fetchall()
+
+    results = []
+    for row in rows:
+      character = self._build(row[:9])
+      del character._detailLoader # the details came with the row
+      for detail, value in self._details(row[10:]).items():
+        setattr(character, detail, value)
+      results.append((character.toRecord(), row[9] or 0))
+    return results
+
+
+  def syncBase(self, peer):
+    '''
+    EFFECTS: Returns {name: {field: hash}} saved by setSyncBase() for the roster called `peer` (see DNP_Sync.py).
+    '''
+
+    with self._lock:
+      rows = self.connection.execute("SELECT name, fields FROM sync_base WHERE peer = ?", (peer,)).fetchall()
+    return {name: json.loads(fields) for name, fields in rows}
+
+
+  def setSyncBase(self, peer, bases):
+    '''
+    EFFECTS: Remembers, for every name in `bases` ({name: {field: hash}}), what that character looked like when it was last synced with
+    the roster called `peer`, in one transaction.
+
+    MODIFIES: Character database
+    '''
+
+    with self._lock:
+      with self.connection:
+        self.connection.executemany("INSERT OR REPLACE INTO sync_base (peer, name, fields) VALUES (?, ?, ?)",
+                                    [(peer, name, json.dumps(fields)) for name, fields in bases.items()])
+
+
+  def _build(self, row):
+    '''
+    EFFECTS: Returns a Character made from a characters table row, with a loader in place of its detail fields.
+
+    HELPS: get(), records()
+
+    IMPLEMENTATION SKETCH:
+      - Make the character without calling __init__ (like unpickling does) and fill in the summary columns
+      - Leave a loader for the detail fields that Character.__getattr__ calls the first time one of them is used
+    '''
+
+    if self.characterClass is None:
+      from DNP_Engine import Character # imported here because DNP_Engine itself imports this module
+      self.characterClass = Character
+
+    name, race, charClass, gender, age, alignment, level, gold, abScores = row
+    character = self.characterClass.__new__(self.characterClass)
+    character.name = name
+    character.race = race
+    character.charClass = charClass
+    character.gender = gender
+    character.age = age
+    character.alignment = alignment
+    character.level = level # None shows the class default ("Not yet set...")
+    character.gold = gold
+    character.abScores = json.loads(abScores)
+    character._detailLoader = partial(self._loadDetails, name)
+    return character
+
+
+  def _loadDetails(self, name):
+    '''
+    EFFECTS: Returns {attribute: value} for the detail fields saved for the character called `name`.
+    Details that were never set are left out so the character shows its default for them.
+
+    HELPS: Character.__getattr__ (through the loader _build() leaves on each character)
+    '''
+
+    with self._lock:
+      row = self.connection.execute("SELECT backStory, inventory, sessGoals FROM character_details WHERE name = ?", (name,)).fetchone()
+    return self._details(row)
+
+
+  def _details(self, row):
+    '''
+    EFFECTS: Returns {attribute: value} for a (backStory, inventory, sessGoals) character_details row (None, or all None, when there is no row).
+
+    HELPS: _loadDetails(), records()
+    '''
+
+    if row is None or row[1] is None:
+      return {}
+
+    backStory, inventory, sessGoals = row
+    details = {"inventory": json.loads(inventory), "sessGoals": json.loads(sessGoals)}
+    if backStory is not None:
+      details["backStory"] = backStory
+    return details
+
+
+  def save(self, character):
+    '''
+    EFFECTS: Saves `character` (replacing any saved character with the same name). In write-behind mode the character is only marked
+    as dirty here and written at the next flush; otherwise it is written straight away.
+
+    MODIFIES: Character database
+    '''
+
+    if self.flushDelay is None:
+      self.saveMany([character])
+      return
+
+    with self._lock:
+      self._dirty.add(character.name) # marked first so that, if the cache is tiny, _remember() writes it instead of dropping it
+      self._remember(character)
+      self._scheduleFlush()
+      self._tell(character.name, character)
+
+
+  def saveMany(self, characters, meta=None):
+    '''
+    EFFECTS: Saves every character in `characters` in a single transaction: either they are all saved or (if something goes wrong) none are.
+    These are always written straight away (bulk saves do not go through the cache, but a cached character with the same name is replaced
+    so get() does not keep handing out the old one). `meta` ({key: value}, see setMeta()) is saved in the same transaction, i.e. to keep
+    track of how far a character share has got; a key whose value is None is deleted instead.
+
+    MODIFIES: Character database
+    '''
+
+    characters = list(characters)
+    with self._lock:
+      with self.connection:
+        self._write(characters)
+        if meta:
+          self.connection.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                      [(key, value) for key, value in meta.items() if value is not None])
+          self.connection.executemany("DELETE FROM meta WHERE key = ?", [(key,) for key, value in meta.items() if value is None])
+      for character in characters:
+        if character.name in self._cache:
+          self._cache[character.name] = character
+          self._dirty.discard(character.name) # just written
+        self._tell(character.name, character)
+
+
+  def _write(self, characters):
+    '''
+    EFFECTS: Writes `characters` inside the caller's transaction. A character whose details were never loaded can not have changed them,
+    so only its summary row is written.
+
+    HELPS: saveMany(), flush(), _remember(), _upgrade()
+    '''
+
+    # An upsert (rather than INSERT OR REPLACE) keeps a resaved character's rowid, so names() keeps listing characters in the order they were made
+    modified = time.time()
+    self.connection.executemany(
+      f"INSERT INTO characters ({_SUMMARY_COLUMNS}, modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+      "ON CONFLICT(name) DO UPDATE SET race=excluded.race, charClass=excluded.charClass, gender=excluded.gender, age=excluded.age, "
+      "alignment=excluded.alignment, level=excluded.level, gold=excluded.gold, abScores=excluded.abScores, modified=excluded.modified",
+      [_summaryRow(c) + (modified,) for c in characters])
+    self.connection.executemany(
+      "INSERT OR REPLACE INTO character_details (name, backStory, inventory, sessGoals) VALUES (?, ?, ?, ?)",
+      [_detailRow(c) for c in characters if c.detailsLoaded()])
+
+
+  def delete(self, name):
+    '''
+    EFFECTS: Permanently deletes the character called `name` (straight away, even in write-behind mode). Raises KeyError if there is no such character.
+
+    MODIFIES: Character database
+    '''
+
+    with self._lock:
+      wasCached = self._cache.pop(name, None) is not None
+      wasDirty = name in self._dirty
+      self._dirty.discard(name)
+      with self.connection:
+        deleted = self.connection.execute("DELETE FROM characters WHERE name = ?", (name,)).rowcount
+        self.connection.execute("DELETE FROM character_details WHERE name = ?", (name,))
+        self.connection.execute("DELETE FROM sync_base WHERE name = ?", (name,))
+      if deleted == 0 and not (wasCached and wasDirty):
+        raise KeyError(name)
+      self._tell(name, None)
+
+
+  def flush(self):
+    '''
+    EFFECTS: Writes every dirty (changed but not yet written) character to disk in one transaction.
+
+    MODIFIES: Character database
+    '''
+
+    with self._lock:
+      if self._timer is not None:
+        self._timer.cancel()
+        self._timer = None
+      if not self._dirty:
+        return
+      with self.connection:
+        self._write([self._cache[name] for name in self._dirty]) # listeners already heard about these when they were saved
+      self._dirty.clear()
+
+
+  def _remember(self, character):
+    '''
+    EFFECTS: Puts `character` in the cache as the most recently used one, pushing out the least recently used characters if the cache is full.
+    A dirty character that gets pushed out is written to disk first so its changes are not lost.
+
+    HELPS: get(), save()
+    '''
+
+    self._cache[character.name] = character
+    self._cache.move_to_end(character.name)
+
+    while len(self._cache) > self.cacheSize:
+      name, oldest = next(iter(self._cache.items()))
+      if name in self._dirty:
+        with self.connection:
+          self._write([oldest])
+        self._dirty.discard(name)
+      del self._cache[name]
+
+
+  def _scheduleFlush(self):
+    '''
+    EFFECTS: Starts the write-behind timer (unless one is already waiting) that flushes dirty characters flushDelay seconds from now.
+
+    HELPS: save()
+    '''
+
+    if self._timer is None:
+      self._timer = threading.Timer(self.flushDelay, self.flush)
+      self._timer.daemon = True # never keep python running just to flush, close() and the app's exit handler take care of that
+      self._timer.start()
+
+
+  def getMeta(self, key, default=None):
+    '''
+    EFFECTS: Returns a bookkeeping value the store keeps about itself (i.e. whether the old shelve has been migrated yet).
+    '''
+
+    with self._lock:
+      row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return default if row is None else row[0]
+
+
+  def setMeta(self, key, value):
+    '''
+    EFFECTS: Saves a bookkeeping value about the store (see getMeta()).
+    '''
+
+    with self._lock:
+      with self.connection:
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+  def close(self):
+    '''
+    EFFECTS: Flushes any dirty characters and closes the database. Closing an already closed store does nothing.
+    '''
+
+    with self._lock:
+      if self.connection is None:
+        return
+      self.flush()
+      self.connection.close()
+      self.connection = None
+      self._cache.clear()
+
+
+
+def migrateShelve(store, shelfPath=LEGACY_SHELF):
+  '''
+  EFFECTS: Copies every character from the old shelve file at `shelfPath` into `store` (in one transaction) and returns how many were copied.
+  Characters whose name is already in the store are left alone. The old shelve file itself is not changed.
+
+  MODIFIES: Character database
+
+  IMPLEMENTATION SKETCH:
+    - If there is no shelve file at shelfPath there is nothing to do
+    - Read every pickled character straight out of the dbm file underneath the shelve and unpickle it (remapping '__main__.Character')
+    - Save all the characters that are not in the store yet with saveMany()
+  '''
+
+  import dbm, shelve # imported here, only the one-off migration reads shelve files
+
+  if not dbm.whichdb(shelfPath):
+    return 0
+
+  shelfFile = shelve.open(shelfPath, flag='r')
+  try:
+    # shelfFile.dict is the raw dbm database: keys are encoded names and values are the pickled characters
+    characters = [loadCharacter(shelfFile.dict[key]) for key in shelfFile.dict.keys() if key.decode(shelfFile.keyencoding) not in store]
+  finally:
+    shelfFile.close()
+
+  store.saveMany(characters)
+  return len(characters)
+
+
+
+if __name__ == "__main__":
+  # python DNP_Store.py --migrate [path to old shelve]
+  if len(sys.argv) >= 2 and sys.argv[1] == "--migrate":
+    with CharacterStore() as characterStore:
+      copied = migrateShelve(characterStore, sys.argv[2] if len(sys.argv) > 2 else LEGACY_SHELF)
+    print(f"Copied {copied} characters into {STORE_PATH}")
+  else:
+    print("usage: python DNP_Store.py --migrate [path to old shelve]")
@@ -0,0 +1,373 @@
+# Code author: Patrick Woolard
+# Email: Jwoolard@augusta.edu
+# Github: https://github.com/JwoolardAU/DungeonsNPythons
+
+
+'''
+Delta sync between two character rosters for Dungeons & Pythons.
+
+Players and the DM each keep their own copy of the same characters, and those copies drift apart every session (gold, inventory,
+session goals...). Sending whole characters again does not help: the receiver already has a character with that name. A sync instead
+compares the two rosters and only moves what changed:
+
+  - every field of every character is hashed (a short blake2b digest of the field's JSON), a character's field hashes are hashed again
+    into one character hash, and the characters are spread over "buckets" (by name) that each get one hash of their characters' hashes
+  - the starting side sends only its bucket hashes, the other side answers with the character hashes in just the buckets that differ,
+    and field hashes are only asked for the characters that differ, so a mostly unchanged roster costs a few kilobytes however big it is
+  - only the changed fields are then sent, in whichever direction they need to go
+
+To tell "they changed it" from "I changed it", each store remembers the field hashes every character had the last time it was synced
+with that other roster (its "base", kept per roster in the store's sync_base table). For each field that differs:
+  - only one side differs from the base: that side's value wins
+  - both sides changed it: with LAST_WRITER_WINS the side whose character was written last wins, with REPORT_CONFLICTS the field is left
+    alone on both sides and reported (and stays a conflict until one side changes it to match)
+A character only one side has is copied to the other. Deleting a character is not synced (it just gets copied back next time).
+Once a sync is done both rosters match (apart from conflicts), so each side works out its own new base, it is never sent.
+
+Protocol (every message is JSON in a sync frame, see DNP_Share.py), started by the user who calls syncWith():
+  1. starter -> other:  {"store": id, "buckets": [bucket hash, ...]}
+  2. other -> starter:  {"store": id, "buckets": [numbers of the buckets that differ], "hashes": {name: character hash}}  (in those buckets)
+  3. starter -> other:  {"fields": [names both have whose character hashes differ]}
+  4. other -> starter:  {"characters": {name: {"fields": {field: hash}, "modified": time}}}
+  5. starter -> other:  {"push": {name: {field: value}}, "pull": {name: [fields]}, "conflicts": {name: [fields]}}
+  6. other -> starter:  {"values": {name: {field: value}}, "saved": [names], "rejected": [reasons]}
+The other side answers syncs through the share server (see DNP_ShareServer.py), so a DM collecting characters can be synced with too.
+'''
+
+
+import hashlib # field, character and bucket hashes
+import json # hashing a field hashes its JSON, and sync messages are JSON
+import uuid # every store gets its own sync id
+
+from DNP_Share import FRAME_SYNC, HEADER_SIZE, ShareError, FrameReader, sendFrame, encodeJSON, decodeJSON
+from DNP_Engine import Character
+
+
+# What to do with a field both sides changed since they last synced
+LAST_WRITER_WINS = "lastWriterWins"
+REPORT_CONFLICTS = "report"
+
+# Every field of a character record except its name (see Character.toRecord()), in the order they are hashed
+FIELDS = ("race", "charClass", "gender", "age", "alignment", "level", "gold", "abScores", "backStory", "inventory", "sessGoals")
+
+# Bytes in a field, character or bucket hash
+HASH_SIZE = 8
+
+# About this many characters share a bucket, with never more than MAX_BUCKETS buckets
+BUCKET_SIZE = 4
+MAX_BUCKETS = 4096
+
+
+
+def hashField(value):
+  '''
+  EFFECTS: Returns the hash (hex text) of one record field's value.
+  '''
+
+  return hashlib.blake2b(json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8"), digest_size=HASH_SIZE).hexdigest()
+
+
+def hashCharacter(fieldHashes):
+  '''
+  EFFECTS: Returns the hash (hex text) of a whole character from its {field: hash} (two characters have the same hash when every field matches).
+  '''
+
+  return hashlib.blake2b("".join(fieldHashes.get(field, "") for field in FIELDS).encode("ascii"), digest_size=HASH_SIZE).hexdigest()
+
+
+def bucketOf(name, buckets):
+  '''
+  EFFECTS: Returns which of `buckets` buckets the character called `name` goes in (the same on both sides of a sync).
+  '''
+
+  return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=4).digest(), "big") % buckets
+
+
+def storeId(store):
+  '''
+  EFFECTS: Returns the sync id of `store`, making one the first time (this is how the other side knows which base to compare against).
+
+  MODIFIES: store (the first time only)
+  '''
+
+  identity = store.getMeta("syncId")
+  if identity is None:
+    identity = uuid.uuid4().hex
+    store.setMeta("syncId", identity)
+  return identity
+
+
+def _broken():
+  '''
+  EFFECTS: Returns the ShareError for a sync message that is not shaped the way the protocol says.
+  '''
+
+  return ShareError("received a broken sync message")
+
+
+
+class RosterState:
+  '''
+  What one side of a sync knows about its own roster: every character's record, field hashes, character hash and when it was last written,
+  all read from the store in one go (see CharacterStore.records()). Most methods make (or answer) one message of the protocol.
+  '''
+
+  def __init__(self, store):
+    '''
+    EFFECTS: Reads and hashes every character in `store`.
+    '''
+
+    self.id = storeId(store)
+    self.records = {}
+    self.fields = {}
+    self.hashes = {}
+    self.modified = {}
+    for record, modified in store.records():
+      name = record["name"]
+      fields = {field: hashField(record[field]) for field in FIELDS}
+      self.records[name] = record
+      self.fields[name] = fields
+      self.hashes[name] = hashCharacter(fields)
+      self.modified[name] = modified
+
+
+  def buckets(self, count):
+    '''
+    EFFECTS: Returns a list of `count` lists, the names of the characters in each bucket.
+    '''
+
+    buckets = [[] for bucket in range(count)]
+    for name in self.records:
+      buckets[bucketOf(name, count)].append(name)
+    return buckets
+
+
+  def bucketHash(self, names):
+    '''
+    EFFECTS: Returns the hash of a bucket holding the characters called `names`.
+    '''
+
+    text = "".join(f"{name}:{self.hashes[name]}," for name in sorted(names))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=HASH_SIZE).hexdigest()
+
+
+  def hello(self):
+    '''
+    EFFECTS: Returns message 1 (see the module docstring).
+    '''
+
+    count = min(MAX_BUCKETS, max(1, len(self.records) // BUCKET_SIZE))
+    return {"store": self.id, "buckets": [self.bucketHash(names) for names in self.buckets(count)]}
+
+
+  def answerHello(self, hello):
+    '''
+    EFFECTS: Returns message 2 for the starter's message 1 `hello`. Raises ShareError if `hello` is not a sync hello.
+    '''
+
+    try:
+      theirs = hello["buckets"]
+      buckets = self.buckets(len(theirs))
+      differ = [bucket for bucket, names in enumerate(buckets) if self.bucketHash(names) != theirs[bucket]]
+    except (KeyError, TypeError, IndexError, ValueError, ZeroDivisionError):
+      raise _broken() from None
+    return {"store": self.id, "buckets": differ, "hashes": {name: self.hashes[name] for bucket in differ for name in buckets[bucket]}}
+
+
+  def askFields(self, hello, answer):
+    '''
+    EFFECTS: Returns message 3 for the other side's message 2 `answer` (`hello` being the message 1 we sent).
+    '''
+
+    try:
+      differ = set(answer["buckets"])
+      theirs = answer["hashes"]
+      count = len(hello["buckets"])
+      return {"fields": [name for name in self.records if bucketOf(name, count) in differ and name in theirs and theirs[name] != self.hashes[name]]}
+    except (KeyError, TypeError):
+      raise _broken() from None
+
+
+  def answerFields(self, ask):
+    '''
+    EFFECTS: Returns message 4 for the starter's message 3 `ask`.
+    '''
+
+    try:
+      return {"characters": {name: {"fields": self.fields[name], "modified": self.modified[name]} for name in ask["fields"] if name in self.records}}
+    except (KeyError, TypeError):
+      raise _broken() from None
+
+
+  def plan(self, hello, answer, details, base, policy=LAST_WRITER_WINS):
+    '''
+    EFFECTS: Returns message 5 (what to push, pull and report) from the other side's messages 2 `answer` and 4 `details` (`hello` being
+    the message 1 we sent), given `base` ({name: {field: hash}} as of the last sync with that side, see CharacterStore.syncBase()).
+    Raises ShareError if the messages are not shaped like sync messages.
+    '''
+
+    push = {}
+    pull = {}
+    conflicts = {}
+
+    try:
+      differ = set(answer["buckets"])
+      count = len(hello["buckets"])
+      theirHashes = answer["hashes"]
+
+      for name in theirHashes:
+        if name not in self.records: # only they have it
+          pull[name] = list(FIELDS)
+      for name in self.records:
+        if bucketOf(name, count) in differ and name not in theirHashes: # only we have it
+          push[name] = {field: self.records[name][field] for field in FIELDS}
+
+      for name, theirs in details["characters"].items():
+        if name not in self.records:
+          continue
+        mine = self.fields[name]
+        old = base.get(name, {})
+        for field in FIELDS:
+          ours, their = mine[field], theirs["fields"].get(field)
+          if ours == their:
+            continue
+
+          if ours == old.get(field): # only they changed it
+            take = "pull"
+          elif their == old.get(field): # only we changed it
+            take = "push"
+          elif policy == LAST_WRITER_WINS: # both changed it, the newest character wins
+            take = "push" if self.modified[name] >= theirs["modified"] else "pull"
+          else:
+            conflicts.setdefault(name, []).append(field)
+            continue
+
+          if take == "pull":
+            pull.setdefault(name, []).append(field)
+          else:
+            push.setdefault(name, {})[field] = self.records[name][field]
+    except (KeyError, TypeError, AttributeError):
+      raise _broken() from None
+
+    return {"push": push, "pull": pull, "conflicts": conflicts}
+
+
+  def merge(self, updates):
+    '''
+    EFFECTS: Returns (characters, rejected): a Character for every {name: {field: value}} in `updates` with those fields changed (or a new
+    character for a name this roster does not have), and the reasons for any update that does not make a valid character.
+    '''
+
+    characters = []
+    rejected = []
+    for name, fields in updates.items():
+      record = dict(self.records.get(name, {}))
+      try:
+        record.update({field: value for field, value in fields.items() if field in FIELDS})
+        record["name"] = name
+        characters.append(Character.fromRecord(record))
+      except (ValueError, TypeError, AttributeError) as error:
+        rejected.append(f"{name}: {error}")
+    return characters, rejected
+
+
+  def values(self, pull):
+    '''
+    EFFECTS: Returns {name: {field: value}} for the fields the other side asked for in message 5's "pull".
+    '''
+
+    try:
+      return {name: {field: self.records[name][field] for field in fields if field in FIELDS} for name, fields in pull.items() if name in self.records}
+    except (TypeError, AttributeError):
+      raise _broken() from None
+
+
+  def newBase(self, base, saved, conflicts, skip=()):
+    '''
+    EFFECTS: Returns {name: {field: hash}} for every character whose base for the other side has to change once a sync is done, given
+    the old `base`, the characters this side `saved` during the sync, the fields left alone (message 5's "conflicts") and the names to
+    `skip` because they may still differ. A conflicting field keeps its old base, so it stays a conflict.
+    '''
+
+    saved = {character.name: character for character in saved}
+    bases = {}
+    for name in self.records.keys() | saved.keys():
+      if name in skip:
+        continue
+      if name in saved:
+        record = saved[name].toRecord()
+        fields = {field: hashField(record[field]) for field in FIELDS}
+      else:
+        fields = dict(self.fields[name])
+      old = base.get(name, {})
+      for field in conflicts.get(name, ()):
+        if field in old:
+          fields[field] = old[field]
+        else:
+          fields.pop(field, None)
+      if old != fields:
+        bases[name] = fields
+    return bases
+
+
+
+def syncWith(connection, store, policy=LAST_WRITER_WINS):
+  '''
+  EFFECTS: Syncs `store` with the roster of the user at the other end of `connection` (who is receiving characters, see DNP_ShareServer.py)
+  and returns a report:
+    {"pushed": [names changed or added on their side], "pulled": [names changed or added on ours],
+     "conflicts": {name: [fields both sides changed, left alone]}, "rejected": [reasons for changes that were not valid characters],
+     "bytes": how many bytes the whole sync took over the network}
+  Raises ShareError (or OSError) if the sync breaks off part way, in which case nothing has been saved on our side.
+
+  MODIFIES: store
+
+  IMPLEMENTATION SKETCH:
+    - Send our bucket hashes, read back the character hashes in the buckets that differ
+    - Ask for the field hashes of just the characters that differ
+    - Work out what to push and pull from our base for their roster, send that along with the pushed values
+    - Read back the pulled values and save them (in one transaction), then remember the new base for their roster
+  '''
+
+  state = RosterState(store)
+  reader = FrameReader(connection)
+  sent = 0
+
+  def exchange(message):
+    nonlocal sent
+    payload = encodeJSON(message)
+    sendFrame(connection, FRAME_SYNC, payload)
+    sent += HEADER_SIZE + len(payload)
+    frameType, payload = reader.read()
+    if frameType != FRAME_SYNC:
+      raise ShareError(f"expected a sync answer but the other user sent frame type {frameType}")
+    sent += HEADER_SIZE + len(payload)
+    answer = decodeJSON(payload)
+    if not isinstance(answer, dict):
+      raise _broken()
+    return answer
+
+  hello = state.hello()
+  answer = exchange(hello)
+  peer = answer.get("store")
+  if not isinstance(peer, str):
+    raise _broken()
+  details = exchange(state.askFields(hello, answer))
+  base = store.syncBase(peer)
+  plan = state.plan(hello, answer, details, base, policy)
+  result = exchange(plan)
+
+  try:
+    characters, rejected = state.merge(result["values"])
+    saved = set(result["saved"])
+    rejected += result["rejected"]
+  except (KeyError, TypeError, AttributeError):
+    raise _broken() from None
+  store.saveMany(characters)
+
+  pulled = {character.name for character in characters}
+  skip = {name for name in plan["push"] if name not in saved} | {name for name in plan["pull"] if name not in pulled}
+  store.setSyncBase(peer, state.newBase(base, characters, plan["conflicts"], skip))
+
+  return {"pushed": [name for name in plan["push"] if name in saved], "pulled": [name for name in plan["pull"] if name in pulled],
+          "conflicts": plan["conflicts"], "rejected": rejected, "bytes": sent}
@@ -0,0 +1,325 @@
+# Code author: Patrick Woolard
+# Email: Jwoolard@augusta.edu
+# Github: https://github.com/JwoolardAU/DungeonsNPythons
+
+
+'''
+On-disk cache for the web pages Dungeons & Pythons scrapes.
+
+Character creation shows some information scraped off the internet (i.e. how long the picked race lives, see ageAssignment()), and it used
+to download the whole page every time, even when the last character was the same race a minute ago. WebCache keeps every page it downloads
+in an SQLite database next to the characters ('DNP_Characters/WebCache.sqlite3'), and pages used this session in memory too:
+
+  - a page younger than its time to live (CACHE_TTL) is used straight from the cache, the network is never touched
+  - an older page is revalidated: it is asked for again with the ETag / Last-Modified the website sent with it, and if the website
+    answers "304 Not Modified" only the page's age is reset (nothing is downloaded again)
+  - if the website can not be reached, an older page is still used (old information beats none), only a page that was never cached fails
+  - in offline mode the network is never used at all, every page comes from the cache however old it is
+  - a download started in the background can be cancelled part way (see get()), i.e. when the user changes their mind
+  - many pages can be cached in one go (see warm()): they are downloaded several at a time over a pool of kept-alive connections, and a
+    download the website drops or is too busy for is tried again a little later, so warming up a new install takes about as long as
+    the slowest page instead of every page one after the other
+
+From the shell:   python DNP_WebCache.py --clear    (forgets every cached page)
+                  python DNP_Reference.py --warm    (caches every race and class page, see DNP_Reference.py)
+'''
+
+
+import os # file/folder control operations
+import sqlite3 # the cache database
+import sys # command line arguments
+import threading # pages can be fetched from a background thread while the user is typing (see the lock in WebCache)
+import time # how old each cached page is
+
+# requests (downloading the pages) is only imported once a page really has to be downloaded, so a cache that every page comes out of
+# (and importing this module) never waits for it. concurrent.futures (which loads logging) is only imported by warm()
+
+
+# Where the cache database lives
+WEB_CACHE_PATH = os.path.join('DNP_Characters', 'WebCache.sqlite3')
+
+# How long (in seconds) a cached page is used before it is revalidated with the website. The pages scraped hardly ever change
+CACHE_TTL = 7 * 24 * 60 * 60
+
+# How long (in seconds) to wait for the website before giving up on it
+FETCH_TIMEOUT = 10
+
+# Pages are downloaded this many bytes at a time, a cancelled download stops at the next piece
+DOWNLOAD_CHUNK_SIZE = 16 * 1024
+
+# How many pages warm() downloads at the same time (also how many connections to a website are kept open for reuse)
+WARM_WORKERS = 10
+
+# warm() tries a download again this many times when the website can not be reached or is too busy (429 or 5xx), waiting DOWNLOAD_BACKOFF
+# seconds before the first retry and twice as long before each one after that
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_BACKOFF = 0.25
+
+# Answers from a website that mean "try again later"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_SCHEMA = '''CREATE TABLE IF NOT EXISTS pages (
+  url TEXT PRIMARY KEY,
+  body BLOB,
+  encoding TEXT,
+  etag TEXT,
+  lastModified TEXT,
+  fetched REAL
+)'''
+
+
+
+class OfflineError(Exception):
+  '''
+  Raised when a page is asked for in offline mode (or the website can not be reached) and it was never cached.
+  '''
+
+
+
+class FetchCancelled(Exception):
+  '''
+  Raised when a page's download is cancelled before it finished (see WebCache.get()).
+  '''
+
+
+
+class WebCache:
+  '''
+  Downloads web pages through an on-disk cache (see the module docstring). Safe to use from more than one thread.
+  '''
+
+  def __init__(self, path=WEB_CACHE_PATH, ttl=CACHE_TTL, offline=False, timeout=FETCH_TIMEOUT):
+    '''
+    EFFECTS: Opens (or makes) the cache database at `path`, making its folder if it does not exist yet. Cached pages are used for `ttl`
+    seconds before they are revalidated, downloads give up after `timeout` seconds, and with offline=True the network is never used.
+    '''
+
+    folder = os.path.dirname(path)
+    if folder:
+      os.makedirs(folder, exist_ok=True)
+    self.path = path
+    self.ttl = ttl
+    self.offline = offline
+    self.timeout = timeout
+
+    self._connection = sqlite3.connect(path, check_same_thread=False)
+    self._connection.execute("PRAGMA journal_mode=WAL")
+    self._connection.execute(_SCHEMA)
+    self._connection.commit()
+    self._lock = threading.RLock() # the connection and the memory cache are shared by every thread using the cache
+    self._memory = {} # url: (text, fetched, etag, lastModified) of every page used this session
+    self._session = None # one requests.Session for every download, so the connection to the website is reused
+    self.stats = {"memory": 0, "disk": 0, "revalidated": 0, "downloaded": 0, "stale": 0} # where each page came from
+
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *excInfo):
+    self.close()
+
+
+  def get(self, url, cancel=None):
+    '''
+    EFFECTS: Returns the text of the web page at `url`, from the cache when it can (see the module docstring). Raises OfflineError if it
+    is not cached and can not be downloaded (offline, or the website can not be reached), and requests.HTTPError if the website answers
+    with an error for a page that was never cached. If the threading.Event `cancel` is set while the page is being downloaded, the download
+    stops and FetchCancelled is raised (nothing is cached).
+
+    MODIFIES: the cache
+
+    IMPLEMENTATION SKETCH:
+      - Use the page from memory, or else from the database, if it is younger than ttl (or we are offline)
+      - Otherwise ask the website for it, sending the cached page's ETag / Last-Modified so an unchanged page is answered with 304
+      - Keep a downloaded page (and its new ETag / Last-Modified), or just reset the age of one that was not modified
+      - If the website can not be reached or answers with an error, fall back on the old cached page if there is one
+    '''
+
+    with self._lock:
+      entry = self._memory.get(url)
+      if entry is not None:
+        self.stats["memory"] += 1
+      else:
+        row = self._connection.execute("SELECT body, encoding, fetched, etag, lastModified FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is not None:
+          self.stats["disk"] += 1
+          entry = (self._decode(row[0], row[1]),) + row[2:]
+          self._memory[url] = entry
+
+    if entry is not None and (self.offline or time.time() - entry[1] < self.ttl):
+      return entry[0]
+    if self.offline:
+      raise OfflineError(f"{url} has not been cached and the cache is offline")
+    if cancel is not None and cancel.is_set():
+      raise FetchCancelled(f"the download of {url} was cancelled")
+    return self._download(url, entry, cancel)
+
+
+  def _download(self, url, entry, cancel):
+    '''
+    EFFECTS: Asks the website for the page at `url` and returns its text. If `entry` holds an older cached copy of it ((text, fetched,
+    etag, lastModified)) the request is conditional, and that copy is used if the website answers 304 or can not be reached.
+    Raises FetchCancelled if `cancel` gets set first.
+
+    HELPS: get()
+    '''
+
+    import requests
+
+    headers = {}
+    if entry is not None:
+      if entry[2]:
+        headers["If-None-Match"] = entry[2]
+      if entry[3]:
+        headers["If-Modified-Since"] = entry[3]
+
+    try:
+      with self._getSession().get(url, headers=headers, timeout=self.timeout, stream=True) as response: # streamed, so it can be cancelled
+        if response.status_code != 304:
+          response.raise_for_status()
+        body = bytearray()
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+          if cancel is not None and cancel.is_set():
+            raise FetchCancelled(f"the download of {url} was cancelled")
+          body += chunk
+    except requests.RequestException as error:
+      if entry is None:
+        if isinstance(error, requests.HTTPError):
+          raise
+        raise OfflineError(f"{url} has not been cached and could not be downloaded ({error})") from None
+      with self._lock:
+        self.stats["stale"] += 1
+      return entry[0] # an old page beats no page
+
+    now = time.time()
+    with self._lock:
+      if response.status_code == 304 and entry is not None: # not modified, only its age changes
+        self.stats["revalidated"] += 1
+        entry = (entry[0], now, entry[2], entry[3])
+        self._connection.execute("UPDATE pages SET fetched = ? WHERE url = ?", (now, url))
+      else:
+        self.stats["downloaded"] += 1
+        encoding = response.encoding or "utf-8" # what the website said the page is encoded with
+        entry = (self._decode(bytes(body), encoding), now, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        self._connection.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                                 (url, bytes(body), encoding, entry[2], entry[3], now))
+      self._connection.commit()
+      self._memory[url] = entry
+    return entry[0]
+
+
+  def _getSession(self):
+    '''
+    EFFECTS: Returns the requests.Session every download goes through (made the first time), with a pool of up to WARM_WORKERS kept-alive
+    connections per website so downloads from several threads at once each reuse one.
+
+    HELPS: _download()
+    '''
+
+    import requests
+
+    with self._lock:
+      if self._session is None:
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=WARM_WORKERS, pool_maxsize=WARM_WORKERS)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+      return self._session
+
+
+  def warm(self, urls, workers=WARM_WORKERS, retries=DOWNLOAD_RETRIES, backoff=DOWNLOAD_BACKOFF):
+    '''
+    EFFECTS: Makes sure every page in `urls` is cached and up to date (see get()), downloading up to `workers` of them at the same time.
+    A download that fails because the website can not be reached or is too busy (429 or 5xx) is tried again up to `retries` times, waiting
+    `backoff` seconds before the first retry and twice as long before each one after that. Returns {url: None if the page is cached, or
+    the exception that stopped it}, in the order of `urls`.
+
+    MODIFIES: the cache
+
+    IMPLEMENTATION SKETCH:
+      - Hand the pages to a pool of `workers` threads, which all download through the one pooled session (see _getSession())
+      - Each thread get()s its page, sleeping and trying again while the failure is one that may go away (see _warmPage())
+    '''
+
+    from concurrent.futures import ThreadPoolExecutor # imported here, see the imports at the top
+
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+      return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(urls))), thread_name_prefix="WebCacheWarm") as pool:
+      failures = list(pool.map(lambda url: self._warmPage(url, retries, backoff), urls))
+    return dict(zip(urls, failures))
+
+
+  def _warmPage(self, url, retries, backoff):
+    '''
+    EFFECTS: get()s the page at `url`, trying again up to `retries` times (with exponential backoff from `backoff` seconds) if the website
+    could not be reached or answered 429 or 5xx. Returns None once the page is cached, or the exception that stopped it.
+
+    HELPS: warm()
+    '''
+
+    import requests
+
+    for attempt in range(retries + 1):
+      try:
+        self.get(url)
+        return None
+      except OfflineError as error:
+        failure = error
+        if self.offline: # nothing will change by trying again
+          return failure
+      except requests.HTTPError as error:
+        failure = error
+        if error.response is None or error.response.status_code not in RETRY_STATUSES:
+          return failure
+      if attempt < retries:
+        time.sleep(backoff * 2 ** attempt)
+    return failure
+
+
+  def _decode(self, body, encoding):
+    '''
+    EFFECTS: Returns the cached page body `body` (bytes) as text, decoded the way the website said it was encoded.
+
+    HELPS: get()
+    '''
+
+    return body.decode(encoding or "utf-8", errors="replace")
+
+
+  def clear(self):
+    '''
+    EFFECTS: Forgets every cached page.
+
+    MODIFIES: the cache
+    '''
+
+    with self._lock:
+      self._memory.clear()
+      self._connection.execute("DELETE FROM pages")
+      self._connection.commit()
+
+
+  def close(self):
+    '''
+    EFFECTS: Closes the cache database (and the connection to the website). Safe to call more than once.
+    '''
+
+    with self._lock:
+      if self._session is not None:
+        self._session.close()
+        self._session = None
+      if self._connection is not None:
+        self._connection.close()
+        self._connection = None
+
+
+
+if __name__ == "__main__":
+  if sys.argv[1:] == ["--clear"]:
+    with WebCache() as webCache:
+      webCache.clear()
+    print("Every cached web page has been forgotten.")
+  else:
+    print("Usage: python DNP_WebCache.py --clear")
@@ -8,11 +8,13 @@
 Welcome to Dungeons & Pythons!
 
 To run the app, just run 'python DungeonsNPythons.py' in the shell of your choosing.
+(Run 'python DungeonsNPythons.py --offline' to use only web pages that were cached before, see DNP_WebCache.py)
 
 Ensure that you have support for the following modules in your python environment:
 
 - "requests" (For Webscrapping):     pip install requests
 - "bs4" (Parses Webscrapped Data):   pip install bs4
+- "selectolax" or "lxml" (optional, parse webscrapped pages several times faster, see DNP_Extract.py)
 
 Any other modules used should come already installed by default in your python installation
 
@@ -26,7 +28,9 @@ The general overview for the dungeons & pythons application code is as follows:
 
 - importing all modules used in the application. Instructions have been provided on how to install modules that do not come with python by default above
 
-- Defining a character class that contains all attributes a Dungeons & Dragons character needs
+- Importing the engine (DNP_Engine.py): the game options, a character class that contains all attributes a Dungeons & Dragons character needs,
+  the ability score dice rolling function 'rollScores', the race lifespan lookup function 'raceLifespan' (and the 'LifespanPrefetch' class that runs it
+  in the background as soon as the race is picked), and 'openCharacterStore'. None of them prompt anyone, so other scripts can use them too
 
 - Defining a character manager function 'characterManager' that allows the user to view and edit aspects of their character
 
@@ -34,20 +38,14 @@ The general overview for the dungeons & pythons application code is as follows:
 
 - Defining a character sending function 'sendChar' that allows the user to send their characters to other dungeons & pythons users
 
-- Defining a character receiving function 'receiveChar' that allows the user to receive characters from other dungeons & pythons users
-
-- The Main() function then begins providing the user a text main menu for all the features offered in dungeons & pythons (character creation, character management, and character sharing)
-  !!!!!! REMINDER: Main() in python is any code that does not exist within another defined function. Main() begins after the receiveChar() function definition.
+- Defining a character syncing function 'syncChar' that allows the user to bring their characters and another dungeons & pythons user's characters up to date with each other
 
-- Main() continues so the user can use the character creation feature. For each step of character creation, we define a function (described below) to select and finalize character features.
-  At the end of Main() the user finalizes their decisions on character creation, the character gets saved to an external file, and the app terminates.
+- Defining a character receiving function 'receiveChar' that allows the user to receive characters from other dungeons & pythons users
 
 - Defining a character race selection function 'pickRace'
 
 - Defining a character class selection function 'pickClass'
 
-- Defining an ability score dice rolling function 'rollScores'
-
 - Defining an ability score allocation function 'assignScores'
 
 - Defining a character gender selection function 'genderAssignment'
@@ -55,6 +53,15 @@ The general overview for the dungeons & pythons application code is as follows:
 - Defining a character age selection function 'ageAssignment'
 
 - Defining a character name selection function 'nameAssignment'
+
+- The main() function then begins providing the user a text main menu for all the features offered in dungeons & pythons (character creation, character management, and character sharing)
+  !!!!!! REMINDER: main() only runs when this file is run directly ('python DungeonsNPythons.py'). Importing this file just defines everything above without prompting anyone,
+  and the networking, web page and dice modules are only imported once a function first needs them, so the app starts quickly (see the importTime benchmark in DNP_Benchmark.py).
+
+- main() continues so the user can use the character creation feature. Each step of character creation uses the functions described above to select and finalize character features.
+  At the end of main() the user finalizes their decisions on character creation, the character gets saved to an external file, and the app terminates.
+
+- Characters can also be made without any prompts at all (for NPCs, or by the thousands) using DNP_Generator.py
 '''
 ##################################
 
@@ -64,62 +71,18 @@ The general overview for the dungeons & pythons application code is as follows:
 
 # List of necessary modules used to execute Dungeons & Pythons:
 
-import shelve # storing character information in dedicated shelve files (shelves operate as dictionaries in python) in a folder called 'DNP_Characters' so charachter infromation gets saved across multiple sessions
 import random # mainly used for simulating rolling dice and creating values from random events
-import webbrowser as wb # used to open up web browsers to give users more information about some aspect of Dungeons and Dragons
-import requests # used to web scrape information off the internet to provide users with more helpful information when designing a character
-import bs4 # useful tool to help parse and format web scrapped data
-import os # use to handle file/folder control operations 
-import platform # used to check operating system of user to prevent non-Windows users from crashing the app if they use 'Character Share' feature 
-import socket # used to handle tcp communication for the 'Character Share' feature 
-from zipfile import ZipFile # used to consolidate and extract shelve files for the 'Character Share' feature 
-import shutil # only used to delete temporary directories created during 'Character Share' once they are no longer needed
-import re # only used to create regular expressions filter to make obtaining personal ip address easier
-
-
-
-# CLASS OVERVIEW:
-# The Character class is used as a wrapper for all important details a Dungeons and Dragons character needs (i.e. race, class, ability scores, etc.)
-# Each character object that gets created gets saved to a shelve so that saved characters exist across multiple sessions of the application
-# The user can view and edit their character (and details thereof) in character management mode
-class Character:
-    
-  # These get filled out in creation mode using constructor 
-  # All except for abScores are strings. abScores is a dictionary that maps strings to integers
-  race = None           
-  charClass = None
-  name = None
-  age = None
-  gender = None
-  abScores = None # This one can be updated later in character management mode
-
-
-  # Object constructor where we fill out class attributes based on user choices 
-  # This will be called once the user has finalized their decision in main()
-  def __init__(self, r, c, n, a, g, abS):
-    '''
-    EFFECTS: Creates character object based on all user decisions 
-
-    REQUIRES: Each argument not be set to null
-    '''
-    self.race = r
-    self.charClass = c
-    self.name = n
-    self.age = a
-    self.gender = g
-    self.abScores = abS
-    self.sessGoals = []
-    self.inventory = []
-
-
-  # These get updated in character management mode. For now we set them to default values that get shown until the user updates them 
-  # All are strings except for session goals (sessGoals) or inventory. Both of which are lists of strings
-  level = "Not yet set... (Some campaigns require you start at higher levels)"
-  gold = "0"
-  alignment = "Not yet set... (your character's true nature may emerge as their adventures unfold)"
-  sessGoals = None # If you have any goals or notes for the next play session (i.e. 'I curently have 5 health points' or 'sell magic staff') 
-  inventory = None 
-  backStory = "Not yet set... (Give your character a back story, it will help bring them more to life!)"
+import atexit # makes sure character changes waiting to be written get saved when the app closes
+import sys # command line arguments ('--offline')
+from DNP_Engine import (RACES, CLASSES, ALIGNMENTS, ABILITIES, SESSION_FLUSH_DELAY, Character, openCharacterStore, rollScores,
+                        LifespanPrefetch) # characters, the character store, dice and lifespan lookups, without any prompts (see DNP_Engine.py)
+from DNP_Reference import describe # race and class information shipped with the app, so it is there instantly and offline (see DNP_Reference.py)
+from DNP_WebCache import WebCache # keeps the web pages scraped for character creation on disk so they are only downloaded when they go out of date (see DNP_WebCache.py)
+
+# These are only imported by the function that first needs them, so starting the app (or importing this file) does not wait for them:
+#   webbrowser                                                 opening web pages for more information (pickRace(), pickClass(), ...)
+#   DNP_Share, DNP_Sync, DNP_ShareServer, DNP_Discovery        the 'Character Share' feature (sendChar(), syncChar(), receiveChar())
+#   DNP_Dice                                                   the dice engine, and NumPy with it (rollScores(), the odds of a re-roll in main())
 
 
 
@@ -128,7 +91,7 @@ def characterManager(CharObj):
   EFFECTS: After the character is made, the user will use this to manage said character.
   The user selects a character in main() and it gets passed as CharObj. We return the updated character when the user decides to save.
 
-  REQUIRES: CharObj is a valid character object that exists within the character shelve file
+  REQUIRES: CharObj is a valid character object that exists within the character store
 
   MODIFIES: CharObj : Type 'Character'
 
@@ -193,7 +156,7 @@ def characterManager(CharObj):
         print("Choose a row number from the following options. \nIf you need help deciding, type 'help' for a useful guide.\n")
 
         # All of the alignment options avalible in Dungeons and Dragons
-        aligns = ["Lawful Good", "Neutral Good", "Chaotic Good", "Lawful Neutral", "True Neutral", "Chaotic Neutral", "Lawful Evil", "Neutral Evil", "Chaotic Evil"]
+        aligns = ALIGNMENTS
 
         # printing out all the alignment options for the user to pick from
         for a in range(0,9):
@@ -217,6 +180,7 @@ def characterManager(CharObj):
             if choice == "help":
               # If so, attempt to open a helpful guide on alignment in the user's default browser
               print("\n Opening: https://dnd5e.info/beyond-1st-level/alignment/#:~:text=A%20typical%20creature%20in%20the,%2C%20chaotic%2C%20or%20neutral).\n")
+              import webbrowser as wb # imported here, only once the user asks for a web page
               wb.open("https://dnd5e.info/beyond-1st-level/alignment/#:~:text=A%20typical%20creature%20in%20the,%2C%20chaotic%2C%20or%20neutral).")
               continue # retun back to alignment option selection
             else: # The user did not type a valid alignment option 
@@ -406,7 +370,7 @@ def characterManager(CharObj):
       elif choice =="8": # SAVE CHARACTER CHANGES
         print(f"\nGo forth, {CharObj.name}! \n\n")
 
-        # Return the updated character object back to main() where it will be saved to the shelve folder
+        # Return the updated character object back to main() where it will be saved to the character store
         return CharObj
 
       elif choice =="9": # DELETE CHARACTER
@@ -415,7 +379,7 @@ def characterManager(CharObj):
           if choice == "y":
             print(f"\n Goodbye {CharObj.name}! \n")
 
-            # In this case, we will be returning the flag value of "y" back to main() which signals that this specific character object needs to be deleted from the shelve folder permanently
+            # In this case, we will be returning the flag value of "y" back to main() which signals that this specific character object needs to be deleted from the character store permanently
             return choice 
           elif choice == "n": # if they are not sure then just return them back to the main menu for character management
             break
@@ -452,201 +416,297 @@ def helpHeader(centerNum, text):
 
 
 
-def sendChar():
+def characterOptions(charStore):
+  '''
+  EFFECTS: Prints every character in `charStore` as a numbered option with its race, class and level, and returns the list of character names
+  in the same order. Options will look like "1) Patrick (Elf Wizard, level 3)", "2) Paul (Dwarf Fighter)", etc.
+  Only the small summary fields are read from the store, no character's backstory, inventory or goals get loaded just to show the menu.
+
+  HELPS: Main(), sendChar()
+  '''
+
+  characterList = []
+  for name, race, charClass, level, gold in charStore.summaries():
+    characterList.append(name)
+    levelText = f", level {level}" if level is not None else "" # characters whose level was never set just show race and class
+    print(f"{len(characterList)}) {name} ({race} {charClass}{levelText})")
+  return characterList
+
+
+
+def pickReceivers(several=False):
+  '''
+  EFFECTS: Looks for users on the local network who are receiving characters and lets the user pick one of them (or, if `several`, any
+  number of them), or type IP addresses instead (for networks that block discovery). Returns the list of (host, port) to connect to.
+
+  HELPS: sendChar(), syncChar()
+  '''
+
+  from DNP_Discovery import discoverReceivers # imported here, like the rest of the networking modules, only once the user shares characters
+  from DNP_Share import SHARE_PORT
+
+  print("\nLooking for users who are receiving characters on your network...")
+  receivers = discoverReceivers() # every receiver answers within the discovery timeout (see DNP_Discovery.py)
+
+  if not receivers: # nobody answered, maybe the network blocks broadcasts, so fall back on the IP address
+    print("No receiving users were found. Please type the appropriate ip address provided by the recieving user.")
+    if several:
+      print("(To send to several users at once, type each of their ip addresses separated by spaces.)")
+      hosts = input("IP Address of reciever: ").replace(",", " ").split() or [""] # (nothing typed fails to connect like any wrong address)
+      return [(host, SHARE_PORT) for host in hosts]
+    return [(input("IP Address of reciever: ").strip(), SHARE_PORT)]
+
+  for row, receiver in enumerate(receivers, 1):
+    print(f"{row}) {receiver['name']} ({receiver['address']})")
+  print()
+
+  if several:
+    prompt = "Which users would you like to send to? (type a row number, several row numbers separated by spaces, 'all', or ip addresses if they are not listed): "
+  else:
+    prompt = "Which user would you like to connect to? (type a row number, or their ip address if they are not listed): "
+
+  # User selection and input validation loop
+  while True:
+    choice = input(prompt).strip()
+    if several and choice.lower() == "all":
+      return [(receiver["address"], receiver["port"]) for receiver in receivers]
+    picks = choice.replace(",", " ").split() if several else [choice]
+    if picks and all((pick.isdigit() and 0 < int(pick) <= len(receivers)) or pick.count(".") == 3 for pick in picks): # row numbers or ip addresses
+      targets = [(receivers[int(pick)-1]["address"], receivers[int(pick)-1]["port"]) if pick.isdigit() else (pick, SHARE_PORT) for pick in picks]
+      return list(dict.fromkeys(targets)) # a receiver picked twice is only sent to once
+    print(f"'{choice}' is not a valid row number. Try again!")
+
+
+
+def sendChar(charStore):
   '''
-  EFFECTS: This will send a selected character (more specifically a character object) to another dungeons & pythons user 
+  EFFECTS: This will send one or more selected characters (more specifically character objects) from the character store `charStore` to another dungeons & pythons user 
 
   REQUIRES: The other dungeons & pythons user must have selected the 'Character Share' feature and are pending character receiving
 
   HELPS: Main()
 
   IMPLEMENTATION SKETCH:
-    - Open permanent character shelve/dictionary and let user pick character they wish to send (validate input in while loop as needed)
-        - Obtain receiving user's IP Address from user
-        - Create client socket object that will be used to send character object using tcp protocol
-        - Connect client (sender) to host (receiver) 
-        - If connection fails then inform user
-        - Otherwise create temporary shelve file/folder for the character that was selected
-        - Then create a zip file of the temporary shelve folder
-        - send zip file data to receiver in chunks until entire file is sent (using a while loop)
-        - Terminate connection to host and delete temporary shelve and zip file
-        - Close permanent shelve
-    - Inform the user if they made in mistakes when selecting a character or entering host's IP address
+    - Let user pick the characters they wish to send from the permanent character store: one row number, several, or 'all' (validate input in while loop as needed)
+    - Find the receiving users on the local network and let the user pick one, or several (or type their IP Addresses, see pickReceivers())
+    - If several receivers were picked, send the characters to all of them at the same time from one encoded copy (see DNP_Share.broadcastRoster())
+      and tell the user how each of them went
+    - Create client socket object that will be used to send the characters using tcp protocol
+    - Connect client (sender) to host (receiver) 
+    - If connection fails then inform user
+    - Otherwise send the characters, made in memory (see DNP_Share.py), so nothing gets written to disk
+        - One character is sent as one frame
+        - Several characters are all sent over the same connection as a bulk share, and the receiver reports back which ones it saved
+        - If the connection drops part way through a bulk share, reconnect and carry on from where the receiver got to
+    - Terminate connection to host
+    - Inform the user if they made in mistakes when selecting characters or entering host's IP address
   '''
 
-  # Check to see if there is a character shelve
-  try:
-    shelfFile = shelve.open('.\DNP_Characters\Characters')
-  except:
-    #if there isn't, prompt the user to make characters and exit the sending procedure
-    print("You do not have any characters to send. Make a character and try again!\n")
-    return 
-  
-  characterList = list(shelfFile.keys()) # list of keys which in this case are character names
+  from DNP_Share import ShareError, broadcastRoster, connectTo, sendCharacter, sendRoster # sends characters between users over the network (see DNP_Share.py)
 
   # check to see if the user has any characters to send. If not, then exit the sending procedure
-  if len(characterList) == 0:
+  if len(charStore) == 0:
     print("You do not have any characters to send. Make a character and try again!\n")
     return
   
-  # prints out all character names as options for sending
-  # Options will look like "1) Patrick ", "2) Paul", "3) Sarah", etc.
+  # prints out all characters as options for sending and keeps their names in the same order
   print()
-  for charNum in range(0,len(characterList)):
-    print(f"{charNum+1}) {characterList[charNum]}") 
+  characterList = characterOptions(charStore)
   print()
 
   # User selection and input validation loop
   while True:
 
-    choice = input("Which character would you like to send? (type a row number): ").strip()
+    choice = input("Which characters would you like to send? (type a row number, several row numbers separated by spaces, or 'all'): ").strip().lower()
+
+    if choice == "all": # the whole roster
+      names = characterList
+      break
 
     try: # in case the user enters a non numeric value, the except clause will trigger
-      choice = int(choice)
-      if choice > 0 and choice < (len(characterList)+1): # the user can only pick an integer that corresponds with a character option that was provided previously
-
-        # Obtain the user's selected character object from shelve
-        CharObj = shelfFile[characterList[choice-1]]
-
-        # Now the user must enter in the recieving user's IP Address
-        print("\nPlease type the appropriate ip address provided by the recieving user.")
-
-        # Obtain input from user that should be the IP Address of the reciever 
-        host = input("IP Address of reciever: ").strip()
-
-        # Infrom user that the application is attempting to connect to the reciever
-        print("\nAttempting to connect...")
-
-        # This creates the socket object that will send the character object to the other user using tcp protocol over a shared local network connection
-        # The arguments correspond with the protocols we wish to use for communication, i.e. TCP/IP (AF_INET = IP, SOCK_STREAM = TCP)
-        client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)  
-
-        # If the user entered the wrong IP or anything else that doesn't make sense, the execpt clause will trigger 
-        try:
-          # Try to connect to the recieving user
-          client.connect((host, 1002))
-        except:
-          # Connection failed and we exit the sending procedure
-          print("Connection attempt either failed or timed out. Double check ip address and try again.\n\n")
-          break # This returns the user back to the main menu
-
-        # Alert user the connection was successful and that the character selected will be sent
-        print(f"Connection made with other user! Sending {characterList[choice-1]}...")
-
-        # Make a temporary directory for storing a temporary shelve that... 
-        os.mkdir('.\DNP_Characters\Temp_Send')
-
-        # ... contains only the character object the user wishes to send
-        tempShelf = shelve.open('.\DNP_Characters\Temp_Send\Send')
-        tempShelf[characterList[choice-1]] = CharObj
-        tempShelf.close()
-
-
-        # For ease of implementation, we will be sending all of the shelve files (of which there are 3 for a given shelve object)
-        # as one zipped folder/file. The reason for this is because sending multiple files using the client object above can be rather
-        # tedious as far as separating and assembling the files' data into their distinct files on the recieving end. So we send everything
-        # as one zipped folder/file instead, and extract all of the contents on the recieving end.
-
-        # initializing empty file paths list (we need to collect the path of all files we wish to collect)
-        file_paths = []
-
-        # crawling through the temporary directory to collect all file paths 
-        # os.walk() is an easy way to access all of the directory's files and root path information
-        # root is the full path to the Temp_Send directory and files is a list of each file in the Temp_Send directory.
-        # There is only one directory of interest (Temp_Send), meaning 'directories' is not used and should just be ignored
-        for root, directories, files in os.walk('.\DNP_Characters\Temp_Send'): 
-          for filename in files:
-            # join the two strings root and filename in order to form the full filepath to the shelve file.
-            filepath = os.path.join(root, filename)
-            file_paths.append(filepath) # append the shelve file path to the shelve file_paths list
-
-
-        # printing the list of all files to be zipped (for testing purposes only)
-        '''
-        print('Following files will be zipped:')
-        for file_name in file_paths:
-          print(file_name)
-        '''
-
-
-        # Writing all files whose paths we collected above to a zipfile
-        with ZipFile('Send.zip','w') as zip:
-          # Writing each file one by one
-          for file in file_paths:
-            zip.write(file)
-        
+      rows = [int(row) for row in choice.replace(",", " ").split()]
+    except ValueError: # The user entered something that was not an integer causing `int(row)` to throw an error. Prompt them to try again
+      print(f"'{choice}' is not a valid row number. Try again!")
+      continue
 
-        # Now that we have our one unified zipfile, we write its data to the recieving user
-        file = open('.\Send.zip', 'rb')
-        file_data = file.read(2048) # We will be sending the zip file in 2048 byte chunks...
-        # ... until there is no more data to send (in which case file_data will be None which the while loop evaluates as false)
-        while file_data:
-          client.send(file_data) # send file data to recieving user
-          file_data = file.read(2048) # grab the next 2048 byte chunk
-        file.close() # The zip file has been sent completely and can now be closed
-        
+    # the user can only pick integers that correspond with character options that were provided previously
+    if rows and all(row > 0 and row < (len(characterList)+1) for row in rows):
+      names = list(dict.fromkeys(characterList[row-1] for row in rows)) # a row typed twice is only sent once
+      break
 
-        # We are finished with our connection to the other user so we terminate it
-        client.close()
+    # The user entered an integer choice that was not valid. Prompt them to try again
+    print(f"'{choice}' is not a valid row number. Try again")
 
-        # Inform the user the sending was successful
-        print(f"Successful! Other user now has {characterList[choice-1]} added to their character list.\n\n")
+  # Now the user picks the recieving user (or users), found on the local network or by IP Address
+  receivers = pickReceivers(several=True)
 
-        # The zipfile and the temporary shleve directory (and its contents) are no longer needed so we delete them
-        # The end user should never even know they existed
-        os.remove("send.zip") # deletes zip file
-        shutil.rmtree(".\DNP_Characters\Temp_Send") # deletes Temp_Send directory and all of its contents
-        break
-      
-      else: # The user entered an integer choice that was not valid. Prompt them to try again
-        print(f"'{choice}' is not a valid row number. Try again")
+  if len(receivers) > 1: # i.e. a DM handing the same NPC party to every player, everyone gets it at the same time
+    print(f"\nSending {len(names)} character{'s' if len(names) > 1 else ''} to {len(receivers)} users at once...")
+    reports = broadcastRoster(receivers, (charStore.get(name) for name in names),
+                              onResume=lambda receiver, attempt: print(f"The connection to {receiver[0]} was lost. Reconnecting to pick up where it stopped..."))
+    for (host, port), report in zip(receivers, reports):
+      if report["error"] is not None:
+        print(f"{host}: the characters could not be sent ({report['error']}).")
         continue
-    except: # The user entered something that was not an integer causing `int(choice)` to throw an error. Prompt them to try again
-      print(f"'{choice}' is not a valid row number. Try again!")
+      print(f"{host}: now has {len(report['saved'])} of the {len(names)} characters added to their character list.", end=" ")
+      if report["conflicts"]: # the receiver already had characters with these names, so they were skipped
+        print(f"They already have characters named {', '.join(report['conflicts'])}, so those were not added.", end=" ")
+      if report["rejected"]:
+        print(f"{len(report['rejected'])} of the characters could not be read by their app.", end="")
+      print()
+    print("\n")
+    return
+  host, port = receivers[0]
+
+  # Infrom user that the application is attempting to connect to the reciever
+  print("\nAttempting to connect...")
+
+  # This creates the connection that will send the characters to the other user using tcp protocol over a shared local network connection
+  # If the user entered the wrong IP or anything else that doesn't make sense, the execpt clause will trigger 
+  try:
+    # Try to connect to the recieving user
+    client = connectTo(host, port)
+  except OSError:
+    # Connection failed and we exit the sending procedure
+    print("Connection attempt either failed or timed out. Double check ip address and try again.\n\n")
+    return # This returns the user back to the main menu
+
+  # Alert user the connection was successful and that the characters selected will be sent
+  sending = names[0] if len(names) == 1 else f"{len(names)} characters"
+  print(f"Connection made with other user! Sending {sending}...")
+
+  # The characters are packed up in memory and sent, then we are finished with our connection to the other user so we terminate it
+  with client:
+    try:
+      if len(names) == 1:
+        sendCharacter(client, charStore.get(names[0]))
+        report = None
+      else: # every character goes over this one connection (and if it drops, a new one picks up where it stopped)
+        report = sendRoster(client, (charStore.get(name) for name in names), reconnect=lambda: connectTo(host, port),
+                            onResume=lambda attempt: print("The connection was lost. Reconnecting to pick up where it stopped..."))
+    except (OSError, ShareError):
+      print("The connection to the other user was lost before the characters were sent. Try again.\n\n")
+      return # This returns the user back to the main menu
+
+  # Inform the user the sending was successful
+  if report is None:
+    print(f"Successful! Other user now has {names[0]} added to their character list.\n\n")
+  else:
+    print(f"Successful! Other user now has {len(report['saved'])} of the {len(names)} characters added to their character list.")
+    if report["conflicts"]: # the receiver already had characters with these names, so they were skipped
+      print(f"They already have characters named {', '.join(report['conflicts'])}, so those were not added.")
+    if report["rejected"]:
+      print(f"{len(report['rejected'])} of the characters could not be read by the other user's app.")
+    print("\n")
+
+
+
+def syncChar(charStore):
+  '''
+  EFFECTS: This will sync the characters in the character store `charStore` with another dungeons & pythons user's characters: only the characters
+  (and only the parts of them) that changed on either side since the last sync are sent, in whichever direction they need to go (see DNP_Sync.py)
+
+  REQUIRES: The other dungeons & pythons user must have selected the 'Character Share' feature and be receiving characters
+
+  MODIFIES: Permanent character store
+
+  HELPS: Main()
+
+  IMPLEMENTATION SKETCH:
+    - Let user pick what happens when the same thing was changed on both sides (validate input in while loop as needed)
+    - Find the other user on the local network (or obtain their IP Address from user, see pickReceivers()) and connect to them
+    - If connection fails then inform user
+    - Otherwise sync the two rosters over the connection and tell the user what changed on each side and what conflicted
+  '''
+
+  from DNP_Share import ShareError, connectTo
+  from DNP_Sync import LAST_WRITER_WINS, REPORT_CONFLICTS, syncWith # only sends the characters that changed between two users' rosters (see DNP_Sync.py)
+
+  print("\nSyncing sends only what changed since the last time you synced with this user (in both directions), instead of whole characters.")
+  print("If the same thing was changed on both sides since then...")
+  print("\t+ Enter 'newest' to keep whichever side's character was changed last.")
+  print("\t+ Enter 'report' to leave both alone and be told about it.\n")
 
+  # User selection and input validation loop
+  while True:
+    choice = input("Which would you like to do: ").strip().lower()
+    if choice == "newest":
+      policy = LAST_WRITER_WINS
+      break
+    elif choice == "report":
+      policy = REPORT_CONFLICTS
+      break
+    else: # The user typed an invalid option. Inform them and try again.
+      print(f"I'm sorry, I didn't understand '{choice}' \n")
+
+  # Now the user picks the other user, found on the local network or by IP Address (the other user must be receiving characters)
+  host, port = pickReceivers()[0]
+  print("\nAttempting to connect...")
+
+  try:
+    client = connectTo(host, port)
+  except OSError:
+    # Connection failed and we exit the syncing procedure
+    print("Connection attempt either failed or timed out. Double check ip address and try again.\n\n")
+    return
+
+  print("Connection made with other user! Syncing characters...")
+  with client:
+    try:
+      report = syncWith(client, charStore, policy)
+    except (OSError, ShareError) as error: # nothing was saved on our side if the sync broke off
+      print(f"Unfortunately the sync could not be finished: {error}\n\n")
+      return
+
+  if not (report["pushed"] or report["pulled"] or report["conflicts"]):
+    print("Your characters were already in sync, nothing had to change.")
+  if report["pushed"]:
+    print(f"Updated on the other user's side: {', '.join(report['pushed'])}")
+  if report["pulled"]:
+    print(f"Updated on your side: {', '.join(report['pulled'])}")
+  for name, fields in report["conflicts"].items(): # left alone on both sides
+    print(f"{name} was changed by both of you ({', '.join(fields)}), so those were left alone.")
+  for reason in report["rejected"]:
+    print(f"Unfortunately a change could not be used: {reason}")
+  print(f"(The sync took {report['bytes']/1024:.1f} KB)\n\n")
 
 
-def receiveChar():
+
+def receiveChar(charStore):
   '''
-  EFFECTS: This will receive a character (more specifically a character object) from another another dungeons & pythons user
+  EFFECTS: This will receive a character, or many characters at once, (more specifically character objects) from another another dungeons & pythons user and save them to the character store `charStore`
 
   REQUIRES: The other dungeons & pythons user must have selected the 'Character Share' feature and are pending character sending
 
-  MODIFIES: Permanent character shelve file/dictionary
+  MODIFIES: Permanent character store
 
   HELPS: Main()
 
   IMPLEMENTATION SKETCH:
-    - Open character shelve/dictionary and let user confirm if they want to proceed with character receiving, exit back to main , or print out their local IP address (validate input in while loop as needed)
-        - If the user chose to see their local IP address...
-            - pipe 'ipconfig' shell command results into external text file.
-            - use regular expressions to find exact line of information about local IP address and print it 
-            - delete text file containing 'ipconfig' shell command results since it is no longer needed
+    - Let user confirm if they want to proceed with character receiving, exit back to main , or print out their local IP address (validate input in while loop as needed)
+        - If the user chose to see their local IP address, ask the operating system for it and print it (see DNP_Discovery.localAddresses())
         - If the user made a mistake typing a choice, inform them and let them try again.
-        - Otherwise create host socket object that will be used to receive character object using tcp protocol
-        - Connect client (sender) to host (receiver) 
-        - If connection fails then inform user
-        - Otherwise write received data in chunks to zip file until all data has been received (using a while loop)
-        - Terminate connection to client
-        - Extract all contents to a temporary folder and open shelve from contents (which is the one character sent by client)
-        - Check to see if there is a character that exists in the permanent shelve that shares the same name as the character received
-        - Reject character if there is a name match, otherwise save character in temporary shelve to permanent shelve
-        - Close permanent shelve and delete temporary shelve and zip file
+        - Otherwise start a server that receives characters using tcp protocol, from one sender ('proceed') or from any number of senders at once ('collect')
+        - While it is listening the server also answers senders looking for receivers on the local network, so they can pick this user from a list (see DNP_Discovery.py)
+        - If the server can not be started then inform user
+        - Otherwise, for every client (sender) that connects to the host (receiver), at the same time as any others (see DNP_ShareServer.py)...
+            - unpack each character in memory as it arrives
+            - Check to see if there is a character that exists in the permanent character store that shares the same name as the character received
+            - Reject character if there is a name match, otherwise save the received character to the permanent character store (in batches)
+            - Terminate connection to client
+            - Tell the user which characters were saved and which were rejected
+        - Stop after the one sender ('proceed'), or when the user presses Ctrl+C ('collect')
   '''
 
-  # In case the user does not have the shelve folder, make it for them
-  try: # if we try to open a file that does not exist, then an exception will be thrown
-    shelfFile = shelve.open('.\DNP_Characters\Characters')
-    shelfFile.close() # If the file opens successfully then that means it exists and we need not do anything else except close the file
-  except:  # an exception was thrown trying to open a file that does not exist so meaning the user does not yet have a DNP_Characters folder
-    os.mkdir('DNP_Characters') # In which case we make the folder for the user and create the shelve file
-    shelfFile = shelve.open('.\DNP_Characters\Characters')
-    shelfFile.close() # Nothing to do just yet so we close the file
-
+  from DNP_Discovery import localAddresses
+  from DNP_Share import SHARE_PORT
+  from DNP_ShareServer import collectShares # receives characters from any number of users at the same time (see DNP_ShareServer.py)
 
-  # Inform the user on providing the proper IP Address needed for communication to the sending user
-  print("\nIn order to receive a character from another user, you must provide your local wireless IP Address to the sender.")
+  # Inform the user on how the sending user will find them
+  print("\nWhile you are receiving, users sending characters on the same network will find you in their list of receivers.")
+  print("(If their network blocks that, you can provide them your local IP Address instead.)")
   print("If you would like to proceed and begin awaiting the other user's character, enter 'proceed'")
+  print("If you would like to collect characters from several users at once (i.e. every player in your party), enter 'collect'")
   print("Otherwise enter 'exit' to return to the main menu.")
   print("\n(If you are unaware of your local IP Address, type 'help' and it will be provided to you.\n")
 
@@ -658,32 +718,17 @@ def receiveChar():
     if choice == "help": # In the event the user does not know their IP Address, we can print out the information to the shell for the user to obtain
       print()
 
-      # We can utilize regular expressions to parse and provide the correct individual IP Address.
-      # We start by piping IP Address information to temporary text file called stuff.txt
-      os.system("ipconfig >> stuff.txt") 
-
-      # Temporary file containing IP Address information
-      with open('stuff.txt', 'r') as file:
-        data = file.read() # put results of ipconfig command into data variable 
-
-      # Regex filter to find correct ipv4 adress:
-      # x is a list of strings that match the regex below (it searches for the wifi specific ip address in data)
-      x = re.findall("Wireless LAN adapter Wi-Fi:\n*.*\n*.*\n*.*", data) 
-
-      # Printing the correct address to the user to share:
-      # x should only contain one string that matches the regex (hence why we access x[0])
-      # We only want the portion of that string (x[0][...]) that contains the IPv4 address information.
-      # We find that by grabing the index of the string starting from where IPv4 is mentioned (x[0].index('IPv4'))
-      # all the way to the end of the string (the : following x[0].index('IPv4'))
-      try: # If for some reason the regex fails to capture string correctly we will catch any exceptions that may arise.
-        print(x[0][x[0].index('IPv4'):])
-      except: # Tell the user that they will have to look up their IP Address manually since the automatic retrieval failed
-        print("Unfortunately we were unable to locate your IP address for you. You can look it up manually using the command 'ipconfig' in a different shell.")
-
-      # The temporary file is no longer needed so we can delete it
-      os.remove("stuff.txt") 
+      # The operating system tells us which addresses this computer has (wired or wireless, on any platform), no shell commands needed.
+      # The first one is the one network traffic normally leaves from, so it is the one most likely to be on the sender's network
+      addresses = localAddresses()
+      if addresses == ["127.0.0.1"]: # only this computer's own address, so it is not connected to any network
+        print("Unfortunately we were unable to locate your IP address for you. Make sure you are connected to the same network as the sender.")
+      else:
+        print(f"IPv4 Address: {addresses[0]}")
+        if len(addresses) > 1: # i.e. connected by both Wi-Fi and cable
+          print(f"(Other addresses of this computer: {', '.join(addresses[1:])})")
       print()
-    elif choice == "proceed": # The user wishes to proceed to character receiving 
+    elif choice == "proceed" or choice == "collect": # The user wishes to proceed to character receiving (from one user, or from many)
       break
     elif choice == "exit": # The user wants to return back to the main menu
       print()
@@ -699,252 +744,73 @@ def receiveChar():
 
   # The port number the host will be listening out for the sending user on.
   # The port value has been chosen mostly arbitrarily and is hardcoded to match the sending user's port. The user can not access nor change this.
-  port = 1002 
+  port = SHARE_PORT 
 
-  # This creates the socket object that will recieve the character object from the other user using tcp protocol over a shared local network connection.
-  # The arguments correspond with the protocols we wish to use for communication, i.e. TCP/IP
-  server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)  # AF_INET = IP, SOCK_STREAM = TCP
-  server.bind((host, port))  # bind server to IP and port above
-
-  # keyboard shutdown (CRTL+C) does not work. If user needs to restart, they must close the shell and restart the app manually.
-  # This is due to the implementation of the listen method for the server object
-  print("Awaiting to recieve character... (To cancel, close shellwindow)") 
+  # 'proceed' receives from one sender and then returns to the menu, 'collect' keeps receiving from anyone who sends until the user presses Ctrl+C
+  senders = 1 if choice == "proceed" else None
 
+  def listening(port): # called once the server is ready for senders
+    if senders == 1:
+      print("Awaiting to recieve character... (To cancel, press Ctrl+C)") 
+    else:
+      print("Awaiting characters from any number of users... (Press Ctrl+C once everyone has sent theirs)")
+
+  # This starts the server that will recieve characters from other users using tcp protocol over a shared local network connection,
+  # bound to the IP and port above and listening out for sending users (see DNP_ShareServer.py). Several users can send at the same time.
+  # Senders on the same network find it by broadcasting a discovery probe, which it answers while it is listening (see DNP_Discovery.py).
+  # Each character arrives as one frame that is unpacked entirely in memory, no files or folders are ever written,
+  # so if a transfer fails half way (or the app is closed) there is nothing to clean up.
+  # you can not recieve a character whose name is the same as an existing character the reciever already owns (or that another sender already sent).
+  # Since character names are the keys of the character store, a sent character is rejected if there is a name match, and the rest keep coming.
+  # The accepted characters are copied over to the reciever's permanent character store in batches, each written in one go, straight away (not written behind),
+  # so received characters are safely on disk even if the app is closed right after (or a sender's connection drops part way through).
   try:
-    server.listen() # Await connection from other user
-  except: 
+    collectShares(charStore, host, port, senders, onListening=listening, onReport=shareReport)
+  except OSError: 
     
-    # If for some reason the listen method fails, we will handle the exception here. This should never occur, but just in case to prevent the application from crashing, we will...
-    # ... catch the exception, prompt the user to try again, and return them to the main menu
+    # If for some reason the server can not be started (i.e. the port is already being used by another app), we will handle the exception here...
+    # ... prompt the user to try again, and return them to the main menu
     print("Server failure. Try again\n\n")
-    return
-
-  # server (reciever) has successfully established client (sender) connection
-  client_socket, client_address = server.accept()
-
-  # We expect that the user is sending a zip file, so we will create one from the data being recieved
-  file = open('recv.zip', "wb")
+  except KeyboardInterrupt: # The user is done receiving. Everything that was received has already been saved
+    print("\nNo longer receiving characters.\n\n")
 
-  # We will be recieving data for the zip file in 2048 byte chunks
-  data_chunk = client_socket.recv(2048)  # this is the first 2048 byte chunk
 
-  # When we run out of data chunks to write to the zip file the loop will terminate
-  while data_chunk:
-    file.write(data_chunk) # Write the data chunk to the file
-    data_chunk = client_socket.recv(2048) # Collect the next data chunk
 
-  # Close zipfile and terminate connection to client (sender)
-  file.close()
-  client_socket.close()
-
-  # extracting the contents of the recieved zip file to a temporary directory called Temp_Recv 
-  with ZipFile("recv.zip", 'r') as zip:
-    os.mkdir("Temp_Recv")
-    zip.extractall(path=".\Temp_Recv")
-  
-  # open temporary shelve to obtain sent character
-  tempShelf = shelve.open('.\Temp_Recv\DNP_Characters\Temp_Send\Send')
-
-  # open the usual permanent shelve in order to save sent character
-  shelfFile = shelve.open('.\DNP_Characters\Characters')
-
-  # list of recieved shelve keys (character names) from sender, will only contain the one character the sender provided (i.e. temp_list[0])
-  temp_list = list(tempShelf.keys()) 
-
-  # you can not recieve a character whose name is the same as an existing character the reciever already owns.
-  # Since character names are the keys of the shelve, you must reject the sent character if there is a name match.
-  if temp_list[0] in list(shelfFile.keys()): # Check if user already has character of the same name as recieved character
-    print(f"Unfortunately you already have a character named {temp_list[0]}, so the sent character will be rejected.\n\n")
-  else: # Otherwise you are free to proceed
-    print(f"Character has been recieved! Say hello to {temp_list[0]}!\n\n")
-
-    # Finally, we copy the sent character over to the reciever's permanent shelve.
-    shelfFile[temp_list[0]] = tempShelf[temp_list[0]]
-
-  # Since we are finished with both shelves, we can close them now. 
-  tempShelf.close()
-  shelfFile.close()
-  
-  # The data recieved from the sender (the recv.zip file) is no longer necessary and will be deleted. Same goes for the temporary shelve folder Temp_Recv
-  # The end user will never be able to notice the existance of these files because they will be used and discarded almost immediately.
-  os.remove("recv.zip")
-  shutil.rmtree(".\Temp_Recv")
-
-
-    
-
-  
-
-
-#!!!!!!!!!!!!!!!!!!!!!!!!!!!! PROGRAM/Main() STARTS HERE !!!!!!!!!!!!!!!!!!!!!!!!!!!!
-
-
-helpHeader(50,"Welcome to Dungeons and Pythons") # Greet user with welcome header
-
-
-# Below is the Dungeons and Pythons mascot presented to the user at the beginning of every session.
-
-print('''    
-
-           /^\/^\					
-         _|__|  O|					
-\/     /~     \_/ \					
- \____|__________/  \					
-        \_______      \					
-                `\     \                 \		
-                  |     |                  \		
-                 /      /                    \		
-                /     /                       \\\	
-              /      /                         \ \	
-             /     /                            \  \	
-           /     /             _----_            \   \	
-          /     /           _-~      ~-_         |   |	
-         (      (        _-~    _--_    ~-_     _/   |	
-          \      ~-____-~    _-~    ~-_    ~-_-~    /	
-            ~-_           _-~          ~-_       _-~	
-               ~--______-~                ~-___-~	          An adventure awaitsssss...
-
-
-''')
-
-
-
-# ↓↓↓ Beginning/Main DNP Menu ↓↓↓
-
-# This acts as the main menu option execution and input validation loop
-while True:
-
-  # present user with their primary options
-  print(" + Enter '1' if you would like to make a new character.")
-  print(" + Enter '2' if you would like to manage an existing character.")
-  print(" + Enter '3' if you would like to send/recieve characters from other Dungeons and Pythons users. (WINDOWS USERS ONLY)")
-  print(" + Enter 'exit' if you would like to leave the app.\n")
-
-  # Throughout the program input will be validated for user ease-of-use and to prevent logic/programmatic errors
-  # strip() will remove unncessary spacing at the beginning and end of string variables. Example: "   Patrick  " is just "Patrick"
-  # lower() will turn every alphabetic character to lowercase if it is not already. Example "Patrick","PATRICK", and "pAtRiCk" all become "patrick"
-  choice = input("Which would you like to do: ").strip().lower() 
-
-  if choice == "1": # This option begins the character creation sequence down below main menu while loop
-      print("\n")
-      helpHeader(40, "Make a New Character") # display character creation header
-      break # breaks out of main menu while loop and begins character creation sequence
-
-  elif choice == "2": # This option opens the character manager, allowing the user to view/edit existing character information
-      print("\n")
-      helpHeader(36, "Manage Your Characters") # display character manager header
-      print()
-
-      # Try to open character shelve to access saved characters. If the user does not have a shelve, an exception will be thrown signaling for one to be created
-      try:
-        shelfFile = shelve.open('.\DNP_Characters\Characters')
-      except:
-        # in the event the user does not yet have a shelve...
-        os.mkdir('DNP_Characters') # ... we create the folder it will go in...
-        shelfFile = shelve.open('.\DNP_Characters\Characters') # ... and create and open a new shelve.
-      
-      # Store the characters' names from shelve as a list. Remember that shelves operate the same as dictionaries in python.
-      characterList = list(shelfFile.keys())
-
-      # Check to see if the user has any characters. If they do not, inform them and return to main menu
-      if len(characterList) == 0:
-        print("No characters have been created yet. Created characters will be stored in a folder called 'DNP_Characters' \n")
-        continue
-
-      # Format and present character options for user to manage
-      # Options will look like "1) Patrick ", "2) Paul", "3) Sarah", etc.
-      for charNum in range(0,len(characterList)):
-        print(f"{charNum+1}) {characterList[charNum]}")
-      print()
-
-      # User character option selection and input validation loop
-      while True:
-        choice = input("Which character would you like to manage? (type a row number): ").strip()
-        try: # if the user does not type a numeric value, then the following conversion will throw
-          choice = int(choice) 
-          if choice > 0 and choice < (len(characterList)+1): # The user picked a valid character option among those presented previously
-            # Obtain the appropriate character object from shelve
-            CharObj = shelfFile[characterList[choice-1]]
-            break # Break out of character option selection and input validation loop and proceed to character manager
-          else: # The user did not type in a valid option among those presented previously. Infrom them and let them try again.
-            print(f"'{choice}' is not a valid row number. Try again")
-            continue
-        except: # The user typed a value that was not numeric. Infrom them and let them try again.
-          print(f"'{choice}' is not a valid row number. Try again!")
-      
-      helpHeader(36, f"Character: {CharObj.name}") # display character name header
-      print()
-      
-      nameSv = CharObj.name # save character name in case user chooses to delete the character from shelve 
-      CharObj = characterManager(CharObj)   # Update Character Object
-
-      if CharObj == "y": # characterManager() will return just "y" as a flag to signal that the user wanted to delete the character they chose. 
-        del shelfFile[nameSv]               # Delete Character
-      else: # Otherwise we update the character object stored in shelve to the character object that returned after being updated in characterManager() 
-        shelfFile[CharObj.name] = CharObj   # Save Changes
-
-      shelfFile.close()                     # Close Shelf
-  elif choice == "3": # This option allows users to share characters with one another
-    print("\n")
+def shareReport(report):
+  '''
+  EFFECTS: Tells the user what happened to the characters one sender sent (see DNP_Share.receiveRoster() for what `report` holds)
 
-    # prevent user from character share feature if they are not on a windows operating system
-    # (The main reason for this is the execution of windows only shell commands in the "Character Share" feature will crash on any other platform)
-    if platform.system() != "Windows":
-      print("This feature is only offered for Windows users of Dungeons and Pythons, sorry!\n")
-      continue
+  HELPS: receiveChar()
+  '''
 
-    helpHeader(30, "Character Share") # display character share header
+  if report.get("sync"): # the other user synced with us instead of sending characters (see syncChar())
+    print(f"A user synced with your characters. Updated on your side: {', '.join(report['saved']) or 'nothing'}. Sent back: {', '.join(report['sent']) or 'nothing'}.")
+    for name in report["conflicts"]:
+      print(f"{name} was changed by both of you, so it was left alone.")
+    if report["error"] is not None:
+      print(f"Unfortunately the sync could not be finished: {report['error']}")
     print("\n")
+    return
 
-    # Explaining the features of 'Character Share' to the user as well as some usage requirements
-    print("This feature allows you to send or recieve characters to other Dungeons and Python users.")
-    print("There are some requirements in order to use character sharing:")
-    print("\t- The character being sent must not share a name with any character the reciever already owns.")
-    print("\t- You and the other user must both be connected to the same Wifi network.")
-    print("\t- The connection must be wireless (i.e. wired internet connection only will not work).")
-    print("\t- A Windows notification may appear asking for you to enable python to allow for wireless connection access.")
-    print("\t  In which case you must allow python to have said access in order to continue.\n")
-    
-    print("If you would like to proceed enter 'proceed', otherwise enter 'exit' to return to the previous menu.")
+  for name in report["conflicts"]: # the user already has characters with these names
+    print(f"Unfortunately you already have a character named {name}, so the sent character will be rejected.")
+  for reason in report["rejected"]: # the sender's app sent something that is not a character
+    print(f"Unfortunately a character could not be received: {reason}")
+  if report["error"] is not None: # the sender hung up, went quiet for too long, or sent something that is not a character share
+    print(f"Unfortunately the characters could not all be received: {report['error']}")
+    if report.get("resumable"): # what did arrive is saved, and the sender's app reconnects on its own to send the rest
+      print("The sender can reconnect and pick up where it stopped.")
 
-    # User proceed/exit selection and input validation loop
-    while True:
-      choice = input("Which would you like to do: ").strip().lower()
+  if len(report["saved"]) == 1:
+    print(f"Character has been recieved! Say hello to {report['saved'][0]}!")
+  elif report["saved"]:
+    print(f"{len(report['saved'])} characters have been recieved! Say hello to {', '.join(report['saved'])}!")
+  print("\n")
 
-      # The user chose to proceed with character sharing and will now pick whether to send or recieve a character
-      if choice == "proceed":
-        print()
-        print("\t+ Enter '1' if you would like to send a character.")
-        print("\t+ Enter '2' if you would like to recieve a character.\n")
 
-        # User send/recieve selection and input validation loop
-        while True:
-          choice = input("Which would you like to do: ").strip().lower()
-          if choice == "1": # begin the sending procedure
-            sendChar()
-            break # Return back to main menu loop
-          elif choice == "2": # begin the recieving procedure
-            receiveChar()
-            break # Return back to main menu loop
-          else: # The user typed an invalid option. Inform them and try again. 
-            print(f"I'm sorry, I didn't understand '{choice}' \n")
-
-        break
-      elif choice == "exit": # The user does not want to character share and will return to the main menu loop
-        print('\n')
-        break
-      else: # The user typed an invalid option. Inform them and try again. 
-        print(f"I'm sorry, I didn't understand '{choice}' \n")
     
-    continue # return to main menu (the outer most while loop)
 
-
-  # user has finished their session and wishes to exit the program peacefully
-  elif choice == "exit":
-    exit()
-  else: # user entered in something that was not a valid choice
-    print(f"I'm sorry, I didn't understand '{choice}' \n")
-        
+  
 
 
 # ↓↓↓ CHARACTER CREATION STARTS HERE ↓↓↓
@@ -968,7 +834,8 @@ def pickRace():
     - Validate user input using while loop and input if/elif/else checks
         - If the user chose to find out more about a race then...
             - Use another while loop to validate input on which race they would like to know more about
-                - open up web page in their default browser on the race they wanted to know more about
+                - print what the reference index has on that race (summary, lifespan and traits, see DNP_Reference.py)
+                - if the user wants more (or the index has nothing), open up web page in their default browser on the race they wanted to know more about
                 - if this fails, catch the exception and inform user
         - If the user chose to pick their race randomly, then use random number generator to pick number associated with race option
         - If the user chose to pick a race option, then confirm the user's choice and return string of race that was associated with the number race option the user chose
@@ -977,7 +844,7 @@ def pickRace():
 
 
   # list of possible races avaliable in Dungeons and Dragons 5th edition that the user can pick from
-  races = ["Dragonborn","Dwarf","Elf","Gnome","Half-Elf","Halfling","Half-Orc","Human","Tiefling"]
+  races = RACES
 
   print("Let's start with your character's race. Choose from among these options:\n")
 
@@ -1007,9 +874,18 @@ def pickRace():
             
             if int(choice) > 0 and int(choice) < 10: # the user can only pick among the nine races available
               raceStr = races[int(choice)-1].lower() # save the race the user picked as a string
+
+              # Show what the reference index has on the race right here (no internet needed, see DNP_Reference.py), and only open the browser if the user wants more
+              info = describe(races[int(choice)-1])
+              if info:
+                print("\n" + "\n".join(info))
+                if input("\nWould you like to read more about it in your web browser? (Y/N): ").strip().lower() != "y":
+                  break # return back to the race option selection loop
+
               print("\nOpening:  https://www.dndbeyond.com/races/" + raceStr + "\n")
               try:
                 # the user's default web browser will open displaying a page about the race option they want to learn more about
+                import webbrowser as wb # imported here, only once the user asks for a web page
                 wb.open('https://www.dndbeyond.com/races/' + raceStr)
               except: # If for some reason opening the link fails
                 print("Sorry, unable to open URL in browser.")
@@ -1043,17 +919,13 @@ def pickRace():
         if choice != "info" and choice != "random": # in case the user chose info or random, we will not alert them to anything. Loop will just repeat with no prompt
           print(f"I'm sorry, I didn't understand '{choice}' ") # Inform the user of their mistake and let them try again.
 
-# The user will select a Dungeons & Dragons character race using the pickRace() function above
-raceChoice = pickRace()
-print()
-
 
 # ---------------------------------- CHARACTER CLASS I/O ----------------------------------
 
 def pickClass():
   '''
   EFFECTS: Allows the user to select a class option for their character (returns class choice as string). Additionally if the user would like to know more 
-  about a particular class, a webpage will open up on their default browser displaying more information about the class.
+  about a particular class, what the reference index has on it is shown (see DNP_Reference.py), and a webpage can open up on their default browser displaying more information about the class.
 
   HELPS: Main()
 
@@ -1062,7 +934,8 @@ def pickClass():
     - Validate user input using while loop and input if/elif/else checks
         - If the user chose to find out more about a class then...
             - Use another while loop to validate input on which class they would like to know more about
-                - open up web page in their default browser on the class they wanted to know more about
+                - print what the reference index has on that class (summary, hit die, primary ability and saving throws, see DNP_Reference.py)
+                - if the user wants more (or the index has nothing), open up web page in their default browser on the class they wanted to know more about
                 - if this fails, catch the exception and inform user
         - If the user chose to pick their class randomly, then use random number generator to pick number associated with class option
         - If the user chose to pick a class option, then confirm the user's choice and return string of class that was associated with the number class option the user chose
@@ -1070,7 +943,7 @@ def pickClass():
   '''
 
   # list of possible classes avaliable in Dungeons and Dragons 5th edition that the user can pick from
-  classes = ["Barbarian","Bard","Cleric","Druid","Fighter","Monk","Paladin","Ranger","Rogue","Sorcerer","Warlock","Wizard"]
+  classes = CLASSES
 
   print("Next is your character's class. Choose from among these options:\n")
 
@@ -1099,9 +972,18 @@ def pickClass():
             if int(choice) > 0 and int(choice) < 13: # the user can only pick among the 12 classes available
               
               classStr = classes[int(choice)-1].lower()# save the class the user picked as a string
+
+              # Show what the reference index has on the class right here (no internet needed, see DNP_Reference.py), and only open the browser if the user wants more
+              info = describe(classes[int(choice)-1])
+              if info:
+                print("\n" + "\n".join(info))
+                if input("\nWould you like to read more about it in your web browser? (Y/N): ").strip().lower() != "y":
+                  break # return to class option selection loop
+
               print("\nOpening:  https://www.dndbeyond.com/classes/" + classStr + "\n")
               try:
                 # Open webpage associated with the class the user wants to know more about
+                import webbrowser as wb # imported here, only once the user asks for a web page
                 wb.open('https://www.dndbeyond.com/classes/' + classStr)
               except: # If for some reason the application fails to open the browser to the right page 
                 print("Sorry, unable to open URL in browser.")
@@ -1137,74 +1019,9 @@ def pickClass():
         if choice != "info" and choice != "random": # in case the user chose info or random, we will not alert them to anything. Loop will just repeat with no prompt
           print("I'm sorry, I didn't understand.") # Inform the user of their mistake and let them try again.
 
-# The user will select a Dungeons & Dragons character class using the pickClass() function above
-classChoice = pickClass()
-print()
-
 
 # ---------------------------------- ABILITY SCORE CALCULATIONS ----------------------------------
 
-
-print("Now it's time to calculate ability score values! 6 values will be displayed down below.")
-print("You will be asked which values will go to which of your character's ability score. \n")
-
-def rollScores():
-  '''
-  EFECTS: Returns list of six ability scores values that were calculated according to Dungeons & Dragons rules.
-
-  HELPS: Main()
-
-  IMPLEMENTATION SKETCH: 
-    - In order to simulate the same probability as rolling a real dice for ability scores, we will follow the same strategy:
-        - For each ability score, we roll a six-sided dice four times.
-        - We take the sum of the highest three rolls and that becomes an ability score value that gets appended to a values list
-        - We do this process a total of six times for each ability score
-    - We then return the list of ability score integer values.
-  '''
-
-  # list where each ability score value is kept
-  values = []
-  
-  for score in range(1,7): # For each of the six ability scores... (Strength, Dexterity, Constitution, Intelligence, Wisdom, and Charisma)
-    rolls = [] # where each roll of a six-sided dice gets stored
-
-    for roll in range(1,5): # ... we roll 4 dice...
-      rolls.append(random.randrange(1,7)) # ... And add each roll to the rolls list
-    
-    # We then sort the rolls in ascending order
-    rolls.sort()
-
-    sum = 0 # this sum will add up each of the...
-    for i in range(1,4): # ... three highest rolls (i.e. rolls[1], rolls[2], and rolls[3])
-      sum += rolls[i]
-    
-    # We then add this sum as a potential score to value list
-    values.append(sum)
-
-  # Finally we will have a score for each of the six ability scores and we return this list
-  return values
-
-
-# We roll our six ability score values and let the user decide if they want to reroll their scores or proceed
-while True:
-
-  # Obtain a list of potential ability scores
-  Scores = rollScores()
-
-
-  for score in range(0,6): # For each of the six ability scores... (Strength, Dexterity, Constitution, Intelligence, Wisdom, and Charisma)
-    print(f"{score+1}) {Scores[score]}") # Print out a score value that was rolled, in the format of "1) 16", "2) 7", etc.
-  print()
-
-  # Prompt the user to confirm if they would like to keep their scores or re-roll them
-  choice = input("Would you like to re-roll your ability scores? (Y/N): ").strip().lower()
-
-  # if the user is happy with their roles (meaning they typed "n" or "N"), then let them proceed. Otherwise re-roll the scores.
-  if choice == "n": 
-    break
-print()
-
-
 def assignScores(Scores):
   '''
   EFFECTS: Allows the user to assign ability score values based on a list of ability score dice rolls (the argument 'Scores')
@@ -1225,7 +1042,7 @@ def assignScores(Scores):
 
   # Dictionary of all ability scores avaliable in Dungeons and Dragons 5th edition that a character has.
   # Each ability will be mapped to an integer representing the ability score value
-  abScores = {"Strength" : None, "Dexterity" : None, "Constitution" : None, "Intelligence" : None, "Wisdom" : None, "Charisma" : None}
+  abScores = {ability : None for ability in ABILITIES}
 
   # This list will keep track of which ability score choicrs have already been allocated a value 
   # (Starts empty as the user has not selected any yet)
@@ -1261,25 +1078,6 @@ def assignScores(Scores):
   return abScores # Return dictionary mapping of abilities to score values
 
 
-# Allow the user assign their ability score rolls and reroll if they are not satisfied
-while True:
-  abScores = assignScores(Scores) # Obtain ability score dictionary from scores rolled after user has allocated each score accordingly
-  print(f"Your character has the following ability scores: \n{abScores}")
-  print()
-  print("Are you satisfied with your ability scores?")
-
-  # Allow the user one last chance to confirm whether or not they want to keep their ability scores mapped as they currently are or reallocate their ability score values
-  choice = input("( 'Y' to move on / 'N' to reallocate scores): ").strip().lower()
-
-  # If the user types yes ("y" or "Y") then we proceed with character creation. Otherwise we re-print the scores rolled and allow the user to reallocate them once again. 
-  if choice == "y":
-    break
-  else:
-      print()
-      for score in range(0,6): # For each of the six ability scores... (Strength, Dexterity, Constitution, Intelligence, Wisdom, and Charisma)
-        print(f"{score+1}) {Scores[score]}") # Print out a score value that was rolled, in the format of "1) 16", "2) 7", etc.
-      print()
-
 
 # ---------------------------------- NAME, GENDER, AND AGE ASSIGNMENT ----------------------------------
 
@@ -1319,26 +1117,17 @@ def genderAssignment():
   return genderChoice # return user's gender option
 
 
-# User gender selection and input loop (simplified to only proceed on a yes condition)
-while True:
-  genderChoice = genderAssignment()
-  choice = input(f"You went with the gender option: {genderChoice} \nIs this correct (Y/N): ").strip().lower()
-  if choice == "y":
-    break
-
 
-
-def ageAssignment():
+def ageAssignment(raceChoice, lifespans):
   '''
   EFFETCS: Allows the user to pick an age for their character and also provides information (obtained through webscrapping) 
-  on race specific age-ranges based on what the user had previously selected as their character's race.
+  on race specific age-ranges based on what the user had previously selected as their character's race (the argument 'raceChoice').
+  The information is looked up by the LifespanPrefetch `lifespans`, which usually already started on it in the background when the race was picked.
 
   HELPS: Main()
 
   IMPLEMENTATION SKETCH: 
-    - Attempt to webscrape data from web page containing information about a character's race
-        - Create webscrapping parser so that we can retrieve exact age/lifespan information about character's race
-        - Decide on parsing parameter using user's character race option
+    - Obtain age/lifespan information about character's race (see raceLifespan(), usually already looked up in the background by `lifespans`)
         - Print age/lifespan information about character race to user
     - If the webscrapping/parsing fails, then inform the user and move on to age selection
     - Use while loop to validate user age input with if/elif/else checks
@@ -1351,29 +1140,8 @@ def ageAssignment():
   print(f"In case you were wondering, here is some information about the lifespan of the {raceChoice} race:\n")
 
   try:
-    # Attempt to obtain data scrapped from website (data correlating to information about the user's selected race)
-    # raceChoice has global scope so there is no need to pass it to function as argument
-    res = requests.get('http://dnd5e.wikidot.com/' + raceChoice.lower())
-
-    # In the event gathering the webscrapped data failed, an exception is raised
-    res.raise_for_status()
-
-    # We create a parser for the webscrapped data
-    AgeSoup = bs4.BeautifulSoup(res.text, 'html.parser')
-
-    # We need to select some parameters specific to parsing the data obtained for a specfic race 
-    if raceChoice == 'Human' or raceChoice == 'Dragonborn':
-      childNum = '1'
-    elif raceChoice == 'Elf' or raceChoice == "Tiefling":
-      childNum = '5'
-    elif raceChoice == 'Half-Elf' or raceChoice == 'Half-Orc':
-      childNum = '3'
-    else:
-      childNum = '2'
-
-    # This parses/obtains the specific string containing information about a particular race's longevity and how long they live on average from the webscrapped page html data.
-    elems = AgeSoup.select('#page-content > div.feature > div:nth-child(1) > div > ul:nth-child(' + childNum + ') > li')
-    print('"' + elems[0].getText() + '"') # We present this information to the user so they can be informed before making a decision on their character's age
+    # We present this information to the user so they can be informed before making a decision on their character's age
+    print('"' + lifespans.get(raceChoice) + '"')
   except: # An exception was thrown when attempting to webscrape data
       print("Sorry, couldn't obtain information. You may want to check your internet connection.")
 
@@ -1389,41 +1157,18 @@ def ageAssignment():
       print("Your age must be in the form of a number like '5' '60' or '374'")
 
 
-# User age selection and input loop (simplified to only proceed on a yes condition)
-while True:
-  ageChoice = ageAssignment()
-  choice = input(f"So your character is {ageChoice} years old? \nIs this correct (Y/N): ").strip().lower()
-  if choice == "y":
-    break
-
-
-# Character name assignment beings here
-
-print("\nNow let's give your character a name!")
-print("If you would like, I can help you find some names based on your character's race and gender (just type 'help' below) ")
-
-# Check to see if the user has the DNP_Characters directory where the character shelve should be
-try:
-  shelfFile = shelve.open('.\DNP_Characters\Characters') # if so we open the character shelve file
-except: 
-  os.mkdir('DNP_Characters') # in the event the user does not yet have a DNP_Characters folder, we make one for them an open a character shelve file
-  shelfFile = shelve.open('.\DNP_Characters\Characters')
-
-# We open the shelve here to make sure that when we call nameAssignment(), we do not let the user name the character a name
-# that is the same as an existing character. The keys in a shelve (which basically functions the same as a vanilla python dictionary) are character names 
-# which must be unique. We will check that this uniqueness is preserved in nameAssignment()'s function definition. 
 
-def nameAssignment():
+def nameAssignment(charStore, raceChoice):
   '''
   EFFECTS: Collects character name information from the user and ensures that it does not match an existing character's name.
   We will also supply the user with the option to learn more about common names given their prior race selection.  
-  NOTE: the shelve object `shelfFile` and race selection `raceChoice` both have global scope when defined above and do not need to be passed as arguments.
+  NOTE: `charStore` is the open character store (used to check for name matches) and `raceChoice` is the race the user picked earlier.
 
   HELPS: Main()
 
   IMPLEMENTATION SKETCH:
     - Use while loop to validate user name input with if/elif/else checks
-        - If the user typed something invalid as input (name being blank or another character in shelve already sharing the same name), inform them and let them try again.
+        - If the user typed something invalid as input (name being blank or another character in the character store already sharing the same name), inform them and let them try again.
         - If the user wanted help, then open a webpage in the user's default browser corresponding to the user's race selection and common names thereof
             - If opening the browser/webpage fails we inform the user and move on
         - Otherwise assign the user's name choice with the option they picked
@@ -1436,13 +1181,14 @@ def nameAssignment():
     nameChoice = input("Name Option: ").strip()
     if nameChoice == '': # character name cannot be blank string. Inform the user and let them try again. 
       print("\nYou must give your character a name!\n")
-    elif nameChoice in shelfFile.keys(): # do not allow user to name character if there exists a character with the same name already. Inform the user and let them try again. 
+    elif nameChoice in charStore: # do not allow user to name character if there exists a character with the same name already. Inform the user and let them try again. 
       print(f"\nYou already have a character called {nameChoice}. You must use a new name!\n")
     elif nameChoice.lower() == 'help':
 
       # Open a web page corresponding to the user's race selection and common names thereof
       print("\nOpening:  https://www.fantasynamegenerators.com/dnd-" + raceChoice.lower() + "-names.php" + "\n") # https://www.fantasynamegenerators.com/dnd-dragonborn-names.php
       try:
+        import webbrowser as wb # imported here, only once the user asks for a web page
         wb.open("https://www.fantasynamegenerators.com/dnd-" + raceChoice.lower() + "-names.php")
       except: # In the event opening the web page fails and throws an exception, we catch the exception and inform the user.
         print("Sorry, unable to open URL in browser.\n")
@@ -1454,80 +1200,355 @@ def nameAssignment():
       return nameChoice
 
 
-# User name selection and input loop (simplified to only proceed on a yes condition)
-while True:
-  nameChoice = nameAssignment()
-  choice = input(f"Your character's name is {nameChoice}? (Y/N): ").strip().lower()
-  if choice == "y":
-    break
 
 
 
-# ---------------------------------- CHARACTER FINALIZATION ----------------------------------
+#!!!!!!!!!!!!!!!!!!!!!!!!!!!! PROGRAM/Main() STARTS HERE !!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
-print()
-helpHeader(40,"Character Finalization") # display the character finalization header
+def main(offline=False):
+  '''
+  EFFECTS: Runs the interactive Dungeons & Pythons app: the main menu, character management, character share, and character creation.
+  With offline=True ('python DungeonsNPythons.py --offline') nothing is downloaded, scraped information only comes from the web cache.
 
-# Present the user all of their choices made thus far and present them with editing options
-while True:
+  HELPS: Running 'python DungeonsNPythons.py'. Importing this module does NOT run main(), so the functions above can be used from other scripts
+  (see DNP_Generator.py for making characters without any prompts).
+  '''
 
-  print()
-  print("This is your character:\n")
-  print(f"1) Name: {nameChoice}")
-  print(f"2) Gender: {genderChoice}")
-  print(f"3) Race: {raceChoice}")
-  print(f"4) Class: {classChoice}")
-  print(f"5) Age: {ageChoice}")
-  print(f"6) Ability Scores: \n   {abScores}")
-
-  print("\nIf you are finished, type 'Y' below. Otherwise type the row number of what you would like to change\n")
-
-  # Give the user the chance one last time to change anything they want about their character, or if they are finished, save their character to the shelve and end the application.
-  choice = input("Finalization Option: ").strip().lower() 
-  if choice == "y":
-    # Create the actual character object using the user's choices as constructor arguments 
-    NewChar = Character(raceChoice, classChoice, nameChoice, ageChoice, genderChoice, abScores)
+
+  helpHeader(50,"Welcome to Dungeons and Pythons") # Greet user with welcome header
+
+
+  # Below is the Dungeons and Pythons mascot presented to the user at the beginning of every session.
+
+  print('''    
+
+           /^\/^\					
+         _|__|  O|					
+\/     /~     \_/ \					
+ \____|__________/  \					
+        \_______      \					
+                `\     \                 \		
+                  |     |                  \		
+                 /      /                    \		
+                /     /                       \\\	
+              /      /                         \ \	
+             /     /                            \  \	
+           /     /             _----_            \   \	
+          /     /           _-~      ~-_         |   |	
+         (      (        _-~    _--_    ~-_     _/   |	
+          \      ~-____-~    _-~    ~-_    ~-_-~    /	
+            ~-_           _-~          ~-_       _-~	
+               ~--______-~                ~-___-~	          An adventure awaitsssss...
+
+
+''')
+
+
+
+  # One character store is used for the whole session. Recently used characters stay loaded in memory and changes are written behind in batches,
+  # so opening a character again or saving a small edit does not have to wait on the disk. Anything still waiting gets written when the app exits.
+  charStore = openCharacterStore(flushDelay=SESSION_FLUSH_DELAY)
+  atexit.register(charStore.close)
+
+  # Web pages scraped during character creation are kept on disk (next to the characters), so making ten Elves downloads the Elf page once
+  webCache = WebCache(offline=offline)
+  atexit.register(webCache.close)
+  lifespans = LifespanPrefetch(webCache) # looks up the picked race's lifespan in the background (see ageAssignment())
+
+
+  # ↓↓↓ Beginning/Main DNP Menu ↓↓↓
+
+  # This acts as the main menu option execution and input validation loop
+  while True:
+
+    # present user with their primary options
+    print(" + Enter '1' if you would like to make a new character.")
+    print(" + Enter '2' if you would like to manage an existing character.")
+    print(" + Enter '3' if you would like to send/recieve characters from other Dungeons and Pythons users.")
+    print(" + Enter 'exit' if you would like to leave the app.\n")
+
+    # Throughout the program input will be validated for user ease-of-use and to prevent logic/programmatic errors
+    # strip() will remove unncessary spacing at the beginning and end of string variables. Example: "   Patrick  " is just "Patrick"
+    # lower() will turn every alphabetic character to lowercase if it is not already. Example "Patrick","PATRICK", and "pAtRiCk" all become "patrick"
+    choice = input("Which would you like to do: ").strip().lower() 
+
+    if choice == "1": # This option begins the character creation sequence down below main menu while loop
+        print("\n")
+        helpHeader(40, "Make a New Character") # display character creation header
+        break # breaks out of main menu while loop and begins character creation sequence
+
+    elif choice == "2": # This option opens the character manager, allowing the user to view/edit existing character information
+        print("\n")
+        helpHeader(36, "Manage Your Characters") # display character manager header
+        print()
+
+        # Check to see if the user has any characters. If they do not, inform them and return to main menu
+        if len(charStore) == 0:
+          print("No characters have been created yet. Created characters will be stored in a folder called 'DNP_Characters' \n")
+          continue
+
+        # Format and present character options for user to manage, storing the characters' names as a list in the same order
+        characterList = characterOptions(charStore)
+        print()
+
+        # User character option selection and input validation loop
+        while True:
+          choice = input("Which character would you like to manage? (type a row number): ").strip()
+          try: # if the user does not type a numeric value, then the following conversion will throw
+            choice = int(choice) 
+            if choice > 0 and choice < (len(characterList)+1): # The user picked a valid character option among those presented previously
+              # Obtain the appropriate character object from the character store
+              CharObj = charStore.get(characterList[choice-1])
+              break # Break out of character option selection and input validation loop and proceed to character manager
+            else: # The user did not type in a valid option among those presented previously. Infrom them and let them try again.
+              print(f"'{choice}' is not a valid row number. Try again")
+              continue
+          except: # The user typed a value that was not numeric. Infrom them and let them try again.
+            print(f"'{choice}' is not a valid row number. Try again!")
+      
+        helpHeader(36, f"Character: {CharObj.name}") # display character name header
+        print()
+      
+        nameSv = CharObj.name # save character name in case user chooses to delete the character from the character store 
+        CharObj = characterManager(CharObj)   # Update Character Object
+
+        if CharObj == "y": # characterManager() will return just "y" as a flag to signal that the user wanted to delete the character they chose. 
+          charStore.delete(nameSv)            # Delete Character
+        else: # Otherwise we update the character object stored in the character store to the character object that returned after being updated in characterManager() 
+          charStore.save(CharObj)             # Save Changes (written behind, see SESSION_FLUSH_DELAY)
+
+    elif choice == "3": # This option allows users to share characters with one another
+      print("\n")
+
+      helpHeader(30, "Character Share") # display character share header
+      print("\n")
+
+      # Explaining the features of 'Character Share' to the user as well as some usage requirements
+      print("This feature allows you to send or recieve characters to other Dungeons and Python users.")
+      print("There are some requirements in order to use character sharing:")
+      print("\t- The character being sent must not share a name with any character the reciever already owns.")
+      print("\t- You and the other user must both be connected to the same local network (Wifi or wired).")
+      print("\t- A firewall notification (i.e. on Windows) may appear asking for you to enable python to allow for network access.")
+      print("\t  In which case you must allow python to have said access in order to continue.\n")
+    
+      print("If you would like to proceed enter 'proceed', otherwise enter 'exit' to return to the previous menu.")
+
+      # User proceed/exit selection and input validation loop
+      while True:
+        choice = input("Which would you like to do: ").strip().lower()
+
+        # The user chose to proceed with character sharing and will now pick whether to send or recieve a character
+        if choice == "proceed":
+          print()
+          print("\t+ Enter '1' if you would like to send a character.")
+          print("\t+ Enter '2' if you would like to recieve a character.")
+          print("\t+ Enter '3' if you would like to sync your characters with a user who is recieving.\n")
+
+          # User send/recieve selection and input validation loop
+          while True:
+            choice = input("Which would you like to do: ").strip().lower()
+            if choice == "1": # begin the sending procedure
+              sendChar(charStore)
+              break # Return back to main menu loop
+            elif choice == "2": # begin the recieving procedure
+              receiveChar(charStore)
+              break # Return back to main menu loop
+            elif choice == "3": # begin the syncing procedure
+              syncChar(charStore)
+              break # Return back to main menu loop
+            else: # The user typed an invalid option. Inform them and try again. 
+              print(f"I'm sorry, I didn't understand '{choice}' \n")
+
+          break
+        elif choice == "exit": # The user does not want to character share and will return to the main menu loop
+          print('\n')
+          break
+        else: # The user typed an invalid option. Inform them and try again. 
+          print(f"I'm sorry, I didn't understand '{choice}' \n")
     
-    # Save the final character object to the shelve so that it exists across multiple sessions of the app and close the shelve file
-    shelfFile[nameChoice] = NewChar
-    shelfFile.close()
+      continue # return to main menu (the outer most while loop)
+
+
+    # user has finished their session and wishes to exit the program peacefully
+    elif choice == "exit":
+      charStore.close() # write any character changes that are still waiting
+      return
+    else: # user entered in something that was not a valid choice
+      print(f"I'm sorry, I didn't understand '{choice}' \n")
+        
+
+
+  # The user will select a Dungeons & Dragons character race using the pickRace() function above
+  raceChoice = pickRace()
+  print()
+
+  # The race's lifespan (shown when the user picks an age) starts downloading now, while the user picks a class and rolls scores
+  lifespans.start(raceChoice)
+
+
+  # The user will select a Dungeons & Dragons character class using the pickClass() function above
+  classChoice = pickClass()
+  print()
+
+
+  # ---------------------------------- ABILITY SCORE CALCULATIONS ----------------------------------
+
+
+  print("Now it's time to calculate ability score values! 6 values will be displayed down below.")
+  print("You will be asked which values will go to which of your character's ability score. \n")
+
+  # We roll our six ability score values and let the user decide if they want to reroll their scores or proceed
+  while True:
+
+    # Obtain a list of potential ability scores
+    Scores = rollScores()
+
+
+    for score in range(0,6): # For each of the six ability scores... (Strength, Dexterity, Constitution, Intelligence, Wisdom, and Charisma)
+      print(f"{score+1}) {Scores[score]}") # Print out a score value that was rolled, in the format of "1) 16", "2) 7", etc.
+    print()
+
+    # Let the user know their exact odds of doing better before they decide (see probRerollBeats() in DNP_Dice.py)
+    from DNP_Dice import probRerollBeats # (already loaded by rollScores() above)
+    print(f"Chance a re-roll beats this set (higher total ability modifier): {float(probRerollBeats(Scores)):.1%}\n")
+
+    # Prompt the user to confirm if they would like to keep their scores or re-roll them
+    choice = input("Would you like to re-roll your ability scores? (Y/N): ").strip().lower()
+
+    # if the user is happy with their roles (meaning they typed "n" or "N"), then let them proceed. Otherwise re-roll the scores.
+    if choice == "n": 
+      break
+  print()
+
+
+  # Allow the user assign their ability score rolls and reroll if they are not satisfied
+  while True:
+    abScores = assignScores(Scores) # Obtain ability score dictionary from scores rolled after user has allocated each score accordingly
+    print(f"Your character has the following ability scores: \n{abScores}")
+    print()
+    print("Are you satisfied with your ability scores?")
+
+    # Allow the user one last chance to confirm whether or not they want to keep their ability scores mapped as they currently are or reallocate their ability score values
+    choice = input("( 'Y' to move on / 'N' to reallocate scores): ").strip().lower()
 
-    print(f"{nameChoice} is now an established character! \nTo manage {nameChoice}'s information, restart DungeonsNPythons and select the manage existing character option!\nAll characters are stored in a folder called 'DNP_Characters' so do NOT delete that folder unless you want to lose all your characters!\n\n")
-    break # This will break out of the final input loop and end the application.
+    # If the user types yes ("y" or "Y") then we proceed with character creation. Otherwise we re-print the scores rolled and allow the user to reallocate them once again. 
+    if choice == "y":
+      break
+    else:
+        print()
+        for score in range(0,6): # For each of the six ability scores... (Strength, Dexterity, Constitution, Intelligence, Wisdom, and Charisma)
+          print(f"{score+1}) {Scores[score]}") # Print out a score value that was rolled, in the format of "1) 16", "2) 7", etc.
+        print()
 
-  # Options for the user to edit any decision made thus far 
-  elif choice == "1":
-    nameChoice = nameAssignment()
-  elif choice == "2":
+
+  # User gender selection and input loop (simplified to only proceed on a yes condition)
+  while True:
     genderChoice = genderAssignment()
-  elif choice == "3":
-    raceChoice = pickRace()
-  elif choice == "4":
-    classChoice = pickClass()
-  elif choice == "5":
-    ageChoice = ageAssignment()
-  elif choice == "6": # Re-rolling and reallocating ability scores requires a bit of set up. Namely displaying each score rolled and letting the user re-roll if they want to.
+    choice = input(f"You went with the gender option: {genderChoice} \nIs this correct (Y/N): ").strip().lower()
+    if choice == "y":
+      break
+
+
+
+  # User age selection and input loop (simplified to only proceed on a yes condition)
+  while True:
+    ageChoice = ageAssignment(raceChoice, lifespans)
+    choice = input(f"So your character is {ageChoice} years old? \nIs this correct (Y/N): ").strip().lower()
+    if choice == "y":
+      break
+
+
+  # Character name assignment beings here
+
+  print("\nNow let's give your character a name!")
+  print("If you would like, I can help you find some names based on your character's race and gender (just type 'help' below) ")
+
+  # We pass the character store to nameAssignment() to make sure we do not let the user name the character a name
+  # that is the same as an existing character. Characters are saved by name, so names
+  # must be unique. We will check that this uniqueness is preserved in nameAssignment()'s function definition. 
+
+  # User name selection and input loop (simplified to only proceed on a yes condition)
+  while True:
+    nameChoice = nameAssignment(charStore, raceChoice)
+    choice = input(f"Your character's name is {nameChoice}? (Y/N): ").strip().lower()
+    if choice == "y":
+      break
+
+
+
+  # ---------------------------------- CHARACTER FINALIZATION ----------------------------------
+
+  print()
+  helpHeader(40,"Character Finalization") # display the character finalization header
+
+  # Present the user all of their choices made thus far and present them with editing options
+  while True:
+
+    print()
+    print("This is your character:\n")
+    print(f"1) Name: {nameChoice}")
+    print(f"2) Gender: {genderChoice}")
+    print(f"3) Race: {raceChoice}")
+    print(f"4) Class: {classChoice}")
+    print(f"5) Age: {ageChoice}")
+    print(f"6) Ability Scores: \n   {abScores}")
+
+    print("\nIf you are finished, type 'Y' below. Otherwise type the row number of what you would like to change\n")
+
+    # Give the user the chance one last time to change anything they want about their character, or if they are finished, save their character to the character store and end the application.
+    choice = input("Finalization Option: ").strip().lower() 
+    if choice == "y":
+      # Create the actual character object using the user's choices as constructor arguments 
+      NewChar = Character(raceChoice, classChoice, nameChoice, ageChoice, genderChoice, abScores)
     
-    # re-roll ability score values
-    while True:
-      Scores = rollScores()
+      # Save the final character object to the character store so that it exists across multiple sessions of the app and close the character store
+      charStore.save(NewChar)
+      charStore.close()
+
+      print(f"{nameChoice} is now an established character! \nTo manage {nameChoice}'s information, restart DungeonsNPythons and select the manage existing character option!\nAll characters are stored in a folder called 'DNP_Characters' so do NOT delete that folder unless you want to lose all your characters!\n\n")
+      break # This will break out of the final input loop and end the application.
+
+    # Options for the user to edit any decision made thus far 
+    elif choice == "1":
+      nameChoice = nameAssignment(charStore, raceChoice)
+    elif choice == "2":
+      genderChoice = genderAssignment()
+    elif choice == "3":
+      raceChoice = pickRace()
+      lifespans.start(raceChoice) # cancels the old race's lookup if the race changed
+    elif choice == "4":
+      classChoice = pickClass()
+    elif choice == "5":
+      ageChoice = ageAssignment(raceChoice, lifespans)
+    elif choice == "6": # Re-rolling and reallocating ability scores requires a bit of set up. Namely displaying each score rolled and letting the user re-roll if they want to.
+    
+      # re-roll ability score values
+      while True:
+        Scores = rollScores()
+
+        # Display each score rolled
+        for score in range(0,6):
+          print(f"{score+1}) {Scores[score]}")
+        print()
+        from DNP_Dice import probRerollBeats
+        print(f"Chance a re-roll beats this set (higher total ability modifier): {float(probRerollBeats(Scores)):.1%}\n")
 
-      # Display each score rolled
-      for score in range(0,6):
-        print(f"{score+1}) {Scores[score]}")
+        # Allow the user to re-roll scores if they would like
+        choice = input("Would you like to re-roll your ability scores? (Y/N): ").strip().lower()
+        if choice == "n":
+          break
       print()
 
-      # Allow the user to re-roll scores if they would like
-      choice = input("Would you like to re-roll your ability scores? (Y/N): ").strip().lower()
-      if choice == "n":
-        break
-    print()
+      # Let the user reallocate ability score values
+      abScores = assignScores(Scores)
+
+    else: # If the user types something not among the listed options. We inform the user and let them try again.
+      print(f"I'm sorry, I didn't understand '{choice}' \n")
+
 
-    # Let the user reallocate ability score values
-    abScores = assignScores(Scores)
+  # NOTE: program will terminate after a new character is created.        
 
-  else: # If the user types something not among the listed options. We inform the user and let them try again.
-    print(f"I'm sorry, I didn't understand '{choice}' \n")
 
 
-# NOTE: program will terminate after a new character is created.        
+if __name__ == "__main__":
+  main(offline="--offline" in sys.argv[1:])